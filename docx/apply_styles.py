@@ -3,127 +3,564 @@
 
 """
 根据JSON文件中的样式信息修改Word文档中的样式
+
+样式JSON只编译一次，生成预先构建好的w:rPr/w:pPr等XML片段，应用时直接克隆到
+目标文档的styles.xml中。编译结果会缓存到文件，批量模式下使用多进程处理整个文件夹。
+样式按JSON中的direct字段（样式直接设置的属性）整体替换，不会把docDefaults
+展开到每个样式中；属性名保留原命名空间（如w14:ligatures）
 """
 
 import os
 import json
-from docx import Document
-from docx.shared import Pt, RGBColor
-from docx.enum.text import WD_PARAGRAPH_ALIGNMENT
-from docx.enum.style import WD_STYLE_TYPE
+import copy
+import pickle
+import hashlib
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree as ET
 
 # 文件读取部分，便于修改需读取文件名
 input_file = "document.docx"  # 请修改为实际的文件名
 styles_json_file = "document_styles.json"  # 请修改为实际的样式JSON文件名
 
+# 批量模式：对文件夹中的所有docx文件应用样式
+batch_mode = False
+input_folder = "documents"  # 批量模式下要处理的文件夹
+
+# 并行进程数，None表示使用全部CPU核心
+max_workers = None
+
+# 编译后样式的缓存文件，样式JSON不变时直接复用
+compiled_cache_file = f"{os.path.splitext(styles_json_file)[0]}.compiled.pickle"
+
 # 输出文件名
 output_file = f"{os.path.splitext(input_file)[0]}（已修改）.docx"
 
-def apply_styles(file_path, styles_info):
+# 编译格式版本，修改编译逻辑后递增以使旧缓存失效
+COMPILER_VERSION = 3
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# extract_styles导出的命名空间前缀
+NAMESPACES = {
+    "w14": "http://schemas.microsoft.com/office/word/2010/wordml",
+    "w15": "http://schemas.microsoft.com/office/word/2012/wordml",
+    "w16se": "http://schemas.microsoft.com/office/word/2015/wordml/symex",
+    "w16cid": "http://schemas.microsoft.com/office/word/2016/wordml/cid",
+    "w16": "http://schemas.microsoft.com/office/word/2018/wordml",
+    "w16cex": "http://schemas.microsoft.com/office/word/2018/wordml/cex",
+    "w16sdtdh": "http://schemas.microsoft.com/office/word/2020/wordml/sdtdatahash",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "m": "http://schemas.openxmlformats.org/officeDocument/2006/math",
+    "mc": "http://schemas.openxmlformats.org/markup-compatibility/2006",
+}
+
+# 支持的样式类型
+STYLE_TYPES = {"paragraph", "character", "table", "numbering"}
+
+# 样式元素中子元素的顺序（属性块位于名称、继承关系等元素之后）
+BLOCK_ORDER = ["name", "aliases", "basedOn", "next", "link", "autoRedefine", "hidden", "uiPriority",
+               "semiHidden", "unhideWhenUsed", "qFormat", "locked", "personal", "personalCompose",
+               "personalReply", "rsid", "pPr", "rPr", "tblPr", "trPr", "tcPr", "tblStylePr"]
+
+# 属性块内子元素的顺序（Word要求按架构顺序排列）
+PROPERTY_ORDER = {
+    "pPr": ["pStyle", "keepNext", "keepLines", "pageBreakBefore", "framePr", "widowControl", "numPr",
+            "suppressLineNumbers", "pBdr", "shd", "tabs", "suppressAutoHyphens", "kinsoku", "wordWrap",
+            "overflowPunct", "topLinePunct", "autoSpaceDE", "autoSpaceDN", "bidi", "adjustRightInd",
+            "snapToGrid", "spacing", "ind", "contextualSpacing", "mirrorIndents", "suppressOverlap", "jc",
+            "textDirection", "textAlignment", "textboxTightWrap", "outlineLvl", "divId", "cnfStyle"],
+    "rPr": ["rStyle", "rFonts", "b", "bCs", "i", "iCs", "caps", "smallCaps", "strike", "dstrike", "outline",
+            "shadow", "emboss", "imprint", "noProof", "snapToGrid", "vanish", "webHidden", "color", "spacing",
+            "w", "kern", "position", "sz", "szCs", "highlight", "u", "effect", "bdr", "shd", "fitText",
+            "vertAlign", "rtl", "cs", "em", "lang", "eastAsianLayout", "specVanish", "oMath"],
+    "tblPr": ["tblStyle", "tblpPr", "tblOverlap", "bidiVisual", "tblStyleRowBandSize", "tblStyleColBandSize",
+              "tblW", "jc", "tblCellSpacing", "tblInd", "tblBorders", "shd", "tblLayout", "tblCellMar", "tblLook"],
+}
+
+# 与具体文档相关的属性（编号ID），不从样式JSON复制，保留目标文档原有的值
+DOCUMENT_SPECIFIC_PROPERTIES = {"numPr"}
+
+# 对齐方式：python-docx枚举值或名称 -> w:jc取值
+ALIGNMENT_MAP = {
+    0: "left", 1: "center", 2: "right", 3: "both", 4: "distribute",
+    "left": "left", "center": "center", "right": "right", "justify": "both", "distribute": "distribute",
+}
+
+# 普通属性 -> 优先级更高的主题属性
+THEME_ATTRIBUTES = {
+    "ascii": ("asciiTheme",),
+    "hAnsi": ("hAnsiTheme",),
+    "eastAsia": ("eastAsiaTheme",),
+    "cs": ("cstheme",),
+    "val": ("themeColor", "themeShade", "themeTint"),
+}
+
+def w(name):
+    """返回带w命名空间的标签名或属性名"""
+    return f"{{{W_NS}}}{name}"
+
+def resolve_name(name):
     """
-    根据样式信息修改Word文档中的样式
+    将extract_styles导出的名称还原为Clark表示法
+    
+    本地名（如 rFonts）属于w命名空间，前缀名（如 w14:ligatures）按NAMESPACES查找，
+    {命名空间}名称 原样返回
     
     Args:
-        file_path: Word文档路径
-        styles_info: 包含样式信息的字典
+        name: 导出的标签名或属性名
     
     Returns:
-        修改后的Document对象
+        (Clark表示法的名称, 前缀)；前缀为None表示不需要声明
     """
-    # 检查文件是否存在
-    if not os.path.exists(file_path):
-        print(f"错误: 文件不存在: {file_path}")
-        return None
+    if name.startswith("{"):
+        return name, None
+    if ":" in name:
+        prefix, local = name.split(":", 1)
+        if prefix not in NAMESPACES:
+            raise ValueError(f"未知的命名空间前缀: {name}")
+        return f"{{{NAMESPACES[prefix]}}}{local}", prefix
+    return w(name), None
+
+def dict_to_element(name, value):
+    """
+    将extract_styles导出的属性字典还原为XML元素
+    
+    字符串值作为属性，字典值作为子元素，列表值作为多个同名子元素；
+    名称按原命名空间还原（见resolve_name）
+    
+    Args:
+        name: 元素名
+        value: 属性字典
+    
+    Returns:
+        XML元素
+    """
+    tag, prefix = resolve_name(name)
+    nsmap = {"w": W_NS}
+    if prefix:
+        nsmap[prefix] = NAMESPACES[prefix]
+    elem = ET.Element(tag, nsmap=nsmap)
+    for key, item in value.items():
+        if isinstance(item, dict):
+            elem.append(dict_to_element(key, item))
+        elif isinstance(item, list):
+            for sub in item:
+                elem.append(dict_to_element(key, sub))
+        else:
+            elem.set(resolve_name(key)[0], str(item))
+    return elem
+
+def twips(points):
+    """磅转换为缇（1磅 = 20缇）"""
+    return str(round(points * 20))
+
+def compile_legacy_font(font_info):
+    """
+    将JSON中的font字段编译为rPr属性元素
+    
+    font.name是python-docx读出的西文字体（rFonts的ascii），只写ascii/hAnsi，
+    不覆盖东亚和复杂文种字体
+    
+    Args:
+        font_info: 字体信息字典
+    
+    Returns:
+        字典 {属性名: XML元素}
+    """
+    props = {}
+    if font_info.get("name"):
+        rfonts = ET.Element(w("rFonts"))
+        for attr in ("ascii", "hAnsi"):
+            rfonts.set(w(attr), font_info["name"])
+        props["rFonts"] = rfonts
+    
+    if font_info.get("size"):
+        half_points = str(round(font_info["size"] * 2))
+        for tag in ("sz", "szCs"):
+            props[tag] = ET.Element(w(tag), {w("val"): half_points})
     
-    print(f"正在处理文件: {file_path}")
+    for key, tags in (("bold", ("b", "bCs")), ("italic", ("i", "iCs"))):
+        if font_info.get(key) is not None:
+            for tag in tags:
+                props[tag] = ET.Element(w(tag), {w("val"): "1" if font_info[key] else "0"})
     
-    # 打开文档
-    doc = Document(file_path)
+    underline = font_info.get("underline")
+    if underline is not None:
+        if underline is True or underline == 1:
+            props["u"] = ET.Element(w("u"), {w("val"): "single"})
+        elif underline is False or underline == 0:
+            props["u"] = ET.Element(w("u"), {w("val"): "none"})
     
-    # 遍历样式信息字典
+    color = font_info.get("color")
+    if isinstance(color, str) and len(color.lstrip("#")) == 6:
+        props["color"] = ET.Element(w("color"), {w("val"): color.lstrip("#").upper()})
+    elif isinstance(color, list) and len(color) == 3:
+        props["color"] = ET.Element(w("color"), {w("val"): "%02X%02X%02X" % tuple(color)})
+    
+    return props
+
+def compile_legacy_paragraph_format(para_format):
+    """
+    将JSON中的paragraph_format字段编译为pPr属性元素
+    
+    Args:
+        para_format: 段落格式字典
+    
+    Returns:
+        字典 {属性名: XML元素}
+    """
+    props = {}
+    alignment = para_format.get("alignment")
+    if isinstance(alignment, str):
+        alignment = alignment.lower()
+    if alignment in ALIGNMENT_MAP:
+        props["jc"] = ET.Element(w("jc"), {w("val"): ALIGNMENT_MAP[alignment]})
+    
+    spacing = {}
+    if para_format.get("space_before") is not None:
+        spacing[w("before")] = twips(para_format["space_before"])
+    if para_format.get("space_after") is not None:
+        spacing[w("after")] = twips(para_format["space_after"])
+    line_spacing = para_format.get("line_spacing")
+    if line_spacing is not None:
+        if line_spacing <= 10:
+            # 倍数行距，单倍行距为240
+            spacing[w("line")] = str(round(line_spacing * 240))
+            spacing[w("lineRule")] = "auto"
+        else:
+            # 固定行距，python-docx导出的是EMU（1缇 = 635 EMU）
+            spacing[w("line")] = str(round(line_spacing / 635))
+            spacing[w("lineRule")] = "exact"
+    if spacing:
+        props["spacing"] = ET.Element(w("spacing"), spacing)
+    
+    ind = {}
+    if para_format.get("left_indent") is not None:
+        ind[w("left")] = twips(para_format["left_indent"])
+    if para_format.get("right_indent") is not None:
+        ind[w("right")] = twips(para_format["right_indent"])
+    first_line = para_format.get("first_line_indent")
+    if first_line is not None:
+        if first_line < 0:
+            ind[w("hanging")] = twips(-first_line)
+        else:
+            ind[w("firstLine")] = twips(first_line)
+    if ind:
+        props["ind"] = ET.Element(w("ind"), ind)
+    
+    return props
+
+def merge_attributes(target, source):
+    """
+    将source的属性合并到target，值发生变化时移除会覆盖该值的主题属性
+    
+    例如rFonts中asciiTheme优先于ascii，color中themeColor优先于val
+    
+    Args:
+        target: 被合并的元素
+        source: 提供新属性值的元素
+    """
+    for attr, value in source.attrib.items():
+        if target.get(attr) == value:
+            continue
+        target.set(attr, value)
+        for theme_attr in THEME_ATTRIBUTES.get(ET.QName(attr).localname, ()):
+            target.attrib.pop(w(theme_attr), None)
+
+def compile_style_spec(styles_info):
+    """
+    将样式JSON编译为可直接克隆的XML片段
+    
+    有direct（样式直接设置的属性）时以其为准并整体替换目标样式的属性块，
+    不再叠加font/paragraph_format这些汇总字段（它们丢失了东亚字体等信息）；
+    旧版JSON只有effective（含docDefaults的生效属性）时只逐项覆盖同名属性，
+    不整体替换，font/paragraph_format中的值叠加在上面
+    
+    Args:
+        styles_info: 样式信息字典
+    
+    Returns:
+        编译后的样式列表
+    """
+    compiled = []
     for style_name, style_info in styles_info.items():
-        print(f"正在应用样式: {style_name}")
+        style_type = style_info.get("type", "paragraph")
+        if style_type not in STYLE_TYPES:
+            continue
+        
+        blocks = {}
+        direct = style_info.get("direct")
+        for block_name, props in (direct if direct is not None else style_info.get("effective", {})).items():
+            blocks[block_name] = {name: dict_to_element(name, value) for name, value in props.items()
+                                  if name not in DOCUMENT_SPECIFIC_PROPERTIES}
+        replace_blocks = set(blocks) if direct is not None else set()
         
-        # 检查样式是否存在于文档中
+        if direct is not None:
+            legacy = {}
+        else:
+            legacy = {
+                "rPr": compile_legacy_font(style_info.get("font", {})),
+                "pPr": compile_legacy_paragraph_format(style_info.get("paragraph_format", {})),
+            }
+        for block_name, props in legacy.items():
+            if props:
+                merged = blocks.setdefault(block_name, {})
+                for name, elem in props.items():
+                    if name in merged:
+                        # 与effective中的同名属性逐项合并
+                        merge_attributes(merged[name], elem)
+                    else:
+                        merged[name] = elem
+        
+        compiled.append({
+            "name": style_name,
+            "style_id": style_info.get("style_id") or style_name.replace(" ", ""),
+            "type": style_type,
+            "replace_blocks": replace_blocks,
+            # 序列化为字节便于缓存和传给子进程
+            "blocks": {block_name: [ET.tostring(elem) for elem in props.values()]
+                       for block_name, props in blocks.items()},
+        })
+    return compiled
+
+def load_compiled_spec(json_path):
+    """
+    读取编译后的样式，样式JSON未变化时直接使用缓存
+    
+    Args:
+        json_path: 样式JSON文件路径
+    
+    Returns:
+        编译后的样式列表
+    """
+    with open(json_path, "rb") as f:
+        raw = f.read()
+    cache_key = (COMPILER_VERSION, hashlib.sha1(raw).hexdigest())
+    
+    if os.path.exists(compiled_cache_file):
         try:
-            style = doc.styles[style_name]
-        except KeyError:
-            print(f"警告: 文档中不存在样式 '{style_name}'，将创建新样式")
-            # 创建新样式
-            style_type = WD_STYLE_TYPE.PARAGRAPH
-            style = doc.styles.add_style(style_name, style_type)
+            with open(compiled_cache_file, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("key") == cache_key:
+                print(f"使用已编译的样式缓存: {compiled_cache_file}")
+                return cached["spec"]
+        except Exception as e:
+            print(f"警告: 样式缓存无法读取，将重新编译: {str(e)}")
+    
+    styles_info = json.loads(raw.decode("utf-8"))
+    print(f"已读取样式信息，共 {len(styles_info)} 个样式，正在编译...")
+    spec = compile_style_spec(styles_info)
+    
+    with open(compiled_cache_file, "wb") as f:
+        pickle.dump({"key": cache_key, "spec": spec}, f)
+    print(f"样式编译完成，共 {len(spec)} 个样式，已缓存到: {compiled_cache_file}")
+    return spec
+
+def prepare_spec(spec):
+    """
+    将编译结果中的XML字节解析为元素，每个进程只做一次
+    
+    Args:
+        spec: 编译后的样式列表
+    
+    Returns:
+        包含已解析元素的样式列表
+    """
+    prepared = []
+    for item in spec:
+        blocks = {block_name: [ET.fromstring(fragment) for fragment in fragments]
+                  for block_name, fragments in item["blocks"].items()}
+        prepared.append({**item, "blocks": blocks})
+    return prepared
+
+def insert_ordered(parent, child, order, tag_of):
+    """
+    按架构顺序插入子元素
+    
+    不在顺序列表中的元素（如w14等扩展命名空间的属性）排在最后
+    
+    Args:
+        parent: 父元素
+        child: 要插入的子元素
+        order: 子元素名称顺序列表
+        tag_of: 由元素取得名称的函数
+    """
+    def rank(name):
+        return order.index(name) if name in order else len(order)
+    
+    position = rank(tag_of(child))
+    for index, existing in enumerate(parent):
+        if isinstance(existing.tag, str) and rank(tag_of(existing)) > position:
+            parent.insert(index, child)
+            return
+    parent.append(child)
+
+def local_name(elem):
+    """返回元素的名称：w命名空间的元素为本地名，其他命名空间为Clark表示法"""
+    if not isinstance(elem.tag, str):
+        return ""
+    qname = ET.QName(elem)
+    return qname.localname if qname.namespace == W_NS else elem.tag
+
+def find_or_create_style(styles_root, item, styles_by_id, styles_by_name):
+    """
+    在目标styles.xml中查找样式，不存在时创建
+    
+    Args:
+        styles_root: styles.xml根元素
+        item: 编译后的样式
+        styles_by_id: {样式ID: 样式元素}
+        styles_by_name: {小写样式名: 样式元素}
+    
+    Returns:
+        (样式元素, 是否新建)
+    """
+    style = styles_by_id.get(item["style_id"])
+    if style is None:
+        style = styles_by_name.get(item["name"].lower())
+    if style is not None:
+        return style, False
+    
+    style = ET.SubElement(styles_root, w("style"), {w("type"): item["type"], w("customStyle"): "1",
+                                                    w("styleId"): item["style_id"]})
+    ET.SubElement(style, w("name"), {w("val"): item["name"]})
+    styles_by_id[item["style_id"]] = style
+    styles_by_name[item["name"].lower()] = style
+    return style, True
+
+def apply_spec_to_styles_xml(styles_xml, spec):
+    """
+    将编译后的样式克隆到styles.xml中
+    
+    Args:
+        styles_xml: 原styles.xml字节
+        spec: 已解析元素的样式列表
+    
+    Returns:
+        (新styles.xml字节, 修改的样式数, 新建的样式数)
+    """
+    styles_root = ET.fromstring(styles_xml)
+    styles_by_id = {}
+    styles_by_name = {}
+    for style in styles_root.findall(w("style")):
+        styles_by_id[style.get(w("styleId"))] = style
+        name_elem = style.find(w("name"))
+        if name_elem is not None:
+            styles_by_name[name_elem.get(w("val"), "").lower()] = style
+    
+    updated = 0
+    created = 0
+    for item in spec:
+        style, is_new = find_or_create_style(styles_root, item, styles_by_id, styles_by_name)
+        created += is_new
+        updated += not is_new
         
-        # 应用字体信息
-        if "font" in style_info:
-            font_info = style_info["font"]
+        for block_name, elements in item["blocks"].items():
+            block = style.find(w(block_name))
+            if block is None:
+                if not elements:
+                    continue
+                block = ET.Element(w(block_name))
+                insert_ordered(style, block, BLOCK_ORDER, local_name)
             
-            if "name" in font_info and font_info["name"]:
-                style.font.name = font_info["name"]
+            new_names = {local_name(elem) for elem in elements}
+            for existing in list(block):
+                name = local_name(existing)
+                if name in new_names:
+                    block.remove(existing)
+                elif block_name in item["replace_blocks"] and name not in DOCUMENT_SPECIFIC_PROPERTIES:
+                    # 完整生效属性整体替换，不保留目标样式原有的其他属性
+                    block.remove(existing)
             
-            if "size" in font_info and font_info["size"]:
-                style.font.size = Pt(font_info["size"])
+            order = PROPERTY_ORDER.get(block_name, [])
+            for elem in elements:
+                insert_ordered(block, copy.deepcopy(elem), order, local_name)
             
-            if "bold" in font_info:
-                style.font.bold = font_info["bold"]
-            
-            if "italic" in font_info:
-                style.font.italic = font_info["italic"]
+            # 源样式没有设置该属性块时，整体替换后不保留空的属性块
+            if not len(block):
+                style.remove(block)
+    
+    new_xml = ET.tostring(styles_root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    return new_xml, updated, created
+
+def apply_compiled_styles(file_path, spec, output_path):
+    """
+    将编译后的样式应用到单个文档，只重写styles.xml，其他部件原样复制
+    
+    Args:
+        file_path: Word文档路径
+        spec: 已解析元素的样式列表
+        output_path: 输出文件路径
+    
+    Returns:
+        (输出文件路径, 修改的样式数, 新建的样式数)；失败时输出文件路径为None
+    """
+    try:
+        with zipfile.ZipFile(file_path) as zf:
+            if "word/styles.xml" not in zf.namelist():
+                print(f"警告: '{file_path}' 中没有styles.xml，已跳过")
+                return None, 0, 0
             
-            if "underline" in font_info:
-                style.font.underline = font_info["underline"]
+            new_styles_xml, updated, created = apply_spec_to_styles_xml(zf.read("word/styles.xml"), spec)
             
-            if "color" in font_info and font_info["color"]:
-                # 处理颜色值
-                color_str = font_info["color"]
-                if isinstance(color_str, str) and color_str.startswith('#'):
-                    # 如果是十六进制颜色值
-                    color_str = color_str.lstrip('#')
-                    r, g, b = int(color_str[0:2], 16), int(color_str[2:4], 16), int(color_str[4:6], 16)
-                    style.font.color.rgb = RGBColor(r, g, b)
-                elif isinstance(color_str, list) and len(color_str) == 3:
-                    # 如果是RGB列表
-                    r, g, b = color_str
-                    style.font.color.rgb = RGBColor(r, g, b)
+            with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+                for item in zf.infolist():
+                    if item.filename == "word/styles.xml":
+                        zout.writestr(item, new_styles_xml)
+                    else:
+                        zout.writestr(item, zf.read(item.filename))
         
-        # 应用段落格式信息
-        if "paragraph_format" in style_info:
-            para_format = style_info["paragraph_format"]
-            
-            if "alignment" in para_format:
-                alignment_value = para_format["alignment"]
-                # 处理对齐方式
-                if isinstance(alignment_value, int):
-                    style.paragraph_format.alignment = alignment_value
-                elif isinstance(alignment_value, str):
-                    alignment_map = {
-                        "left": WD_PARAGRAPH_ALIGNMENT.LEFT,
-                        "center": WD_PARAGRAPH_ALIGNMENT.CENTER,
-                        "right": WD_PARAGRAPH_ALIGNMENT.RIGHT,
-                        "justify": WD_PARAGRAPH_ALIGNMENT.JUSTIFY
-                    }
-                    if alignment_value.lower() in alignment_map:
-                        style.paragraph_format.alignment = alignment_map[alignment_value.lower()]
-            
-            if "first_line_indent" in para_format and para_format["first_line_indent"] is not None:
-                style.paragraph_format.first_line_indent = Pt(para_format["first_line_indent"])
-            
-            if "left_indent" in para_format and para_format["left_indent"] is not None:
-                style.paragraph_format.left_indent = Pt(para_format["left_indent"])
-            
-            if "right_indent" in para_format and para_format["right_indent"] is not None:
-                style.paragraph_format.right_indent = Pt(para_format["right_indent"])
-            
-            if "line_spacing" in para_format and para_format["line_spacing"] is not None:
-                style.paragraph_format.line_spacing = para_format["line_spacing"]
-            
-            if "space_before" in para_format and para_format["space_before"] is not None:
-                style.paragraph_format.space_before = Pt(para_format["space_before"])
-            
-            if "space_after" in para_format and para_format["space_after"] is not None:
-                style.paragraph_format.space_after = Pt(para_format["space_after"])
+        return output_path, updated, created
     
-    print(f"样式应用完成，共应用了 {len(styles_info)} 个样式")
-    return doc
+    except Exception as e:
+        print(f"处理 '{file_path}' 时出错: {str(e)}")
+        return None, 0, 0
+
+# 子进程中已解析的样式（每个进程初始化一次）
+_worker_spec = None
+
+def init_worker(spec):
+    """子进程初始化：解析编译后的样式"""
+    global _worker_spec
+    _worker_spec = prepare_spec(spec)
+
+def apply_in_worker(file_path):
+    """子进程任务：处理单个文档"""
+    file_name, file_ext = os.path.splitext(file_path)
+    return apply_compiled_styles(file_path, _worker_spec, f"{file_name}（已修改）{file_ext}")
+
+def batch_apply_styles(folder, spec):
+    """
+    使用多进程对文件夹中的所有docx文件应用样式
+    
+    Args:
+        folder: 文件夹路径
+        spec: 编译后的样式列表
+    
+    Returns:
+        成功处理的文件数
+    """
+    if not os.path.isdir(folder):
+        print(f"错误: 文件夹不存在: {folder}")
+        return 0
+    
+    file_paths = [os.path.join(folder, name) for name in sorted(os.listdir(folder))
+                  if name.lower().endswith(".docx") and not name.startswith("~$") and "（已修改）" not in name]
+    print(f"在文件夹 '{folder}' 中找到 {len(file_paths)} 个docx文件")
+    
+    success = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(spec,)) as executor:
+        for index, (result, updated, created) in enumerate(
+                executor.map(apply_in_worker, file_paths, chunksize=16), 1):
+            if result:
+                success += 1
+            if index % 100 == 0 or index == len(file_paths):
+                print(f"  - 已处理 {index}/{len(file_paths)} 个文件")
+    
+    print(f"批量处理完成，成功 {success} 个，失败 {len(file_paths) - success} 个")
+    return success
 
 def main():
     # 读取样式信息JSON文件
@@ -131,18 +568,24 @@ def main():
         print(f"错误: 样式JSON文件不存在: {styles_json_file}")
         return
     
-    with open(styles_json_file, 'r', encoding='utf-8') as f:
-        styles_info = json.load(f)
+    # 编译样式（或读取缓存）
+    spec = load_compiled_spec(styles_json_file)
     
-    print(f"已读取样式信息，共 {len(styles_info)} 个样式")
+    if batch_mode:
+        batch_apply_styles(input_folder, spec)
+        return
+    
+    # 检查文件是否存在
+    if not os.path.exists(input_file):
+        print(f"错误: 文件不存在: {input_file}")
+        return
     
-    # 应用样式
-    modified_doc = apply_styles(input_file, styles_info)
+    print(f"正在处理文件: {input_file}")
+    result, updated, created = apply_compiled_styles(input_file, prepare_spec(spec), output_file)
     
-    if modified_doc:
-        # 保存修改后的文档
-        modified_doc.save(output_file)
+    if result:
+        print(f"样式应用完成，修改了 {updated} 个样式，新建了 {created} 个样式")
         print(f"文档样式已修改，保存为: {output_file}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+合并Word文档中格式相同的相邻run，精简document.xml
+
+经过WPS和脚本反复处理的文档中经常有成千上万个只有一两个字的run，格式却完全相同，
+这会让后续所有基于python-docx的处理变慢。本脚本：
+1. 删除w:proofErr（拼写检查标记）和w:lastRenderedPageBreak（上次排版的分页位置）
+2. 删除所有rsid*属性（编辑会话标识）
+3. 每个段落遍历一次，合并rPr规范化后相同、且只包含文本/制表符/换行的相邻run
+处理正文、页眉、页脚、脚注、尾注和批注，并报告run数量和文件大小的变化
+"""
+
+import os
+import re
+import zipfile
+from lxml import etree as ET
+
+# 文件读取部分，便于修改需读取文件名
+input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# 需要处理的部件
+PART_PATTERN = re.compile(r"^word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml$")
+
+# 直接删除的元素
+REMOVED_TAGS = {f"{{{W_NS}}}proofErr", f"{{{W_NS}}}lastRenderedPageBreak"}
+
+# 可以合并的run中允许出现的子元素（除rPr外）
+MERGEABLE_CONTENT = {f"{{{W_NS}}}{name}" for name in ("t", "delText", "tab", "br", "cr")}
+
+R_TAG = f"{{{W_NS}}}r"
+RPR_TAG = f"{{{W_NS}}}rPr"
+TEXT_TAGS = {f"{{{W_NS}}}t", f"{{{W_NS}}}delText"}
+
+def is_rsid_attribute(name):
+    """判断属性是否为rsid*属性"""
+    return name.startswith(f"{{{W_NS}}}rsid")
+
+def strip_noise(root):
+    """
+    删除proofErr、lastRenderedPageBreak元素和rsid*属性
+    
+    Args:
+        root: 部件根元素
+    
+    Returns:
+        删除的元素数
+    """
+    removed = [elem for elem in root.iter(*REMOVED_TAGS)]
+    for elem in removed:
+        parent = elem.getparent()
+        # 保留元素后面的文本（tail），虽然WordprocessingML中一般没有
+        if elem.tail and parent is not None:
+            previous = elem.getprevious()
+            if previous is not None:
+                previous.tail = (previous.tail or "") + elem.tail
+            else:
+                parent.text = (parent.text or "") + elem.tail
+        parent.remove(elem)
+    
+    for elem in root.iter():
+        if not isinstance(elem.tag, str):
+            continue
+        for name in [name for name in elem.attrib if is_rsid_attribute(name)]:
+            del elem.attrib[name]
+    
+    return len(removed)
+
+def canonical(elem):
+    """返回元素的规范形式（属性和子元素与顺序无关），用于比较rPr是否相同"""
+    if elem is None:
+        return ()
+    return (elem.tag, tuple(sorted(elem.attrib.items())),
+            tuple(sorted(canonical(child) for child in elem if isinstance(child.tag, str))))
+
+def run_key(run):
+    """
+    返回run的合并键，不能合并的run返回None
+    
+    Args:
+        run: w:r元素
+    
+    Returns:
+        rPr的规范形式或None
+    """
+    rpr = None
+    for child in run:
+        if child.tag == RPR_TAG:
+            rpr = child
+        elif child.tag not in MERGEABLE_CONTENT:
+            return None
+    return canonical(rpr)
+
+def append_run_content(target, source):
+    """把source中的内容追加到target中，相邻的文本元素合并为一个"""
+    for child in list(source):
+        if child.tag == RPR_TAG:
+            continue
+        last = target[-1] if len(target) else None
+        if child.tag in TEXT_TAGS and last is not None and last.tag == child.tag:
+            last.text = (last.text or "") + (child.text or "")
+            if last.text != last.text.strip():
+                last.set(XML_SPACE, "preserve")
+        else:
+            target.append(child)
+
+def coalesce_runs(root):
+    """
+    合并格式相同的相邻run，每个包含run的容器只遍历一次
+    
+    Args:
+        root: 部件根元素
+    
+    Returns:
+        合并掉的run数
+    """
+    containers = {run.getparent() for run in root.iter(R_TAG)}
+    merged = 0
+    
+    for container in containers:
+        previous = None
+        previous_key = None
+        for child in list(container):
+            if child.tag != R_TAG:
+                # 书签、域等元素会打断相邻关系
+                previous = None
+                continue
+            key = run_key(child)
+            if key is not None and previous is not None and key == previous_key:
+                append_run_content(previous, child)
+                container.remove(child)
+                merged += 1
+                continue
+            previous = child if key is not None else None
+            previous_key = key
+    
+    return merged
+
+def coalesce_document(doc_path):
+    """
+    合并Word文档中格式相同的相邻run
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        输出文件路径
+    """
+    print(f"正在处理文件: {doc_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(doc_path):
+        print(f"错误: 文件 '{doc_path}' 不存在!")
+        return None
+    
+    # 构建输出文件名
+    file_name, file_ext = os.path.splitext(doc_path)
+    output_file = f"{file_name}（已修改）{file_ext}"
+    
+    replacements = {}
+    total_runs_before = total_runs_after = 0
+    total_bytes_before = total_bytes_after = 0
+    
+    with zipfile.ZipFile(doc_path) as zf:
+        for part_name in zf.namelist():
+            if not PART_PATTERN.match(part_name):
+                continue
+            
+            xml = zf.read(part_name)
+            root = ET.fromstring(xml)
+            runs_before = sum(1 for _ in root.iter(R_TAG))
+            removed = strip_noise(root)
+            merged = coalesce_runs(root)
+            new_xml = ET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+            
+            runs_after = runs_before - merged
+            total_runs_before += runs_before
+            total_runs_after += runs_after
+            total_bytes_before += len(xml)
+            total_bytes_after += len(new_xml)
+            if len(new_xml) < len(xml):
+                replacements[part_name] = new_xml
+                print(f"  - {part_name}: run {runs_before} -> {runs_after}，删除 {removed} 个无用标记，"
+                      f"{len(xml) / 1024:.1f} KB -> {len(new_xml) / 1024:.1f} KB")
+        
+        if not replacements:
+            print("没有可以精简的内容")
+            return None
+        
+        # 重新打包，只替换被修改的部件
+        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zf.infolist():
+                data = replacements.get(item.filename)
+                if data is None:
+                    data = zf.read(item.filename)
+                zout.writestr(item, data)
+    
+    reduction = 1 - total_runs_after / total_runs_before if total_runs_before else 0
+    print(f"run总数: {total_runs_before} -> {total_runs_after}（减少 {reduction:.1%}）")
+    print(f"XML总大小: {total_bytes_before / 1024:.1f} KB -> {total_bytes_after / 1024:.1f} KB"
+          f"（节省 {(total_bytes_before - total_bytes_after) / 1024:.1f} KB）")
+    print(f"文档大小: {os.path.getsize(doc_path) / 1024:.1f} KB -> {os.path.getsize(output_file) / 1024:.1f} KB")
+    return output_file
+
+def main():
+    # 执行run合并
+    output_file = coalesce_document(input_file)
+    
+    if output_file:
+        print(f"文档已保存为: {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+压缩Word文档中分辨率过高的图片
+
+根据每张图片在文档中的显示尺寸（wp:extent）和目标DPI计算实际需要的像素尺寸，
+只对超出需要的图片进行缩小和重新编码（多进程并行），然后替换docx包中的图片文件
+"""
+
+import os
+import io
+import zipfile
+import posixpath
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree as ET
+from PIL import Image
+
+# 文件读取部分，便于修改需读取文件名
+input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
+
+# 目标分辨率（每英寸像素数），打印建议150~300，屏幕阅读96~150即可
+target_dpi = 150
+
+# JPEG重新编码质量（1-95）
+jpeg_quality = 85
+
+# 并行进程数，None表示使用全部CPU核心
+max_workers = None
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# 1英寸 = 914400 EMU
+EMU_PER_INCH = 914400
+
+# 只处理这两种格式，其他格式（EMF、WMF、GIF等）保持不变
+SUPPORTED_FORMATS = {"JPEG", "PNG"}
+
+def read_image_rels(zf, part_name):
+    """
+    读取部件的关系文件，建立 rId -> 图片在压缩包中路径 的索引
+    
+    Args:
+        zf: 打开的ZipFile对象
+        part_name: 部件路径，如 word/document.xml
+    
+    Returns:
+        字典 {rId: 压缩包内的图片路径}
+    """
+    part_dir, part_file = posixpath.split(part_name)
+    rels_name = posixpath.join(part_dir, "_rels", part_file + ".rels")
+    if rels_name not in zf.namelist():
+        return {}
+    
+    image_rels = {}
+    root = ET.fromstring(zf.read(rels_name))
+    for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship"):
+        if not rel.get("Type", "").endswith("/image") or rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target_name = target.lstrip("/")
+        else:
+            target_name = posixpath.normpath(posixpath.join(part_dir, target))
+        image_rels[rel.get("Id")] = target_name
+    return image_rels
+
+def collect_required_sizes(zf):
+    """
+    流式遍历所有部件中的w:drawing元素，计算每张图片需要的像素尺寸
+    
+    同一张图片被多次引用时取最大的显示尺寸；图片被裁剪时按裁剪比例放大需求
+    
+    Args:
+        zf: 打开的ZipFile对象
+    
+    Returns:
+        字典 {图片路径: (需要的宽度像素, 需要的高度像素)}
+    """
+    required = {}
+    drawing_tag = f"{{{W_NS}}}drawing"
+    part_names = [name for name in zf.namelist()
+                  if name.startswith("word/") and name.endswith(".xml") and name.count("/") == 1]
+    
+    for part_name in sorted(part_names):
+        image_rels = read_image_rels(zf, part_name)
+        if not image_rels:
+            continue
+        
+        with zf.open(part_name) as f:
+            for _, drawing in ET.iterparse(f, events=("end",), tag=drawing_tag):
+                for shape in drawing:
+                    extent = shape.find(f"{{{WP_NS}}}extent")
+                    if extent is None:
+                        continue
+                    width_inch = int(extent.get("cx", 0)) / EMU_PER_INCH
+                    height_inch = int(extent.get("cy", 0)) / EMU_PER_INCH
+                    
+                    for blip in shape.iter(f"{{{A_NS}}}blip"):
+                        media_name = image_rels.get(blip.get(f"{{{R_NS}}}embed"))
+                        if not media_name:
+                            continue
+                        
+                        # 裁剪区域（单位为千分之一百分比），只显示了图片的一部分
+                        visible_w, visible_h = 1.0, 1.0
+                        src_rect = blip.getparent().find(f"{{{A_NS}}}srcRect")
+                        if src_rect is not None:
+                            visible_w -= (int(src_rect.get("l", 0)) + int(src_rect.get("r", 0))) / 100000
+                            visible_h -= (int(src_rect.get("t", 0)) + int(src_rect.get("b", 0))) / 100000
+                        
+                        need_w = width_inch * target_dpi / max(visible_w, 0.01)
+                        need_h = height_inch * target_dpi / max(visible_h, 0.01)
+                        old_w, old_h = required.get(media_name, (0, 0))
+                        required[media_name] = (max(old_w, need_w), max(old_h, need_h))
+                drawing.clear()
+    
+    return required
+
+def resample_image(media_name, data, need_w, need_h, quality):
+    """
+    缩小并重新编码单张图片（在子进程中运行）
+    
+    Args:
+        media_name: 图片在压缩包中的路径
+        data: 原始图片字节
+        need_w: 需要的宽度像素
+        need_h: 需要的高度像素
+        quality: JPEG编码质量
+    
+    Returns:
+        (图片路径, 新图片字节或None, 原尺寸, 新尺寸)
+    """
+    try:
+        img = Image.open(io.BytesIO(data))
+        img_format = img.format
+        original_size = img.size
+        
+        if img_format not in SUPPORTED_FORMATS:
+            return media_name, None, original_size, original_size
+        
+        # 按比例缩放，保证宽和高都满足显示需要
+        scale = max(need_w / img.width, need_h / img.height)
+        if scale >= 1:
+            return media_name, None, original_size, original_size
+        
+        new_size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+        resized = img.resize(new_size, Image.LANCZOS)
+        
+        output = io.BytesIO()
+        if img_format == "JPEG":
+            if resized.mode not in ("RGB", "L", "CMYK"):
+                resized = resized.convert("RGB")
+            resized.save(output, "JPEG", quality=quality, optimize=True, progressive=True,
+                         dpi=(target_dpi, target_dpi))
+        else:
+            resized.save(output, "PNG", optimize=True, dpi=(target_dpi, target_dpi))
+        
+        new_data = output.getvalue()
+        # 重新编码后反而更大时保留原图
+        if len(new_data) >= len(data):
+            return media_name, None, original_size, original_size
+        return media_name, new_data, original_size, new_size
+    
+    except Exception as e:
+        print(f"警告: 无法处理图片 {media_name}: {str(e)}")
+        return media_name, None, None, None
+
+def compress_images(doc_path):
+    """
+    压缩Word文档中分辨率过高的图片
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        输出文件路径
+    """
+    print(f"正在处理文件: {doc_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(doc_path):
+        print(f"错误: 文件 '{doc_path}' 不存在!")
+        return None
+    
+    # 构建输出文件名
+    file_name, file_ext = os.path.splitext(doc_path)
+    output_file = f"{file_name}（已修改）{file_ext}"
+    
+    with zipfile.ZipFile(doc_path) as zf:
+        # 1. 根据显示尺寸计算每张图片需要的像素
+        required = collect_required_sizes(zf)
+        print(f"找到 {len(required)} 张有显示尺寸的图片，目标分辨率 {target_dpi} DPI")
+        
+        # 2. 多进程缩小并重新编码超出需要的图片
+        replacements = {}
+        total_before = 0
+        total_after = 0
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(resample_image, name, zf.read(name), need_w, need_h, jpeg_quality)
+                       for name, (need_w, need_h) in sorted(required.items())
+                       if name in zf.namelist()]
+            
+            for future in futures:
+                media_name, new_data, original_size, new_size = future.result()
+                if new_data is None:
+                    continue
+                
+                before = zf.getinfo(media_name).file_size
+                after = len(new_data)
+                replacements[media_name] = new_data
+                total_before += before
+                total_after += after
+                print(f"  - {media_name}: {original_size[0]}x{original_size[1]} -> {new_size[0]}x{new_size[1]}, "
+                      f"{before / 1024:.1f} KB -> {after / 1024:.1f} KB（节省 {(before - after) / 1024:.1f} KB）")
+        
+        if not replacements:
+            print("没有需要压缩的图片")
+            return None
+        
+        # 3. 重新打包，只替换被压缩的图片，其他文件原样复制
+        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zf.infolist():
+                data = replacements.get(item.filename)
+                if data is None:
+                    data = zf.read(item.filename)
+                zout.writestr(item, data)
+    
+    saved = total_before - total_after
+    print(f"共压缩 {len(replacements)} 张图片，图片总计节省 {saved / 1024 / 1024:.2f} MB"
+          f"（{total_before / 1024 / 1024:.2f} MB -> {total_after / 1024 / 1024:.2f} MB）")
+    
+    original_size = os.path.getsize(doc_path)
+    output_size = os.path.getsize(output_file)
+    print(f"文档大小: {original_size / 1024 / 1024:.2f} MB -> {output_size / 1024 / 1024:.2f} MB")
+    return output_file
+
+def main():
+    # 执行图片压缩
+    output_file = compress_images(input_file)
+    
+    if output_file:
+        print(f"文档已保存为: {output_file}")
+
+if __name__ == "__main__":
+    main()
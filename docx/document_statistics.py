@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+批量统计Word文档的字数、字符数、段落数、表格数和图片数
+
+不使用python-docx打开文档，而是流式解析正文、页眉、页脚、脚注、尾注的XML，
+只处理段落、文本、表格和图片元素；中文字符与英文单词用预编译的字符类正则统计，
+多个文档使用多进程并行处理，结果输出为CSV
+"""
+
+import os
+import re
+import csv
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree as ET
+
+# 文件读取部分，便于修改需读取的文件夹（也可以是单个文件）
+input_folder = "文档"  # 请修改为实际的文件夹名
+
+# 统计结果文件
+report_file = "文档统计.csv"
+
+# 并行进程数，None表示使用全部CPU核心
+max_workers = None
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+V_NS = "urn:schemas-microsoft-com:vml"
+MC_NS = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
+P_TAG = f"{{{W_NS}}}p"
+T_TAG = f"{{{W_NS}}}t"
+TBL_TAG = f"{{{W_NS}}}tbl"
+DRAWING_TAG = f"{{{W_NS}}}drawing"
+BLIP_TAG = f"{{{A_NS}}}blip"
+IMAGEDATA_TAG = f"{{{V_NS}}}imagedata"
+FALLBACK_TAG = f"{{{MC_NS}}}Fallback"
+
+# 参与统计的部件
+PART_PATTERN = re.compile(r"^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$")
+
+# 中日韩文字（汉字、假名、谚文）
+CJK_CHARS = ("\u1100-\u11ff\u2e80-\u2fdf\u3040-\u30ff\u3100-\u312f\u3130-\u318f"
+             "\u31a0-\u31ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+             "\U00020000-\U0002fa1f")
+
+# 中文标点（全角符号）
+CJK_PUNCTUATION = "\u3000-\u303f\ufe30-\ufe4f\uff00-\uffef"
+
+CJK_PATTERN = re.compile(f"[{CJK_CHARS}]")
+CJK_PUNCTUATION_PATTERN = re.compile(f"[{CJK_PUNCTUATION}]")
+# 非中文单词：被空白或中文字符/标点分隔的连续字符
+WORD_PATTERN = re.compile(f"[^\\s{CJK_CHARS}{CJK_PUNCTUATION}]+")
+SPACE_PATTERN = re.compile(r"\s")
+
+# 统计项（CSV列名）
+FIELDS = ["字数", "中文字符", "中文标点", "非中文单词", "字符数（不计空格）", "字符数（计空格）",
+          "段落数", "非空段落数", "表格数", "图片数"]
+
+def count_text(text, stats):
+    """
+    统计一个段落的文本
+    
+    字数按Word的口径：每个中文字符和中文标点计一个字，其他文字按单词计数
+    """
+    cjk = len(CJK_PATTERN.findall(text))
+    punctuation = len(CJK_PUNCTUATION_PATTERN.findall(text))
+    words = len(WORD_PATTERN.findall(text))
+    spaces = len(SPACE_PATTERN.findall(text))
+    
+    stats["中文字符"] += cjk
+    stats["中文标点"] += punctuation
+    stats["非中文单词"] += words
+    stats["字数"] += cjk + punctuation + words
+    stats["字符数（计空格）"] += len(text)
+    stats["字符数（不计空格）"] += len(text) - spaces
+
+def count_part(f, stats):
+    """
+    流式统计一个部件
+    
+    文本按所属的最近一层段落汇总后再统计，避免单词被run拆开；
+    mc:Fallback中是文本框/图形的兼容副本，跳过以免重复计数
+    
+    Args:
+        f: 部件文件对象
+        stats: 统计结果字典
+    """
+    paragraph_stack = []
+    fallback_depth = 0
+    
+    for event, elem in ET.iterparse(f, events=("start", "end"),
+                                    tag=(P_TAG, T_TAG, TBL_TAG, DRAWING_TAG, IMAGEDATA_TAG, FALLBACK_TAG)):
+        tag = elem.tag
+        
+        if tag == FALLBACK_TAG:
+            fallback_depth += 1 if event == "start" else -1
+            continue
+        
+        if event == "start":
+            if tag == P_TAG:
+                paragraph_stack.append([])
+            continue
+        
+        if fallback_depth:
+            if tag == P_TAG:
+                paragraph_stack.pop()
+            continue
+        
+        if tag == T_TAG:
+            if paragraph_stack and elem.text:
+                paragraph_stack[-1].append(elem.text)
+        elif tag == P_TAG:
+            text = "".join(paragraph_stack.pop())
+            stats["段落数"] += 1
+            if text.strip():
+                stats["非空段落数"] += 1
+                count_text(text, stats)
+            # 顶层段落处理完后释放内存
+            if not paragraph_stack:
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        elif tag == TBL_TAG:
+            stats["表格数"] += 1
+        elif tag == DRAWING_TAG:
+            if next(elem.iter(BLIP_TAG), None) is not None:
+                stats["图片数"] += 1
+        elif tag == IMAGEDATA_TAG:
+            stats["图片数"] += 1
+
+def document_statistics(doc_path):
+    """
+    统计单个Word文档（在子进程中运行）
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        (文件路径, 统计结果字典, 错误信息)
+    """
+    stats = dict.fromkeys(FIELDS, 0)
+    try:
+        with zipfile.ZipFile(doc_path) as zf:
+            for part_name in zf.namelist():
+                if PART_PATTERN.match(part_name):
+                    with zf.open(part_name) as f:
+                        count_part(f, stats)
+        return doc_path, stats, ""
+    except Exception as e:
+        return doc_path, stats, str(e)
+
+def find_documents(folder):
+    """
+    查找文件夹（含子文件夹）中的所有docx文件
+    
+    Args:
+        folder: 文件夹路径或单个文件路径
+    
+    Returns:
+        文件路径列表
+    """
+    if os.path.isfile(folder):
+        return [folder]
+    
+    documents = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(".docx") and not name.startswith("~$"):
+                documents.append(os.path.join(root, name))
+    return documents
+
+def batch_statistics(folder):
+    """
+    批量统计文件夹中的所有Word文档，结果保存为CSV
+    
+    Args:
+        folder: 文件夹路径或单个文件路径
+    
+    Returns:
+        成功统计的文档数
+    """
+    # 检查文件夹是否存在
+    if not os.path.exists(folder):
+        print(f"错误: '{folder}' 不存在!")
+        return 0
+    
+    documents = find_documents(folder)
+    if not documents:
+        print(f"'{folder}' 中没有找到docx文件")
+        return 0
+    print(f"找到 {len(documents)} 个docx文件，正在统计...")
+    
+    totals = dict.fromkeys(FIELDS, 0)
+    success = 0
+    
+    with open(report_file, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["文件"] + FIELDS + ["错误"])
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            results = executor.map(document_statistics, documents, chunksize=8)
+            for index, (doc_path, stats, error) in enumerate(results, 1):
+                writer.writerow([doc_path] + [stats[field] for field in FIELDS] + [error])
+                if error:
+                    print(f"  - 警告: 无法统计 {doc_path}: {error}")
+                    continue
+                success += 1
+                for field in FIELDS:
+                    totals[field] += stats[field]
+                if index % 1000 == 0:
+                    print(f"  - 已统计 {index}/{len(documents)} 个文件")
+        
+        writer.writerow(["合计"] + [totals[field] for field in FIELDS] + [""])
+    
+    print(f"统计完成: {success} 个文件，共 {totals['字数']} 字"
+          f"（中文字符 {totals['中文字符']}，非中文单词 {totals['非中文单词']}），"
+          f"{totals['段落数']} 个段落，{totals['表格数']} 个表格，{totals['图片数']} 张图片")
+    print(f"统计结果已保存为: {report_file}")
+    return success
+
+def main():
+    # 执行批量统计
+    batch_statistics(input_folder)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,519 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+将Word文档导出为Markdown
+
+流式解析document.xml，每处理完一个段落（或表格）就写出并释放，内存占用只与单个段落有关：
+1. 标题样式（大纲级别）转换为 # 标题
+2. 加粗、倾斜、删除线转换为 ** * ~~，格式相同的相邻run合并后再加标记
+3. 编号和项目符号列表转换为 1. 和 - 列表（按级别缩进）
+4. 表格转换为管道表格，超链接转换为 [文字](链接)
+5. 图片提取到媒体文件夹，并以 ![说明](路径) 引用
+"""
+
+import os
+import re
+import zipfile
+import posixpath
+from lxml import etree as ET
+
+# 文件读取部分，便于修改需读取文件名
+input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+V_NS = "urn:schemas-microsoft-com:vml"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# 行内格式：rPr中的元素 -> Markdown标记
+FORMAT_MARKERS = (("b", "**"), ("i", "*"), ("strike", "~~"))
+
+# 需要转义的Markdown字符
+ESCAPE_PATTERN = re.compile(r"([\\`*_\[\]<>])")
+
+# 段落开头需要转义的字符（避免被识别为标题、列表、引用）
+LINE_START_PATTERN = re.compile(r"^(\s*)([#>+-]|\d+\.)(?=\s)")
+
+# 这些容器中的内容按普通内容处理
+TRANSPARENT_TAGS = {"ins", "smartTag", "sdt", "sdtContent", "customXml", "fldSimple", "moveTo"}
+
+def w(name):
+    """返回带w命名空间的标签名"""
+    return f"{{{W_NS}}}{name}"
+
+def local_name(tag):
+    """返回去掉命名空间的标签名"""
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+def is_on(elem):
+    """判断开关属性（如w:b）是否开启"""
+    return elem is not None and elem.get(w("val"), "true") not in ("0", "false", "off")
+
+def read_rels(zf, part_name):
+    """
+    读取部件的关系
+    
+    Args:
+        zf: 打开的ZipFile对象
+        part_name: 部件路径
+    
+    Returns:
+        字典 {rId: (类型, 目标, 是否外部链接)}，内部目标为压缩包内的路径
+    """
+    part_dir, part_file = posixpath.split(part_name)
+    rels_name = posixpath.join(part_dir, "_rels", part_file + ".rels")
+    if rels_name not in zf.namelist():
+        return {}
+    
+    rels = {}
+    for rel in ET.fromstring(zf.read(rels_name)).iter(f"{{{PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target", "")
+        external = rel.get("TargetMode") == "External"
+        if not external:
+            target = target.lstrip("/") if target.startswith("/") else \
+                posixpath.normpath(posixpath.join(part_dir, target))
+        rels[rel.get("Id")] = (rel.get("Type", "").rsplit("/", 1)[-1], target, external)
+    return rels
+
+def read_styles(zf):
+    """
+    读取样式，沿basedOn继承计算每个样式的大纲级别、编号和行内格式
+    
+    Args:
+        zf: 打开的ZipFile对象
+    
+    Returns:
+        字典 {样式ID: {"outline": 大纲级别, "num": (numId, ilvl), "format": {b/i/strike: bool}}}
+    """
+    if "word/styles.xml" not in zf.namelist():
+        return {}
+    styles = {style.get(w("styleId")): style
+              for style in ET.fromstring(zf.read("word/styles.xml")).findall(w("style"))}
+    cache = {}
+    
+    def resolve(style_id, depth=0):
+        if style_id in cache:
+            return cache[style_id]
+        style = styles.get(style_id)
+        if style is None or depth > 50:
+            return {"outline": None, "num": None, "format": {}}
+        
+        based_on = style.find(w("basedOn"))
+        base = resolve(based_on.get(w("val")), depth + 1) if based_on is not None else None
+        info = {"outline": None, "num": None, "format": {}}
+        if base:
+            info = {"outline": base["outline"], "num": base["num"], "format": dict(base["format"])}
+        
+        ppr = style.find(w("pPr"))
+        if ppr is not None:
+            outline = ppr.find(w("outlineLvl"))
+            if outline is not None:
+                level = int(outline.get(w("val"), "9"))
+                info["outline"] = level if level < 9 else None
+            num_pr = ppr.find(w("numPr"))
+            if num_pr is not None:
+                info["num"] = read_num_pr(num_pr, info["num"])
+        
+        rpr = style.find(w("rPr"))
+        if rpr is not None:
+            for tag, _ in FORMAT_MARKERS:
+                elem = rpr.find(w(tag))
+                if elem is not None:
+                    info["format"][tag] = is_on(elem)
+        
+        cache[style_id] = info
+        return info
+    
+    return {style_id: resolve(style_id) for style_id in styles}
+
+def read_num_pr(num_pr, default=None):
+    """读取w:numPr中的(numId, ilvl)"""
+    num_id = num_pr.find(w("numId"))
+    ilvl = num_pr.find(w("ilvl"))
+    base_num, base_lvl = default or (None, "0")
+    return (num_id.get(w("val")) if num_id is not None else base_num,
+            ilvl.get(w("val")) if ilvl is not None else base_lvl)
+
+def read_numbering(zf):
+    """
+    读取编号定义
+    
+    Args:
+        zf: 打开的ZipFile对象
+    
+    Returns:
+        字典 {(numId, ilvl): numFmt}
+    """
+    if "word/numbering.xml" not in zf.namelist():
+        return {}
+    root = ET.fromstring(zf.read("word/numbering.xml"))
+    
+    abstract_formats = {}
+    for abstract in root.findall(w("abstractNum")):
+        formats = {}
+        for lvl in abstract.findall(w("lvl")):
+            num_fmt = lvl.find(w("numFmt"))
+            formats[lvl.get(w("ilvl"))] = num_fmt.get(w("val")) if num_fmt is not None else "decimal"
+        abstract_formats[abstract.get(w("abstractNumId"))] = formats
+    
+    formats = {}
+    for num in root.findall(w("num")):
+        abstract_id = num.find(w("abstractNumId"))
+        if abstract_id is None:
+            continue
+        for ilvl, num_fmt in abstract_formats.get(abstract_id.get(w("val")), {}).items():
+            formats[(num.get(w("numId")), ilvl)] = num_fmt
+        # w:lvlOverride中重新定义的级别
+        for override in num.findall(w("lvlOverride")):
+            num_fmt = override.find(f"{w('lvl')}/{w('numFmt')}")
+            if num_fmt is not None:
+                formats[(num.get(w("numId")), override.get(w("ilvl")))] = num_fmt.get(w("val"))
+    return formats
+
+def escape_text(text):
+    """转义Markdown特殊字符"""
+    return ESCAPE_PATTERN.sub(r"\\\1", text)
+
+class MarkdownExporter:
+    """把段落和表格逐个转换为Markdown文本"""
+    
+    def __init__(self, zf, media_folder):
+        self.zf = zf
+        self.part_names = set(zf.namelist())
+        self.media_folder = media_folder
+        self.rels = read_rels(zf, "word/document.xml")
+        self.styles = read_styles(zf)
+        self.numbering = read_numbering(zf)
+        self.extracted = {}
+        self.counts = {"heading": 0, "paragraph": 0, "list": 0, "table": 0, "image": 0}
+    
+    def run_format(self, rpr):
+        """计算run的格式（字符样式 + 直接格式）"""
+        if rpr is None:
+            return ()
+        fmt = {}
+        rstyle = rpr.find(w("rStyle"))
+        if rstyle is not None:
+            fmt.update(self.styles.get(rstyle.get(w("val")), {}).get("format", {}))
+        for tag, _ in FORMAT_MARKERS:
+            elem = rpr.find(w(tag))
+            if elem is not None:
+                fmt[tag] = is_on(elem)
+        return tuple(tag for tag, _ in FORMAT_MARKERS if fmt.get(tag))
+    
+    def image_markdown(self, container):
+        """提取元素中的图片，返回Markdown图片引用"""
+        images = []
+        for elem in container.iter(f"{{{A_NS}}}blip", f"{{{V_NS}}}imagedata"):
+            rel_id = elem.get(f"{{{R_NS}}}embed") or elem.get(f"{{{R_NS}}}id")
+            rel = self.rels.get(rel_id)
+            if rel is None:
+                continue
+            _, target, external = rel
+            if external:
+                path = target
+            else:
+                path = self.extract_media(target)
+                if path is None:
+                    continue
+            
+            doc_pr = next(container.iter(f"{{{WP_NS}}}docPr"), None)
+            alt = ""
+            if doc_pr is not None:
+                alt = doc_pr.get("descr") or doc_pr.get("title") or ""
+            images.append(f"![{escape_text(alt)}]({path})")
+            self.counts["image"] += 1
+        return "".join(images)
+    
+    def extract_media(self, media_name):
+        """将图片写入媒体文件夹（每张图片只写一次），返回Markdown中使用的相对路径"""
+        if media_name in self.extracted:
+            return self.extracted[media_name]
+        if media_name not in self.part_names:
+            return None
+        if not os.path.exists(self.media_folder):
+            os.makedirs(self.media_folder)
+        file_name = posixpath.basename(media_name)
+        with open(os.path.join(self.media_folder, file_name), "wb") as f:
+            f.write(self.zf.read(media_name))
+        path = f"{os.path.basename(self.media_folder)}/{file_name}"
+        self.extracted[media_name] = path
+        return path
+    
+    def collect_segments(self, container, link, segments):
+        """
+        按顺序收集段落中的文本片段
+        
+        Args:
+            container: 段落或其中的容器元素
+            link: 当前所在的超链接地址
+            segments: 输出列表，元素为 (文本, 格式, 超链接)，图片的格式为None
+        """
+        for child in container:
+            name = local_name(child.tag)
+            if name == "r":
+                fmt = self.run_format(child.find(w("rPr")))
+                for item in child:
+                    item_name = local_name(item.tag)
+                    if item_name == "t":
+                        segments.append((item.text or "", fmt, link))
+                    elif item_name in ("tab", "ptab"):
+                        segments.append((" ", fmt, link))
+                    elif item_name in ("br", "cr"):
+                        if item.get(w("type")) in (None, "textWrapping"):
+                            segments.append(("\n", (), link))
+                    elif item_name in ("drawing", "pict", "object", "AlternateContent"):
+                        # mc:AlternateContent只取第一个分支，避免mc:Fallback中的副本重复输出
+                        image = self.image_markdown(item[0] if item_name == "AlternateContent" and len(item) else item)
+                        if image:
+                            segments.append((image, None, link))
+            elif name == "hyperlink":
+                target = None
+                rel = self.rels.get(child.get(f"{{{R_NS}}}id"))
+                if rel is not None:
+                    target = rel[1]
+                elif child.get(w("anchor")):
+                    target = "#" + child.get(w("anchor"))
+                self.collect_segments(child, target, segments)
+            elif name in TRANSPARENT_TAGS:
+                self.collect_segments(child, link, segments)
+    
+    def inline_markdown(self, p):
+        """
+        将段落内容转换为行内Markdown，格式和链接相同的相邻run合并后再加标记
+        
+        Args:
+            p: w:p元素
+        
+        Returns:
+            Markdown文本
+        """
+        segments = []
+        self.collect_segments(p, None, segments)
+        
+        # 合并格式和链接都相同的相邻片段；换行单独保留，之后转换为硬换行
+        merged = []
+        for text, fmt, link in segments:
+            if (fmt is not None and text != "\n" and merged and merged[-1][0] != "\n"
+                    and merged[-1][1] == fmt and merged[-1][2] == link):
+                merged[-1][0] += text
+            else:
+                merged.append([text, fmt, link])
+        
+        pieces = []
+        link_pieces = []
+        current_link = None
+        
+        def flush_link():
+            if current_link and link_pieces:
+                pieces.append(f"[{''.join(link_pieces)}]({current_link})")
+            else:
+                pieces.extend(link_pieces)
+            link_pieces.clear()
+        
+        for text, fmt, link in merged:
+            if link != current_link:
+                flush_link()
+                current_link = link
+            if fmt is None:
+                link_pieces.append(text)
+                continue
+            if text == "\n":
+                link_pieces.append("  \n")
+                continue
+            
+            # 标记不能紧挨空白，把首尾空白移到标记外面
+            core = text.strip()
+            if not core:
+                link_pieces.append(text)
+                continue
+            lead = text[:len(text) - len(text.lstrip())]
+            tail = text[len(text.rstrip()):]
+            marker = "".join(mark for tag, mark in FORMAT_MARKERS if tag in fmt)
+            closing = "".join(mark for tag, mark in reversed(FORMAT_MARKERS) if tag in fmt)
+            link_pieces.append(f"{lead}{marker}{escape_text(core)}{closing}{tail}")
+        flush_link()
+        
+        return "".join(pieces).strip()
+    
+    def paragraph_block(self, p):
+        """
+        转换一个段落
+        
+        Args:
+            p: w:p元素
+        
+        Returns:
+            (块类型, Markdown文本)，空段落返回(None, "")
+        """
+        text = self.inline_markdown(p)
+        if not text:
+            return None, ""
+        
+        ppr = p.find(w("pPr"))
+        style = {}
+        outline = None
+        num = None
+        if ppr is not None:
+            pstyle = ppr.find(w("pStyle"))
+            if pstyle is not None:
+                style = self.styles.get(pstyle.get(w("val")), {})
+            outline = style.get("outline")
+            num = style.get("num")
+            outline_elem = ppr.find(w("outlineLvl"))
+            if outline_elem is not None:
+                level = int(outline_elem.get(w("val"), "9"))
+                outline = level if level < 9 else None
+            num_pr = ppr.find(w("numPr"))
+            if num_pr is not None:
+                num = read_num_pr(num_pr, num)
+        
+        # 标题
+        if outline is not None:
+            self.counts["heading"] += 1
+            return "heading", "#" * min(outline + 1, 6) + " " + text.replace("  \n", " ")
+        
+        # 列表（numId为0表示取消编号）
+        if num is not None and num[0] not in (None, "0"):
+            num_fmt = self.numbering.get(num, "decimal")
+            if num_fmt != "none":
+                self.counts["list"] += 1
+                indent = "    " * int(num[1] or 0)
+                bullet = "-" if num_fmt == "bullet" else "1."
+                return "list", f"{indent}{bullet} {text}"
+        
+        self.counts["paragraph"] += 1
+        return "paragraph", LINE_START_PATTERN.sub(r"\1\\\2", text)
+    
+    def table_block(self, tbl):
+        """
+        转换一个表格为管道表格，合并单元格展开为空单元格，嵌套表格的文字并入所在单元格
+        
+        Args:
+            tbl: w:tbl元素
+        
+        Returns:
+            Markdown文本
+        """
+        rows = []
+        for tr in tbl.iterchildren(w("tr")):
+            row = []
+            tr_pr = tr.find(w("trPr"))
+            grid_before = tr_pr.find(w("gridBefore")) if tr_pr is not None else None
+            if grid_before is not None:
+                row.extend([""] * int(grid_before.get(w("val"), "0")))
+            
+            for tc in tr.iterchildren(w("tc")):
+                tc_pr = tc.find(w("tcPr"))
+                span = 1
+                text = ""
+                v_merge = tc_pr.find(w("vMerge")) if tc_pr is not None else None
+                if tc_pr is not None and tc_pr.find(w("gridSpan")) is not None:
+                    span = int(tc_pr.find(w("gridSpan")).get(w("val"), "1"))
+                if v_merge is None or v_merge.get(w("val")) == "restart":
+                    lines = [self.inline_markdown(p) for p in tc.iter(w("p"))]
+                    text = "<br>".join(line.replace("  \n", "<br>").replace("\n", "<br>") for line in lines if line)
+                row.append(text.replace("|", "\\|"))
+                row.extend([""] * (span - 1))
+            rows.append(row)
+        
+        if not rows:
+            return ""
+        self.counts["table"] += 1
+        columns = max(len(row) for row in rows)
+        lines = []
+        for index, row in enumerate(rows):
+            row = row + [""] * (columns - len(row))
+            lines.append("| " + " | ".join(row) + " |")
+            if index == 0:
+                lines.append("|" + " --- |" * columns)
+        return "\n".join(lines)
+
+def is_top_level(p):
+    """判断段落是否为正文中的顶层段落（不在表格、文本框中）"""
+    parent = p.getparent()
+    while parent is not None:
+        name = local_name(parent.tag)
+        if name == "body":
+            return True
+        if name in ("p", "tc", "txbxContent"):
+            return False
+        parent = parent.getparent()
+    return False
+
+def export_markdown(doc_path):
+    """
+    将Word文档导出为Markdown
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        输出文件路径
+    """
+    print(f"正在处理文件: {doc_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(doc_path):
+        print(f"错误: 文件 '{doc_path}' 不存在!")
+        return None
+    
+    # 构建输出文件名和图片文件夹
+    file_name = os.path.splitext(doc_path)[0]
+    output_file = f"{file_name}.md"
+    media_folder = f"{file_name}_media"
+    
+    with zipfile.ZipFile(doc_path) as zf, open(output_file, "w", encoding="utf-8") as out:
+        exporter = MarkdownExporter(zf, media_folder)
+        previous = None
+        depth = 0
+        
+        with zf.open("word/document.xml") as f:
+            for event, elem in ET.iterparse(f, events=("start", "end"), tag=(w("tbl"), w("p"))):
+                if elem.tag == w("tbl"):
+                    if event == "start":
+                        depth += 1
+                        continue
+                    depth -= 1
+                    if depth > 0:
+                        continue
+                    block_type, text = "table", exporter.table_block(elem)
+                elif event == "start" or depth > 0 or not is_top_level(elem):
+                    continue
+                else:
+                    block_type, text = exporter.paragraph_block(elem)
+                
+                if text:
+                    # 连续的列表项之间不空行
+                    if previous is not None:
+                        out.write("\n" if block_type == previous == "list" else "\n\n")
+                    out.write(text)
+                    previous = block_type
+                
+                # 处理完的元素从树中删除，保持内存占用平稳
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        
+        out.write("\n")
+    
+    counts = exporter.counts
+    print(f"共导出 {counts['heading']} 个标题、{counts['paragraph']} 个段落、{counts['list']} 个列表项、"
+          f"{counts['table']} 个表格、{counts['image']} 张图片")
+    if exporter.extracted:
+        print(f"图片已保存到: {media_folder}")
+    return output_file
+
+def main():
+    # 执行导出
+    output_file = export_markdown(input_file)
+    
+    if output_file:
+        print(f"Markdown已保存为: {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -3,22 +3,236 @@
 
 """
 提取Word文档中的所有图片
+
+直接从docx压缩包中枚举word/media下的图片（包括正文、页眉、页脚、脚注中的图片），
+通过文件头识别图片格式而不解码图片，按内容哈希去重，并使用线程池写出文件。
+同时生成图片位置清单（所在部件、段落序号、显示尺寸、替代文字、嵌入/浮动方式）
 """
 
 import os
-import io
-from docx import Document
-from PIL import Image
+import csv
+import json
+import hashlib
+import zipfile
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree as ET
 
 # 文件读取部分，便于修改需读取文件名
-input_file = "document.docx"  # 请修改为实际的文件名
+input_file = "document.docx"  # 请修改为实际的文件名，也可以填写文件夹路径以批量处理其中所有docx文件
+
+# 写文件的线程数
+max_workers = 8
+
+# 图片位置清单格式："csv"、"json"，设为None则不生成清单
+manifest_format = "csv"
+
+# 图片所在目录（docx压缩包内）
+MEDIA_PREFIX = "word/media/"
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+WP_NS = "http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing"
+A_NS = "http://schemas.openxmlformats.org/drawingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+# 1厘米 = 360000 EMU
+EMU_PER_CM = 360000
+
+def sniff_image_format(data, fallback_ext):
+    """
+    根据文件头（魔数）判断图片格式，不解码图片
+    
+    Args:
+        data: 图片字节数据
+        fallback_ext: 无法识别时使用的扩展名
+    
+    Returns:
+        图片格式扩展名（小写，不含点）
+    """
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if data.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "gif"
+    if data.startswith(b"BM"):
+        return "bmp"
+    if data.startswith((b"II*\x00", b"MM\x00*")):
+        return "tiff"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data[40:44] == b" EMF":
+        return "emf"
+    if data.startswith((b"\xd7\xcd\xc6\x9a", b"\x01\x00\x09\x00", b"\x02\x00\x09\x00")):
+        return "wmf"
+    if b"<svg" in data[:1024]:
+        return "svg"
+    return fallback_ext
+
+def write_file(path, data):
+    """
+    写出单个图片文件
+    
+    Args:
+        path: 输出文件路径
+        data: 图片字节数据
+    """
+    with open(path, "wb") as f:
+        f.write(data)
+
+def read_image_rels(zf, part_name):
+    """
+    读取部件的关系文件，建立 rId -> 图片在压缩包中路径 的索引
+    
+    Args:
+        zf: 打开的ZipFile对象
+        part_name: 部件路径，如 word/document.xml
+    
+    Returns:
+        字典 {rId: 压缩包内的图片路径}
+    """
+    part_dir, part_file = posixpath.split(part_name)
+    rels_name = posixpath.join(part_dir, "_rels", part_file + ".rels")
+    if rels_name not in zf.namelist():
+        return {}
+    
+    image_rels = {}
+    root = ET.fromstring(zf.read(rels_name))
+    for rel in root.iter(f"{{{PKG_REL_NS}}}Relationship"):
+        if not rel.get("Type", "").endswith("/image") or rel.get("TargetMode") == "External":
+            continue
+        target = rel.get("Target", "")
+        if target.startswith("/"):
+            target_name = target.lstrip("/")
+        else:
+            target_name = posixpath.normpath(posixpath.join(part_dir, target))
+        image_rels[rel.get("Id")] = target_name
+    return image_rels
 
-def extract_images(doc_path):
+def scan_drawings(zf, part_name, image_rels, file_by_media):
+    """
+    流式遍历部件中的w:drawing元素，生成图片位置记录
+    
+    Args:
+        zf: 打开的ZipFile对象
+        part_name: 部件路径
+        image_rels: 该部件的 rId -> 图片路径 索引
+        file_by_media: 图片路径 -> 提取出的文件路径 索引
+    
+    Returns:
+        图片位置记录列表
+    """
+    records = []
+    paragraph_index = 0
+    # 各层w:drawing开始时所在的段落序号（文本框中的段落会在w:drawing结束之前继续计数）
+    drawing_paragraphs = []
+    p_tag = f"{{{W_NS}}}p"
+    drawing_tag = f"{{{W_NS}}}drawing"
+    body_tags = {f"{{{W_NS}}}body", f"{{{W_NS}}}hdr", f"{{{W_NS}}}ftr"}
+    
+    with zf.open(part_name) as f:
+        for event, elem in ET.iterparse(f, events=("start", "end"), tag=(p_tag, drawing_tag)):
+            if event == "start":
+                if elem.tag == p_tag:
+                    paragraph_index += 1
+                else:
+                    drawing_paragraphs.append(paragraph_index)
+                continue
+            
+            if elem.tag == drawing_tag:
+                drawing_paragraph = drawing_paragraphs.pop()
+                for shape in elem:
+                    placement = ET.QName(shape).localname  # inline 或 anchor
+                    extent = shape.find(f"{{{WP_NS}}}extent")
+                    doc_pr = shape.find(f"{{{WP_NS}}}docPr")
+                    cx = int(extent.get("cx", 0)) if extent is not None else 0
+                    cy = int(extent.get("cy", 0)) if extent is not None else 0
+                    
+                    for blip in shape.iter(f"{{{A_NS}}}blip"):
+                        # 文本框中嵌套的w:drawing由它自己的结束事件记录
+                        if next(blip.iterancestors(drawing_tag)) is not elem:
+                            continue
+                        rid = blip.get(f"{{{R_NS}}}embed") or blip.get(f"{{{R_NS}}}link")
+                        media_name = image_rels.get(rid, "")
+                        records.append({
+                            "part": part_name,
+                            "paragraph_index": drawing_paragraph,
+                            "image_file": file_by_media.get(media_name, ""),
+                            "media_name": media_name,
+                            "rel_id": rid,
+                            "placement": placement,
+                            "width_cm": round(cx / EMU_PER_CM, 2),
+                            "height_cm": round(cy / EMU_PER_CM, 2),
+                            "width_emu": cx,
+                            "height_emu": cy,
+                            "name": doc_pr.get("name", "") if doc_pr is not None else "",
+                            "alt_text": doc_pr.get("descr", "") if doc_pr is not None else "",
+                        })
+                elem.clear()
+            elif elem.getparent() is not None and elem.getparent().tag in body_tags:
+                # 顶层段落处理完毕后释放内存
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+    
+    return records
+
+def build_manifest(zf, file_by_media):
+    """
+    生成文档中所有图片的位置清单
+    
+    Args:
+        zf: 打开的ZipFile对象
+        file_by_media: 图片路径 -> 提取出的文件路径 索引
+    
+    Returns:
+        图片位置记录列表
+    """
+    records = []
+    part_names = [name for name in zf.namelist()
+                  if name.startswith("word/") and name.endswith(".xml") and name.count("/") == 1]
+    
+    for part_name in sorted(part_names):
+        image_rels = read_image_rels(zf, part_name)
+        if not image_rels:
+            continue
+        records.extend(scan_drawings(zf, part_name, image_rels, file_by_media))
+    
+    return records
+
+def save_manifest(records, output_dir):
+    """
+    保存图片位置清单
+    
+    Args:
+        records: 图片位置记录列表
+        output_dir: 输出文件夹
+    
+    Returns:
+        清单文件路径
+    """
+    if manifest_format == "json":
+        manifest_path = os.path.join(output_dir, "manifest.json")
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=4)
+    else:
+        manifest_path = os.path.join(output_dir, "manifest.csv")
+        fieldnames = list(records[0].keys()) if records else ["part", "paragraph_index", "image_file"]
+        with open(manifest_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fieldnames)
+            writer.writeheader()
+            writer.writerows(records)
+    return manifest_path
+
+def extract_images(doc_path, executor=None):
     """
     提取Word文档中的所有图片
     
     Args:
         doc_path: Word文档路径
+        executor: 用于写文件的线程池，为None时自动创建
     
     Returns:
         提取的图片数量
@@ -38,41 +252,81 @@ def extract_images(doc_path):
         os.makedirs(output_dir)
         print(f"创建输出文件夹: {output_dir}")
     
-    # 打开文档
-    doc = Document(doc_path)
+    own_executor = executor is None
+    if own_executor:
+        executor = ThreadPoolExecutor(max_workers=max_workers)
     
     # 提取图片
     image_count = 0
+    duplicate_count = 0
+    file_by_hash = {}
+    file_by_media = {}
+    futures = []
     
-    # 遍历文档中的关系
-    for rel in doc.part.rels.values():
-        # 检查关系类型是否为图片
-        if "image" in rel.reltype:
-            # 获取图片数据
-            image_data = rel.target_part.blob
+    try:
+        with zipfile.ZipFile(doc_path) as zf:
+            media_names = sorted(name for name in zf.namelist()
+                                 if name.startswith(MEDIA_PREFIX) and not name.endswith("/"))
             
-            # 尝试确定图片格式
-            try:
-                img = Image.open(io.BytesIO(image_data))
-                img_format = img.format.lower()
+            for name in media_names:
+                data = zf.read(name)
                 
-                # 保存图片
-                image_count += 1
-                img_filename = f"{output_dir}/image_{image_count:03d}.{img_format}"
-                with open(img_filename, "wb") as img_file:
-                    img_file.write(image_data)
+                # 按内容哈希去重
+                digest = hashlib.sha1(data).digest()
+                if digest in file_by_hash:
+                    file_by_media[name] = file_by_hash[digest]
+                    duplicate_count += 1
+                    continue
                 
-                print(f"已提取图片 {image_count}: {img_filename} ({img.width}x{img.height}, {img_format})")
+                # 通过文件头判断格式
+                fallback_ext = os.path.splitext(name)[1].lstrip(".").lower() or "bin"
+                img_format = sniff_image_format(data, fallback_ext)
+                
+                image_count += 1
+                img_filename = os.path.join(output_dir, f"image_{image_count:03d}.{img_format}")
+                file_by_hash[digest] = img_filename
+                file_by_media[name] = img_filename
+                futures.append(executor.submit(write_file, img_filename, data))
                 
-            except Exception as e:
-                print(f"警告: 无法处理图片 {image_count + 1}: {str(e)}")
+                print(f"已提取图片 {image_count}: {img_filename} ({len(data) / 1024:.1f} KB, {img_format})")
+            
+            # 生成图片位置清单
+            if manifest_format:
+                records = build_manifest(zf, file_by_media)
+                manifest_path = save_manifest(records, output_dir)
+                print(f"已生成图片位置清单: {manifest_path}（{len(records)} 处图片引用）")
+        
+        # 等待所有写入完成，出现异常时在此抛出
+        for future in futures:
+            future.result()
+    
+    except zipfile.BadZipFile:
+        print(f"错误: '{doc_path}' 不是有效的docx文件")
+        return 0
+    
+    finally:
+        if own_executor:
+            executor.shutdown()
     
+    if duplicate_count:
+        print(f"跳过了 {duplicate_count} 张重复图片")
     print(f"共提取了 {image_count} 张图片到文件夹: {output_dir}")
     return image_count
 
 def main():
-    # 执行图片提取
-    image_count = extract_images(input_file)
+    # 收集待处理的文件
+    if os.path.isdir(input_file):
+        doc_paths = [os.path.join(input_file, name) for name in sorted(os.listdir(input_file))
+                     if name.lower().endswith(".docx") and not name.startswith("~$")]
+        print(f"在文件夹 '{input_file}' 中找到 {len(doc_paths)} 个docx文件")
+    else:
+        doc_paths = [input_file]
+    
+    # 执行图片提取，所有文档共用一个写文件线程池
+    image_count = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for doc_path in doc_paths:
+            image_count += extract_images(doc_path, executor)
     
     if image_count > 0:
         print(f"图片提取完成! 共提取了 {image_count} 张图片")
@@ -80,4 +334,4 @@ def main():
         print("未找到任何图片或处理过程中出现错误")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,11 +3,17 @@
 
 """
 提取Word文档中的所有样式信息并输出为JSON文件
+
+除了样式上直接设置的属性外，还会沿basedOn继承链计算每个样式的完整生效属性
+（包含docDefaults默认值），覆盖段落、字符、表格和编号样式。
+direct字段是样式XML中直接设置的属性块，apply_styles用它整体替换目标样式；
+effective字段描述文字实际的显示效果，只用于查看
 """
 
 import os
 import json
 from docx import Document
+from docx.oxml.ns import qn
 from datetime import datetime
 
 # 文件读取部分，便于修改需读取文件名
@@ -16,6 +22,231 @@ input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
 # 输出文件名
 output_file = f"{os.path.splitext(input_file)[0]}_styles.json"
 
+# 样式类型（w:style的w:type属性）
+STYLE_TYPES = {
+    "paragraph": "paragraph",
+    "character": "character",
+    "table": "table",
+    "numbering": "numbering",
+}
+
+# 各类型样式参与继承计算的属性块
+PROPERTY_BLOCKS = {
+    "paragraph": ["pPr", "rPr"],
+    "character": ["rPr"],
+    "table": ["pPr", "rPr", "tblPr", "trPr", "tcPr"],
+    "numbering": ["pPr"],
+}
+
+# 属性块中不参与继承的元素（修订记录、段落标记格式、分节信息）
+SKIPPED_PROPERTIES = {"rPrChange", "pPrChange", "tblPrChange", "trPrChange", "tcPrChange", "rPr", "sectPr"}
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# 常见扩展命名空间的前缀，导出为 前缀:名称（如 w14:ligatures）
+NAMESPACE_PREFIXES = {
+    "http://schemas.microsoft.com/office/word/2010/wordml": "w14",
+    "http://schemas.microsoft.com/office/word/2012/wordml": "w15",
+    "http://schemas.microsoft.com/office/word/2015/wordml/symex": "w16se",
+    "http://schemas.microsoft.com/office/word/2016/wordml/cid": "w16cid",
+    "http://schemas.microsoft.com/office/word/2018/wordml": "w16",
+    "http://schemas.microsoft.com/office/word/2018/wordml/cex": "w16cex",
+    "http://schemas.microsoft.com/office/word/2020/wordml/sdtdatahash": "w16sdtdh",
+    "http://schemas.openxmlformats.org/officeDocument/2006/relationships": "r",
+    "http://schemas.openxmlformats.org/officeDocument/2006/math": "m",
+    "http://schemas.openxmlformats.org/markup-compatibility/2006": "mc",
+}
+
+def qualified_name(tag):
+    """
+    返回带命名空间信息的标签名或属性名
+    
+    w命名空间的名称只保留本地名（如 rFonts、val），常见扩展命名空间使用前缀（如 w14:ligatures），
+    其他命名空间（包括没有命名空间）使用Clark表示法（{命名空间}名称），保证apply_styles能按原命名空间还原
+    """
+    if not tag.startswith("{"):
+        return "{}" + tag
+    namespace, name = tag[1:].split("}", 1)
+    if namespace == W_NS:
+        return name
+    prefix = NAMESPACE_PREFIXES.get(namespace)
+    return f"{prefix}:{name}" if prefix else tag
+
+def element_to_dict(elem):
+    """
+    将属性元素转换为字典：属性作为键值，子元素按标签名嵌套，同名子元素合并为列表；
+    键名保留命名空间信息（见qualified_name）
+    
+    Args:
+        elem: XML元素，如 w:rFonts、w:spacing、w:tabs
+    
+    Returns:
+        字典
+    """
+    result = {qualified_name(k): v for k, v in elem.attrib.items()}
+    for child in elem:
+        if not isinstance(child.tag, str):
+            continue
+        name = qualified_name(child.tag)
+        value = element_to_dict(child)
+        if name in result:
+            if not isinstance(result[name], list):
+                result[name] = [result[name]]
+            result[name].append(value)
+        else:
+            result[name] = value
+    return result
+
+def read_property_block(parent, block_name):
+    """
+    读取属性块（如w:rPr、w:pPr）中直接设置的属性
+    
+    Args:
+        parent: 包含属性块的元素（w:style或docDefaults下的元素）
+        block_name: 属性块名称
+    
+    Returns:
+        字典 {属性名: 属性值字典}
+    """
+    block = parent.find(qn(f"w:{block_name}")) if parent is not None else None
+    if block is None:
+        return {}
+    
+    props = {}
+    for child in block:
+        if not isinstance(child.tag, str):
+            continue
+        name = qualified_name(child.tag)
+        if name in SKIPPED_PROPERTIES:
+            continue
+        props[name] = element_to_dict(child)
+    return props
+
+def merge_properties(base, override):
+    """
+    合并属性：同名属性按属性值逐项覆盖（如rFonts只覆盖设置了的字体）
+    
+    Args:
+        base: 继承来的属性字典
+        override: 当前层级直接设置的属性字典
+    
+    Returns:
+        合并后的新字典
+    """
+    merged = dict(base)
+    for name, value in override.items():
+        if isinstance(merged.get(name), dict) and isinstance(value, dict):
+            merged[name] = {**merged[name], **value}
+        else:
+            merged[name] = value
+    return merged
+
+class StyleResolver:
+    """
+    计算样式的完整生效属性
+    
+    沿basedOn继承链向上合并属性，最顶层叠加docDefaults。每个样式的结果只计算一次
+    并缓存，后续样式沿用已算好的父样式结果，因此解析全部样式的开销与样式数量成正比
+    """
+    
+    def __init__(self, styles_element):
+        self.styles_by_id = {}
+        for style in styles_element.findall(qn("w:style")):
+            style_id = style.get(qn("w:styleId"))
+            if style_id:
+                self.styles_by_id[style_id] = style
+        
+        doc_defaults = styles_element.find(qn("w:docDefaults"))
+        self.defaults = {"pPr": {}, "rPr": {}}
+        if doc_defaults is not None:
+            self.defaults["pPr"] = read_property_block(doc_defaults.find(qn("w:pPrDefault")), "pPr")
+            self.defaults["rPr"] = read_property_block(doc_defaults.find(qn("w:rPrDefault")), "rPr")
+        
+        self._cache = {}
+        self._resolving = set()
+    
+    def style_type(self, style):
+        """返回样式类型，缺省为段落样式"""
+        return STYLE_TYPES.get(style.get(qn("w:type")), "paragraph")
+    
+    def related_id(self, style, tag):
+        """读取basedOn、next、link等引用其他样式的子元素的值"""
+        elem = style.find(qn(f"w:{tag}"))
+        return elem.get(qn("w:val")) if elem is not None else None
+    
+    def resolve(self, style_id):
+        """
+        计算样式的生效属性（带缓存）
+        
+        Args:
+            style_id: 样式ID
+        
+        Returns:
+            字典 {属性块名: {属性名: 属性值字典}}；样式不存在时返回None
+        """
+        if style_id in self._cache:
+            return self._cache[style_id]
+        
+        style = self.styles_by_id.get(style_id)
+        if style is None:
+            return None
+        
+        style_type = self.style_type(style)
+        blocks = PROPERTY_BLOCKS[style_type]
+        
+        # 父样式：同类型的basedOn；继承链出现循环时视为没有父样式
+        base = None
+        base_id = self.related_id(style, "basedOn")
+        if base_id and base_id not in self._resolving:
+            base_style = self.styles_by_id.get(base_id)
+            if base_style is not None and self.style_type(base_style) == style_type:
+                self._resolving.add(style_id)
+                base = self.resolve(base_id)
+                self._resolving.discard(style_id)
+        
+        effective = {}
+        for block in blocks:
+            if base is not None:
+                inherited = base.get(block, {})
+            elif style_type == "numbering":
+                inherited = {}
+            else:
+                inherited = self.defaults.get(block, {})
+            effective[block] = merge_properties(inherited, read_property_block(style, block))
+        
+        self._cache[style_id] = effective
+        return effective
+    
+    def resolve_all(self):
+        """计算所有样式的生效属性，返回 {样式ID: 生效属性}"""
+        return {style_id: self.resolve(style_id) for style_id in self.styles_by_id}
+
+def extract_font_info(font):
+    """
+    提取样式上直接设置的字体信息
+    
+    Args:
+        font: 样式的Font对象
+    
+    Returns:
+        字体信息字典
+    """
+    font_info = {}
+    if hasattr(font, "name") and font.name:
+        font_info["name"] = font.name
+    if hasattr(font, "size") and font.size:
+        font_info["size"] = font.size.pt if hasattr(font.size, "pt") else None
+    if hasattr(font, "bold") and font.bold is not None:
+        font_info["bold"] = font.bold
+    if hasattr(font, "italic") and font.italic is not None:
+        font_info["italic"] = font.italic
+    if hasattr(font, "underline") and font.underline is not None:
+        font_info["underline"] = font.underline
+    if hasattr(font, "color") and font.color and font.color.rgb:
+        font_info["color"] = font.color.rgb
+    return font_info
+
 def extract_styles(file_path):
     """
     提取Word文档中的所有样式信息
@@ -36,67 +267,73 @@ def extract_styles(file_path):
     # 打开文档
     doc = Document(file_path)
     
+    # 计算所有样式的完整生效属性（沿basedOn继承链，含docDefaults）
+    resolver = StyleResolver(doc.styles.element)
+    effective_styles = resolver.resolve_all()
+    names_by_id = {style.style_id: style.name for style in doc.styles}
+    
     # 创建样式信息字典
     styles_info = {}
     
     # 获取文档中的所有样式
     for style in doc.styles:
-        # 只处理段落样式
-        if style.type == 1:  # WD_STYLE_TYPE.PARAGRAPH
-            style_info = {}
-            
-            # 获取样式名称
-            style_name = style.name
-            print(f"正在提取样式: {style_name}")
-            
-            # 获取样式基本信息
-            style_info["style_id"] = style.style_id
-            style_info["type"] = "paragraph"
-            
-            # 获取字体信息
-            if style.font:
-                font_info = {}
-                if hasattr(style.font, "name") and style.font.name:
-                    font_info["name"] = style.font.name
-                if hasattr(style.font, "size") and style.font.size:
-                    font_info["size"] = style.font.size.pt if hasattr(style.font.size, "pt") else None
-                if hasattr(style.font, "bold") and style.font.bold is not None:
-                    font_info["bold"] = style.font.bold
-                if hasattr(style.font, "italic") and style.font.italic is not None:
-                    font_info["italic"] = style.font.italic
-                if hasattr(style.font, "underline") and style.font.underline is not None:
-                    font_info["underline"] = style.font.underline
-                if hasattr(style.font, "color") and style.font.color and style.font.color.rgb:
-                    font_info["color"] = style.font.color.rgb
-                
-                style_info["font"] = font_info
-            
-            # 获取段落格式信息
-            if style.paragraph_format:
-                para_format = {}
-                if hasattr(style.paragraph_format, "alignment") and style.paragraph_format.alignment:
-                    para_format["alignment"] = style.paragraph_format.alignment
-                if hasattr(style.paragraph_format, "first_line_indent") and style.paragraph_format.first_line_indent:
-                    para_format["first_line_indent"] = style.paragraph_format.first_line_indent.pt if hasattr(style.paragraph_format.first_line_indent, "pt") else None
-                if hasattr(style.paragraph_format, "left_indent") and style.paragraph_format.left_indent:
-                    para_format["left_indent"] = style.paragraph_format.left_indent.pt if hasattr(style.paragraph_format.left_indent, "pt") else None
-                if hasattr(style.paragraph_format, "right_indent") and style.paragraph_format.right_indent:
-                    para_format["right_indent"] = style.paragraph_format.right_indent.pt if hasattr(style.paragraph_format.right_indent, "pt") else None
-                if hasattr(style.paragraph_format, "line_spacing") and style.paragraph_format.line_spacing:
-                    para_format["line_spacing"] = style.paragraph_format.line_spacing
-                if hasattr(style.paragraph_format, "space_before") and style.paragraph_format.space_before:
-                    para_format["space_before"] = style.paragraph_format.space_before.pt if hasattr(style.paragraph_format.space_before, "pt") else None
-                if hasattr(style.paragraph_format, "space_after") and style.paragraph_format.space_after:
-                    para_format["space_after"] = style.paragraph_format.space_after.pt if hasattr(style.paragraph_format.space_after, "pt") else None
-                
-                style_info["paragraph_format"] = para_format
-            
-            # 获取基础样式
-            if style.base_style:
-                style_info["base_style"] = style.base_style.name
+        style_element = resolver.styles_by_id.get(style.style_id)
+        if style_element is None:
+            continue
+        
+        style_info = {}
+        
+        # 获取样式名称
+        style_name = style.name
+        print(f"正在提取样式: {style_name}")
+        
+        # 获取样式基本信息
+        style_type = resolver.style_type(style_element)
+        style_info["style_id"] = style.style_id
+        style_info["type"] = style_type
+        
+        # 获取字体信息（样式上直接设置的属性）
+        if style_type in ("paragraph", "character") and style.font:
+            style_info["font"] = extract_font_info(style.font)
+        
+        # 获取段落格式信息
+        if style_type == "paragraph" and style.paragraph_format:
+            para_format = {}
+            if hasattr(style.paragraph_format, "alignment") and style.paragraph_format.alignment:
+                para_format["alignment"] = style.paragraph_format.alignment
+            if hasattr(style.paragraph_format, "first_line_indent") and style.paragraph_format.first_line_indent:
+                para_format["first_line_indent"] = style.paragraph_format.first_line_indent.pt if hasattr(style.paragraph_format.first_line_indent, "pt") else None
+            if hasattr(style.paragraph_format, "left_indent") and style.paragraph_format.left_indent:
+                para_format["left_indent"] = style.paragraph_format.left_indent.pt if hasattr(style.paragraph_format.left_indent, "pt") else None
+            if hasattr(style.paragraph_format, "right_indent") and style.paragraph_format.right_indent:
+                para_format["right_indent"] = style.paragraph_format.right_indent.pt if hasattr(style.paragraph_format.right_indent, "pt") else None
+            if hasattr(style.paragraph_format, "line_spacing") and style.paragraph_format.line_spacing:
+                para_format["line_spacing"] = style.paragraph_format.line_spacing
+            if hasattr(style.paragraph_format, "space_before") and style.paragraph_format.space_before:
+                para_format["space_before"] = style.paragraph_format.space_before.pt if hasattr(style.paragraph_format.space_before, "pt") else None
+            if hasattr(style.paragraph_format, "space_after") and style.paragraph_format.space_after:
+                para_format["space_after"] = style.paragraph_format.space_after.pt if hasattr(style.paragraph_format.space_after, "pt") else None
             
-            # 添加到样式信息字典
-            styles_info[style_name] = style_info
+            style_info["paragraph_format"] = para_format
+        
+        # 获取基础样式、后续段落样式和链接样式
+        base_id = resolver.related_id(style_element, "basedOn")
+        if base_id in names_by_id:
+            style_info["base_style"] = names_by_id[base_id]
+        next_id = resolver.related_id(style_element, "next")
+        if next_id in names_by_id:
+            style_info["next_style"] = names_by_id[next_id]
+        link_id = resolver.related_id(style_element, "link")
+        if link_id in names_by_id:
+            style_info["linked_style"] = names_by_id[link_id]
+        
+        # 直接设置的属性块（apply_styles按此还原样式定义）和完整生效属性
+        style_info["direct"] = {block: read_property_block(style_element, block)
+                                for block in PROPERTY_BLOCKS[style_type]}
+        style_info["effective"] = effective_styles.get(style.style_id, {})
+        
+        # 添加到样式信息字典
+        styles_info[style_name] = style_info
     
     # 获取标题样式级别信息
     for i in range(1, 10):  # 通常标题级别从1到9
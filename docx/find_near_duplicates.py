@@ -0,0 +1,342 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+在大量Word文档中查找内容近似重复的文档
+
+流式提取每个文档的段落文本并规范化（全半角统一、小写、去除空白和标点），
+按字符片段（shingle）计算MinHash签名，再用LSH分段分桶找出候选文档对，
+估算相似度后合并为重复文档组。签名按文件SHA-1缓存在sqlite数据库中，
+再次运行时只需处理新增或修改过的文件
+"""
+
+import os
+import re
+import csv
+import sqlite3
+import hashlib
+import zipfile
+import unicodedata
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from lxml import etree as ET
+
+# 文件读取部分，便于修改需读取的文件夹
+input_folder = "文档"  # 请修改为实际的文件夹名
+
+# 相似度阈值（0~1），估算相似度不低于该值的文档归为一组
+similarity_threshold = 0.8
+
+# MinHash参数：签名长度 = 分段数 x 每段行数
+num_bands = 16
+rows_per_band = 8
+shingle_size = 5  # 每个片段的字符数
+random_seed = 20240601
+
+# 签名缓存和结果文件
+cache_file = "near_duplicates_cache.sqlite"
+report_file = "近似重复文档.csv"
+
+# 并行进程数，None表示使用全部CPU核心
+max_workers = None
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# 参数变化后缓存的签名不能再使用
+CACHE_VERSION = f"1-{num_bands}x{rows_per_band}-{shingle_size}-{random_seed}"
+
+# 规范化时去除空白和标点
+STRIP_PATTERN = re.compile(r"[\s\W_]+")
+
+# MinHash使用的哈希函数 (a * x + b) mod p，p为大于2^32的素数
+MERSENNE_PRIME = np.uint64(4294967311)
+MAX_HASH = np.uint64(0xFFFFFFFF)
+_rng = np.random.RandomState(random_seed)
+PERM_A = _rng.randint(1, 2**32 - 1, size=num_bands * rows_per_band, dtype=np.uint64)
+PERM_B = _rng.randint(0, 2**32 - 1, size=num_bands * rows_per_band, dtype=np.uint64)
+
+# 分块计算，避免大文档占用过多内存
+SHINGLE_CHUNK = 8192
+
+def file_sha1(path):
+    """计算文件的SHA-1"""
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            sha1.update(block)
+    return path, sha1.hexdigest()
+
+def extract_normalized_text(doc_path):
+    """
+    流式提取正文中的段落文本并规范化
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        规范化后的文本
+    """
+    p_tag = f"{{{W_NS}}}p"
+    t_tag = f"{{{W_NS}}}t"
+    paragraphs = []
+    pieces = []
+    
+    with zipfile.ZipFile(doc_path) as zf:
+        with zf.open("word/document.xml") as f:
+            for _, elem in ET.iterparse(f, events=("end",), tag=(p_tag, t_tag)):
+                if elem.tag == t_tag:
+                    if elem.text:
+                        pieces.append(elem.text)
+                    continue
+                if pieces:
+                    paragraphs.append("".join(pieces))
+                    pieces = []
+                elem.clear()
+    
+    text = unicodedata.normalize("NFKC", "".join(paragraphs)).lower()
+    return STRIP_PATTERN.sub("", text)
+
+def shingle_hashes(text):
+    """
+    计算文本中所有字符片段的32位哈希（向量化的多项式哈希），去重后返回
+    
+    Args:
+        text: 规范化后的文本
+    
+    Returns:
+        uint64数组（取值范围为32位）
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) < shingle_size:
+        codes = np.pad(codes, (0, shingle_size - len(codes)))
+    
+    count = len(codes) - shingle_size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    # uint64溢出时自动回绕，相当于 mod 2^64
+    with np.errstate(over="ignore"):
+        for offset in range(shingle_size):
+            hashes = hashes * np.uint64(1000003) + codes[offset:offset + count]
+    hashes = (hashes ^ (hashes >> np.uint64(32))) & MAX_HASH
+    return np.unique(hashes)
+
+def minhash_signature(hashes):
+    """
+    计算MinHash签名
+    
+    Args:
+        hashes: 片段哈希数组
+    
+    Returns:
+        uint32签名数组
+    """
+    signature = np.full(len(PERM_A), MAX_HASH, dtype=np.uint64)
+    for start in range(0, len(hashes), SHINGLE_CHUNK):
+        chunk = hashes[start:start + SHINGLE_CHUNK]
+        values = (np.outer(chunk, PERM_A) + PERM_B) % MERSENNE_PRIME & MAX_HASH
+        np.minimum(signature, values.min(axis=0), out=signature)
+    return signature.astype(np.uint32)
+
+def compute_signature(item):
+    """
+    计算单个文档的签名（在子进程中运行）
+    
+    Args:
+        item: (文件路径, SHA-1)
+    
+    Returns:
+        (SHA-1, 签名字节或None, 文本长度, 错误信息)
+    """
+    path, sha1 = item
+    try:
+        text = extract_normalized_text(path)
+        if not text:
+            return sha1, None, 0, ""
+        signature = minhash_signature(shingle_hashes(text))
+        return sha1, signature.tobytes(), len(text), ""
+    except Exception as e:
+        return sha1, None, 0, str(e)
+
+def open_cache(path):
+    """打开签名缓存数据库，参数变化时清空旧的签名"""
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    conn.execute("CREATE TABLE IF NOT EXISTS signatures "
+                 "(sha1 TEXT PRIMARY KEY, signature BLOB, text_length INTEGER)")
+    row = conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+    if row is None or row[0] != CACHE_VERSION:
+        conn.execute("DELETE FROM signatures")
+        conn.execute("INSERT OR REPLACE INTO meta VALUES ('version', ?)", (CACHE_VERSION,))
+        conn.commit()
+    return conn
+
+def find_documents(folder):
+    """查找文件夹（含子文件夹）中的所有docx文件"""
+    documents = []
+    for root, _, files in os.walk(folder):
+        for name in sorted(files):
+            if name.lower().endswith(".docx") and not name.startswith("~$"):
+                documents.append(os.path.join(root, name))
+    return documents
+
+class UnionFind:
+    """并查集，用于将相似文档对合并为组"""
+    
+    def __init__(self, size):
+        self.parent = list(range(size))
+    
+    def find(self, x):
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+    
+    def union(self, a, b):
+        root_a, root_b = self.find(a), self.find(b)
+        if root_a != root_b:
+            self.parent[max(root_a, root_b)] = min(root_a, root_b)
+
+def estimate_similarity(signatures, a, b):
+    """按签名中相同位置相等的比例估算Jaccard相似度"""
+    return float(np.count_nonzero(signatures[a] == signatures[b])) / signatures.shape[1]
+
+def find_clusters(signatures):
+    """
+    LSH分段分桶找出候选文档对，验证相似度后合并为组
+    
+    Args:
+        signatures: 签名矩阵 (文档数, 签名长度)
+    
+    Returns:
+        (组列表[[文档下标, ...], ...], 候选对数)
+    """
+    union_find = UnionFind(len(signatures))
+    checked = set()
+    
+    for band in range(num_bands):
+        # 每段签名作为一个整体比较，相同的进入同一个桶
+        block = np.ascontiguousarray(signatures[:, band * rows_per_band:(band + 1) * rows_per_band])
+        keys = block.view(np.dtype((np.void, block.dtype.itemsize * rows_per_band))).ravel()
+        _, inverse, counts = np.unique(keys, return_inverse=True, return_counts=True)
+        if counts.max(initial=0) < 2:
+            continue
+        
+        buckets = defaultdict(list)
+        for index in np.flatnonzero(counts[inverse] > 1):
+            buckets[inverse[index]].append(int(index))
+        
+        for members in buckets.values():
+            # 桶很大时只与桶内第一个文档比较，避免平方级的比较次数
+            if len(members) <= 50:
+                pairs = ((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+            else:
+                pairs = ((members[0], b) for b in members[1:])
+            for pair in pairs:
+                if pair in checked:
+                    continue
+                checked.add(pair)
+                if union_find.find(pair[0]) == union_find.find(pair[1]):
+                    continue
+                if estimate_similarity(signatures, *pair) >= similarity_threshold:
+                    union_find.union(*pair)
+    
+    groups = defaultdict(list)
+    for index in range(len(signatures)):
+        groups[union_find.find(index)].append(index)
+    clusters = [members for members in groups.values() if len(members) > 1]
+    clusters.sort(key=len, reverse=True)
+    return clusters, len(checked)
+
+def find_near_duplicates(folder):
+    """
+    查找文件夹中内容近似重复的Word文档
+    
+    Args:
+        folder: 文件夹路径
+    
+    Returns:
+        重复文档组数
+    """
+    # 检查文件夹是否存在
+    if not os.path.isdir(folder):
+        print(f"错误: 文件夹 '{folder}' 不存在!")
+        return 0
+    
+    documents = find_documents(folder)
+    print(f"找到 {len(documents)} 个docx文件")
+    if len(documents) < 2:
+        return 0
+    
+    conn = open_cache(cache_file)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # 1. 计算文件SHA-1
+        file_hashes = list(executor.map(file_sha1, documents, chunksize=64))
+        
+        # 2. 只为缓存中没有的文件计算签名
+        cached = {sha1 for (sha1,) in conn.execute("SELECT sha1 FROM signatures")}
+        todo = {}
+        for path, sha1 in file_hashes:
+            if sha1 not in cached and sha1 not in todo:
+                todo[sha1] = path
+        unique_count = len({sha1 for _, sha1 in file_hashes})
+        print(f"共 {unique_count} 个不同的文件，缓存中已有 {unique_count - len(todo)} 个的签名，"
+              f"需要计算 {len(todo)} 个")
+        
+        results = executor.map(compute_signature, [(path, sha1) for sha1, path in todo.items()], chunksize=16)
+        for index, (sha1, signature, text_length, error) in enumerate(results, 1):
+            if error:
+                print(f"  - 警告: 无法处理 {todo[sha1]}: {error}")
+                continue
+            conn.execute("INSERT OR REPLACE INTO signatures VALUES (?, ?, ?)", (sha1, signature, text_length))
+            if index % 1000 == 0:
+                conn.commit()
+                print(f"  - 已计算 {index}/{len(todo)} 个签名")
+        conn.commit()
+    
+    # 3. 组装签名矩阵（没有文本的文档不参与比较）
+    stored = {sha1: (signature, text_length) for sha1, signature, text_length
+              in conn.execute("SELECT sha1, signature, text_length FROM signatures")}
+    conn.close()
+    
+    paths = []
+    lengths = []
+    rows = []
+    for path, sha1 in file_hashes:
+        signature, text_length = stored.get(sha1, (None, 0))
+        if signature is None:
+            continue
+        paths.append(path)
+        lengths.append(text_length)
+        rows.append(np.frombuffer(signature, dtype=np.uint32))
+    if len(rows) < 2:
+        print("有文本内容的文档不足两个，无需比较")
+        return 0
+    signatures = np.vstack(rows)
+    
+    # 4. LSH分桶并合并为重复文档组
+    clusters, candidate_count = find_clusters(signatures)
+    print(f"LSH候选文档对 {candidate_count} 个，找到 {len(clusters)} 组近似重复文档")
+    
+    # 5. 保存结果，相似度相对于组内文本最长的文档
+    with open(report_file, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["组号", "文件", "文本长度", "与代表文档的估算相似度"])
+        for group_id, members in enumerate(clusters, 1):
+            representative = max(members, key=lambda index: lengths[index])
+            members.sort(key=lambda index: (index != representative, paths[index]))
+            for index in members:
+                similarity = estimate_similarity(signatures, representative, index)
+                writer.writerow([group_id, paths[index], lengths[index], f"{similarity:.2f}"])
+            if group_id <= 10:
+                print(f"  - 第{group_id}组: {len(members)} 个文档，代表文档 {paths[representative]}")
+    
+    print(f"结果已保存为: {report_file}")
+    return len(clusters)
+
+def main():
+    # 执行近似重复查找
+    find_near_duplicates(input_folder)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+根据Excel数据批量生成Word文档（邮件合并）
+
+模板中使用 {{字段名}} 作为占位符（允许被拆分在多个run中），字段名对应Excel第一行的列名。
+模板只编译一次，生成“固定文本 + 字段”的替换方案；Excel按只读模式逐行读取；
+每份输出只替换模板中含占位符的部件，其他部件原样复制，并使用多进程并行生成
+"""
+
+import os
+import re
+import zipfile
+import datetime
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, unescape
+import openpyxl
+from lxml import etree as ET
+
+# 文件读取部分，便于修改需读取文件名
+template_file = "通知模板.docx"  # 请修改为实际的模板文件名
+data_file = "收件人.xlsx"  # 请修改为实际的数据文件名
+sheet_name = None  # 数据所在工作表，None表示第一个工作表
+
+# 输出设置
+output_folder = "邮件合并结果"
+file_name_field = None  # 用于命名输出文件的列名（如 "姓名"），None表示只使用序号
+
+# 并行进程数，None表示使用全部CPU核心
+max_workers = None
+
+# 每个任务处理的行数
+batch_size = 50
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+XML_SPACE = "{http://www.w3.org/XML/1998/namespace}space"
+
+# 占位符格式
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*([^{}]+?)\s*\}\}")
+
+# 编译后的部件中占位符的形式（已合并到单个w:t中）
+COMPILED_PATTERN = re.compile(rb"\{\{([^{}<>]+?)\}\}")
+
+# w:t的开始标签，用于判断占位符是否位于w:t的文本中
+TEXT_START_TAG_PATTERN = re.compile(rb"<w:t(?:\s[^<>]*)?(?<!/)>")
+
+# 值中需要额外转义的字符（占位符也可能位于属性值中，如域代码和超链接提示）
+QUOTE_ENTITIES = {'"': "&quot;"}
+
+def w(name):
+    """返回带w命名空间的标签名"""
+    return f"{{{W_NS}}}{name}"
+
+def nearest_paragraph(elem):
+    """返回元素所属的最近一层段落"""
+    parent = elem.getparent()
+    while parent is not None and parent.tag != w("p"):
+        parent = parent.getparent()
+    return parent
+
+def normalize_placeholders(root):
+    """
+    将被拆分在多个w:t中的占位符合并到第一个w:t中，其余w:t中对应的部分删除
+    
+    Args:
+        root: 部件根元素
+    
+    Returns:
+        占位符数量
+    """
+    count = 0
+    for p in root.iter(w("p")):
+        texts = [t for t in p.iter(w("t")) if nearest_paragraph(t) is p]
+        if not texts:
+            continue
+        full_text = "".join(t.text or "" for t in texts)
+        matches = list(PLACEHOLDER_PATTERN.finditer(full_text))
+        if not matches:
+            continue
+        
+        # 每个w:t在段落文本中的起止位置
+        spans = []
+        position = 0
+        for t in texts:
+            length = len(t.text or "")
+            spans.append([position, position + length])
+            position += length
+        
+        # 从后往前处理，避免前面的修改影响后面的位置
+        for match in reversed(matches):
+            start, end = match.span()
+            canonical = "{{" + match.group(1) + "}}"
+            for index, t in enumerate(texts):
+                t_start, t_end = spans[index]
+                if t_end <= start or t_start >= end:
+                    continue
+                text = t.text or ""
+                local_start = max(start, t_start) - t_start
+                local_end = min(end, t_end) - t_start
+                if t_start <= start:
+                    # 占位符开始所在的w:t放入完整的占位符
+                    t.text = text[:local_start] + canonical + text[local_end:]
+                else:
+                    t.text = text[:local_start] + text[local_end:]
+                t.set(XML_SPACE, "preserve")
+            count += 1
+    
+    return count
+
+def compile_part(xml_bytes):
+    """
+    将部件编译为替换方案：固定文本片段与字段名交替排列
+    
+    Args:
+        xml_bytes: 部件XML
+    
+    Returns:
+        (固定文本片段列表, [(字段名, 换行时插入的XML, 是否位于属性值中)])，部件中没有占位符时返回None
+    """
+    if b"{{" not in xml_bytes:
+        return None
+    
+    root = ET.fromstring(xml_bytes)
+    if normalize_placeholders(root) == 0:
+        return None
+    
+    compiled = ET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    literals = []
+    fields = []
+    position = 0
+    for match in COMPILED_PATTERN.finditer(compiled):
+        literals.append(compiled[position:match.start()])
+        fields.append((unescape(match.group(1).decode("utf-8")).strip(),
+                       *placeholder_context(compiled, match.start())))
+        position = match.end()
+    literals.append(compiled[position:])
+    return literals, fields
+
+def placeholder_context(xml, position):
+    """
+    判断占位符所在的位置
+    
+    Args:
+        xml: 部件XML
+        position: 占位符的起始位置
+    
+    Returns:
+        (换行时插入的XML或None, 是否位于属性值中)；只有w:t中的占位符可以用w:br换行
+    """
+    tag_start = xml.rfind(b"<", 0, position)
+    tag_end = xml.rfind(b">", 0, position)
+    if tag_start > tag_end:
+        return None, True
+    # 占位符之前最近的标签是w:t的开始标签时，占位符位于w:t的文本中
+    if TEXT_START_TAG_PATTERN.fullmatch(xml, tag_start, tag_end + 1):
+        return b'</w:t><w:br/><w:t xml:space="preserve">', False
+    return None, False
+
+def compile_template(template_path):
+    """
+    编译模板中所有含占位符的部件
+    
+    Args:
+        template_path: 模板文件路径
+    
+    Returns:
+        字典 {部件路径: (固定文本片段列表, 字段名列表)}
+    """
+    plan = {}
+    with zipfile.ZipFile(template_path) as zf:
+        for name in zf.namelist():
+            if not (name.startswith("word/") and name.endswith(".xml")):
+                continue
+            compiled = compile_part(zf.read(name))
+            if compiled:
+                plan[name] = compiled
+                print(f"  - {name}: {len(compiled[1])} 个占位符")
+    return plan
+
+def format_value(value, line_break=None, in_attribute=False):
+    """
+    将单元格的值转换为XML文本，w:t中的换行转换为Word的换行符
+    
+    Args:
+        value: 单元格的值
+        line_break: 换行时插入的XML，None表示占位符不在w:t中
+        in_attribute: 占位符是否位于属性值中
+    
+    Returns:
+        可直接写入占位符位置的字节
+    """
+    if value is None:
+        text = ""
+    elif isinstance(value, float) and value.is_integer():
+        text = str(int(value))
+    elif isinstance(value, datetime.datetime):
+        text = value.strftime("%Y-%m-%d") if value.time() == datetime.time() else value.strftime("%Y-%m-%d %H:%M")
+    elif isinstance(value, datetime.date):
+        text = value.strftime("%Y-%m-%d")
+    else:
+        text = str(value)
+    
+    text = escape(text, QUOTE_ENTITIES)
+    if "\n" in text:
+        text = text.replace("\r\n", "\n")
+        if line_break is not None:
+            text = text.replace("\n", line_break.decode())
+        elif in_attribute:
+            # 属性值中的换行会被规范化为空格
+            text = text.replace("\n", "&#10;")
+    return text.encode("utf-8")
+
+def render_part(compiled, record):
+    """
+    按替换方案生成部件XML
+    
+    Args:
+        compiled: compile_part的结果
+        record: 字段名 -> 值 的字典
+    
+    Returns:
+        部件XML字节
+    """
+    literals, fields = compiled
+    pieces = [literals[0]]
+    for (field, line_break, in_attribute), literal in zip(fields, literals[1:]):
+        pieces.append(format_value(record.get(field), line_break, in_attribute))
+        pieces.append(literal)
+    return b"".join(pieces)
+
+def safe_file_name(text, max_length=60):
+    """将文本转换为可用的文件名"""
+    text = re.sub(r'[\\/:*?"<>|\r\n\t]', "", str(text)).strip()
+    return text[:max_length]
+
+# 子进程中缓存的模板内容（每个进程初始化一次）
+_template_entries = None
+_template_plan = None
+
+def init_worker(template_path, plan):
+    """子进程初始化：读取模板的所有部件"""
+    global _template_entries, _template_plan
+    with zipfile.ZipFile(template_path) as zf:
+        _template_entries = [(item, zf.read(item.filename)) for item in zf.infolist()]
+    _template_plan = plan
+
+def render_batch(start_index, header, rows):
+    """
+    子进程任务：生成一批文档
+    
+    Args:
+        start_index: 第一行的序号
+        header: 列名列表
+        rows: 行数据列表
+    
+    Returns:
+        生成的文件数
+    """
+    for offset, row in enumerate(rows):
+        index = start_index + offset
+        record = dict(zip(header, row))
+        
+        name = f"{index:05d}"
+        if file_name_field and record.get(file_name_field) is not None:
+            name = f"{name}_{safe_file_name(record[file_name_field])}"
+        output_path = os.path.join(output_folder, f"{name}.docx")
+        
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item, data in _template_entries:
+                compiled = _template_plan.get(item.filename)
+                if compiled is not None:
+                    data = render_part(compiled, record)
+                zout.writestr(item, data)
+    
+    return len(rows)
+
+def read_rows(data_path):
+    """
+    以只读模式逐行读取Excel数据
+    
+    Args:
+        data_path: Excel文件路径
+    
+    Yields:
+        第一次返回列名列表，之后每次返回一行数据
+    """
+    wb = openpyxl.load_workbook(data_path, read_only=True, data_only=True)
+    try:
+        ws = wb[sheet_name] if sheet_name else wb.worksheets[0]
+        for row in ws.iter_rows(values_only=True):
+            yield row
+    finally:
+        wb.close()
+
+def mail_merge(template_path, data_path):
+    """
+    根据Excel数据批量生成Word文档
+    
+    Args:
+        template_path: 模板文件路径
+        data_path: Excel数据文件路径
+    
+    Returns:
+        生成的文件数
+    """
+    # 检查文件是否存在
+    for path in (template_path, data_path):
+        if not os.path.exists(path):
+            print(f"错误: 文件 '{path}' 不存在!")
+            return 0
+    
+    # 1. 编译模板
+    print(f"正在编译模板: {template_path}")
+    plan = compile_template(template_path)
+    if not plan:
+        print("错误: 模板中没有找到 {{字段名}} 格式的占位符")
+        return 0
+    
+    template_fields = {field for _, fields in plan.values() for field, _, _ in fields}
+    
+    # 2. 读取列名
+    rows = read_rows(data_path)
+    header = next(rows, None)
+    if header is None:
+        print("错误: 数据文件为空")
+        return 0
+    header = [str(cell).strip() if cell is not None else "" for cell in header]
+    print(f"数据列: {', '.join(name for name in header if name)}")
+    
+    missing = template_fields - set(header)
+    if missing:
+        print(f"警告: 以下字段在数据中不存在，将留空: {', '.join(sorted(missing))}")
+    
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+        print(f"创建输出文件夹: {output_folder}")
+    
+    # 3. 多进程生成文档，限制同时排队的任务数，保持内存平稳
+    generated = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                             initargs=(template_path, plan)) as executor:
+        max_pending = (max_workers or os.cpu_count() or 1) * 2
+        pending = []
+        batch = []
+        next_index = 1
+        
+        def submit(batch, start_index):
+            pending.append(executor.submit(render_batch, start_index, header, batch))
+        
+        def drain(limit):
+            nonlocal generated
+            while len(pending) > limit:
+                generated += pending.pop(0).result()
+                print(f"  - 已生成 {generated} 份文档")
+        
+        for row in rows:
+            if row is None or all(cell is None for cell in row):
+                continue
+            batch.append(row)
+            if len(batch) >= batch_size:
+                submit(batch, next_index)
+                next_index += len(batch)
+                batch = []
+                drain(max_pending)
+        
+        if batch:
+            submit(batch, next_index)
+        drain(0)
+    
+    print(f"邮件合并完成，共生成 {generated} 份文档，保存在: {output_folder}")
+    return generated
+
+def main():
+    # 执行邮件合并
+    mail_merge(template_file, data_file)
+
+if __name__ == "__main__":
+    main()
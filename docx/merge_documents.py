@@ -6,7 +6,12 @@
 """
 
 import os
+import copy
+import hashlib
 from docx import Document
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.opc.packuri import PackURI
+from docx.parts.image import ImagePart
 from datetime import datetime
 
 # 文件读取部分，便于修改需读取文件名
@@ -18,6 +23,95 @@ input_files = [
 # 输出文件名
 output_file = f"合并文档（{datetime.now().strftime('%Y%m%d_%H%M%S')}）.docx"
 
+# 图片关系属性（r:embed / r:link / r:id），复制含图片的run时需要重新指向合并文档中的图片
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+IMAGE_REL_ATTRS = [f"{{{R_NS}}}embed", f"{{{R_NS}}}link", f"{{{R_NS}}}id"]
+
+class MediaDeduplicator:
+    """
+    按内容哈希（SHA-1）对合并文档中的图片去重
+
+    相同内容的图片（如每份文档都有的logo、信头）只保留一个word/media部件，
+    所有引用都指向这个共享部件，合并结果的大小只与不重复的图片数量有关
+    """
+
+    def __init__(self, target_doc):
+        self.target_part = target_doc.part
+        self.package = self.target_part.package
+        # SHA-1 -> 合并文档中的关系ID
+        self.rid_by_hash = {}
+        self.total_refs = 0
+        self.saved_bytes = 0
+        # 图形对象编号（wp:docPr id）在文档内必须唯一
+        self.next_shape_id = 1000
+
+    def get_rid(self, source_part):
+        """
+        获取源图片部件在合并文档中对应的关系ID，内容相同的图片共用一个部件
+        
+        Args:
+            source_part: 源文档中的图片部件
+        
+        Returns:
+            合并文档中的关系ID
+        """
+        self.total_refs += 1
+        blob = source_part.blob
+        sha1 = hashlib.sha1(blob).hexdigest()
+        
+        rid = self.rid_by_hash.get(sha1)
+        if rid is not None:
+            self.saved_bytes += len(blob)
+            return rid
+        
+        # 新图片：直接使用原始字节创建图片部件，无需解码图片
+        ext = os.path.splitext(source_part.partname)[1].lstrip(".") or "bin"
+        partname = PackURI(f"/word/media/image{len(self.rid_by_hash) + 1}.{ext}")
+        image_part = ImagePart(partname, source_part.content_type, blob)
+        self.package.image_parts.append(image_part)
+        
+        rid = self.target_part.relate_to(image_part, RT.IMAGE)
+        self.rid_by_hash[sha1] = rid
+        return rid
+
+    def copy_image_run(self, run, source_doc):
+        """
+        复制包含图片的run，并把其中的图片关系重新指向合并文档中的共享部件
+        
+        Args:
+            run: 源文档中的run对象
+            source_doc: 源Document对象
+        
+        Returns:
+            复制后的run XML元素；如果引用了无法处理的非图片关系则返回None
+        """
+        new_r = copy.deepcopy(run._r)
+        source_rels = source_doc.part.rels
+        
+        for elem in new_r.iter():
+            for attr in IMAGE_REL_ATTRS:
+                rid = elem.get(attr)
+                if rid is None:
+                    continue
+                rel = source_rels.get(rid)
+                if rel is None or rel.is_external or rel.reltype != RT.IMAGE:
+                    return None
+                elem.set(attr, self.get_rid(rel.target_part))
+        
+        for doc_pr in new_r.xpath(".//*[local-name()='docPr']"):
+            self.next_shape_id += 1
+            doc_pr.set("id", str(self.next_shape_id))
+        
+        return new_r
+
+    def print_summary(self):
+        """打印图片去重统计信息"""
+        if self.total_refs == 0:
+            return
+        print(f"图片去重: 共 {self.total_refs} 处图片引用，"
+              f"合并后保留 {len(self.rid_by_hash)} 个图片部件，"
+              f"节省 {self.saved_bytes / 1024:.1f} KB")
+
 def merge_documents(file_paths):
     """
     合并多个Word文档
@@ -37,6 +131,9 @@ def merge_documents(file_paths):
     # 创建一个新文档作为合并的目标
     merged_doc = Document()
     
+    # 图片按内容哈希去重
+    media = MediaDeduplicator(merged_doc)
+    
     # 遍历所有输入文件
     for i, file_path in enumerate(file_paths):
         print(f"正在处理文件 {i+1}/{len(file_paths)}: {file_path}")
@@ -58,6 +155,13 @@ def merge_documents(file_paths):
             new_para = merged_doc.add_paragraph()
             # 复制文本和格式
             for run in para.runs:
+                # 含图片的run整体复制，图片指向去重后的共享部件
+                if run._r.xpath(".//*[local-name()='blip' or local-name()='imagedata']"):
+                    new_r = media.copy_image_run(run, doc)
+                    if new_r is not None:
+                        new_para._p.append(new_r)
+                        continue
+                
                 new_run = new_para.add_run(run.text)
                 # 复制格式
                 new_run.bold = run.bold
@@ -88,6 +192,7 @@ def merge_documents(file_paths):
         
         print(f"已合并文件: {file_path}")
     
+    media.print_summary()
     return merged_doc
 
 def main():
@@ -0,0 +1,478 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+对Word文档中的敏感信息进行脱敏（身份证号、手机号、固定电话、银行卡号、邮箱、名单中的姓名）
+
+所有规则编译为一个带命名分组的正则表达式，姓名名单编译为前缀树形式的正则；
+在段落拼接后的完整文本上匹配（可以跨run），只把匹配到的字符替换为掩码字符，
+长度不变，因此run的格式保持不变。覆盖正文、表格、页眉、页脚、批注、脚注、尾注、
+文本框以及修订中被删除的文字，每个文件输出一份脱敏记录（不含原文）
+
+同样的信息还会出现在文字以外的地方，也一并处理：域代码（w:instrText、
+w:fldSimple的w:instr）、超链接地址（word/_rels中的外部链接，如mailto:）、
+批注和修订的作者、文档属性（docProps中的作者、最后修改者等）。作者类字段整体按姓名掩码，
+不要求在姓名名单中。其他未处理的部件（图表、customXml等）若含有疑似敏感信息会给出警告
+"""
+
+import os
+import re
+import csv
+import zipfile
+from urllib.parse import quote, unquote
+from concurrent.futures import ProcessPoolExecutor
+from lxml import etree as ET
+
+# 文件读取部分，便于修改需读取的文件（也可以是文件夹）
+input_file = "探索知识海洋.docx"  # 请修改为实际的文件名或文件夹名
+
+# 姓名名单文件（每行一个姓名），不存在时只使用下面的列表
+names_file = "姓名名单.txt"
+name_list = []
+
+# 掩码字符
+mask_char = "*"
+
+# 并行进程数（处理文件夹时使用），None表示使用全部CPU核心
+max_workers = None
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+W15_NS = "http://schemas.microsoft.com/office/word/2012/wordml"
+CP_NS = "http://schemas.openxmlformats.org/package/2006/metadata/core-properties"
+DC_NS = "http://purl.org/dc/elements/1.1/"
+EP_NS = "http://schemas.openxmlformats.org/officeDocument/2006/extended-properties"
+
+# 需要脱敏的部件：正文类部件（段落文字、域代码和属性）
+PART_PATTERN = re.compile(r"^word/(document|header\d*|footer\d*|comments|footnotes|endnotes|people)\.xml$")
+# 关系部件（超链接等外部地址）
+RELS_PATTERN = re.compile(r"^word/_rels/[^/]+\.rels$")
+# 文档属性部件
+PROPERTIES_PATTERN = re.compile(r"^docProps/(core|app|custom)\.xml$")
+# 未处理但需要检查的部件
+CHECK_PATTERN = re.compile(r"\.(xml|rels)$")
+
+# 段落中分别拼接匹配的文字：可见文字、域代码
+TEXT_GROUPS = (
+    (f"{{{W_NS}}}t", f"{{{W_NS}}}delText"),
+    (f"{{{W_NS}}}instrText", f"{{{W_NS}}}delInstrText"),
+)
+
+# 按规则匹配的属性：域代码、超链接提示
+TEXT_ATTRIBUTES = {f"{{{W_NS}}}instr", f"{{{W_NS}}}tooltip"}
+
+# 作者类属性和元素，整体按姓名掩码
+PERSON_ATTRIBUTES = {f"{{{W_NS}}}author", f"{{{W_NS}}}initials", f"{{{W15_NS}}}author", f"{{{W15_NS}}}userId"}
+PERSON_ELEMENTS = {f"{{{DC_NS}}}creator", f"{{{CP_NS}}}lastModifiedBy", f"{{{EP_NS}}}Manager"}
+
+# 作者类字段的显示名称
+PERSON_LABEL = "作者"
+
+# URL中无需转义的字符
+URL_SAFE = ":/?#[]@!$&'()*+,;=~"
+
+# 脱敏规则：分组名 -> (显示名称, 正则, 保留开头字符数, 保留结尾字符数)
+# 按顺序匹配，同一位置先匹配前面的规则（身份证号要排在银行卡号前面）
+RULES = {
+    "id_card": ("身份证号",
+                r"(?<![0-9A-Za-z])[1-9]\d{5}(?:18|19|20)\d{2}(?:0[1-9]|1[0-2])"
+                r"(?:0[1-9]|[12]\d|3[01])\d{3}[\dXx](?![0-9A-Za-z])", 6, 4),
+    "mobile": ("手机号", r"(?<!\d)(?:\+?86[ -]?)?1[3-9]\d(?:[ -]?\d{4}){2}(?!\d)", 3, 4),
+    "phone": ("固定电话", r"(?<!\d)0\d{2,3}[ -]?\d{7,8}(?!\d)", 4, 2),
+    "bank_card": ("银行卡号", r"(?<!\d)[1-9]\d{3}(?:[ -]?\d{4}){3}(?:[ -]?\d{1,3})?(?!\d)", 4, 4),
+    "email": ("邮箱", r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}", 1, 0),
+}
+
+# 姓名的规则（保留姓氏）
+NAME_RULE = ("name", "姓名", 1, 0)
+
+# 掩码时保留的分隔符
+SEPARATORS = set(" -@.")
+
+def load_names():
+    """读取姓名名单"""
+    names = set(name_list)
+    if os.path.exists(names_file):
+        with open(names_file, encoding="utf-8-sig") as f:
+            names.update(line.strip() for line in f)
+    return sorted(name for name in names if name)
+
+def build_trie_pattern(words):
+    """
+    将词语列表编译为前缀树形式的正则，共享前缀只匹配一次，且优先匹配较长的词
+    
+    Args:
+        words: 词语列表
+    
+    Returns:
+        正则表达式字符串
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+    
+    def to_pattern(node):
+        alternatives = [re.escape(char) + to_pattern(child)
+                        for char, child in sorted(node.items()) if char]
+        if not alternatives:
+            return ""
+        if len(alternatives) == 1:
+            pattern = alternatives[0]
+        else:
+            pattern = "(?:" + "|".join(alternatives) + ")"
+        if "" in node:
+            pattern = "(?:" + pattern + ")?"
+        return pattern
+    
+    return to_pattern(trie)
+
+def compile_rules(names):
+    """
+    将所有规则编译为一个正则表达式
+    
+    Args:
+        names: 姓名名单
+    
+    Returns:
+        (编译后的正则, {分组名: (显示名称, 保留开头, 保留结尾)})
+    """
+    groups = []
+    settings = {}
+    for group, (label, pattern, keep_head, keep_tail) in RULES.items():
+        groups.append(f"(?P<{group}>{pattern})")
+        settings[group] = (label, keep_head, keep_tail)
+    if names:
+        group, label, keep_head, keep_tail = NAME_RULE
+        groups.append(f"(?P<{group}>{build_trie_pattern(names)})")
+        settings[group] = (label, keep_head, keep_tail)
+    return re.compile("|".join(groups)), settings
+
+def nearest_paragraph(elem):
+    """返回元素所属的最近一层段落"""
+    parent = elem.getparent()
+    while parent is not None and parent.tag != f"{{{W_NS}}}p":
+        parent = parent.getparent()
+    return parent
+
+def mask_text(text, keep_head, keep_tail):
+    """
+    对匹配到的文本生成等长的掩码，保留开头和结尾的若干字符以及分隔符
+    
+    Args:
+        text: 匹配到的文本
+        keep_head: 保留开头的字符数
+        keep_tail: 保留结尾的字符数
+    
+    Returns:
+        掩码后的文本
+    """
+    # 文本太短时至少遮住一半
+    if keep_head + keep_tail >= len(text):
+        keep_head = min(keep_head, len(text) // 2)
+        keep_tail = 0
+    chars = list(text)
+    for index in range(keep_head, len(chars) - keep_tail):
+        if chars[index] not in SEPARATORS:
+            chars[index] = mask_char
+    return "".join(chars)
+
+def redact_text(text, pattern, settings):
+    """
+    对一段文本按规则脱敏
+    
+    Args:
+        text: 原文本
+        pattern: 编译后的正则
+        settings: 各分组的设置
+    
+    Returns:
+        (脱敏后的文本, [(类型, 位置, 脱敏后文本), ...])
+    """
+    matches = list(pattern.finditer(text))
+    if not matches:
+        return text, []
+    
+    # 逐字符掩码，长度不变
+    chars = list(text)
+    found = []
+    for match in matches:
+        label, keep_head, keep_tail = settings[match.lastgroup]
+        masked = mask_text(match.group(), keep_head, keep_tail)
+        chars[match.start():match.end()] = masked
+        found.append((label, match.start(), masked))
+    return "".join(chars), found
+
+def mask_person(value):
+    """作者类字段整体按姓名掩码"""
+    _, _, keep_head, keep_tail = NAME_RULE
+    return mask_text(value, keep_head, keep_tail)
+
+def prefixed_name(name, root):
+    """返回带前缀的名称（如 w:author），用于脱敏记录"""
+    qname = ET.QName(name)
+    for prefix, uri in root.nsmap.items():
+        if uri == qname.namespace and prefix:
+            return f"{prefix}:{qname.localname}"
+    return qname.localname
+
+def redact_attributes(root, part_name, pattern, settings, audit):
+    """
+    对部件中的域代码、作者等属性脱敏
+    
+    Returns:
+        脱敏处数
+    """
+    count = 0
+    for elem in root.iter():
+        if not isinstance(elem.tag, str):
+            continue
+        for attr, value in elem.attrib.items():
+            location = "@" + prefixed_name(attr, root)
+            if attr in PERSON_ATTRIBUTES and value:
+                masked = mask_person(value)
+                if masked != value:
+                    elem.set(attr, masked)
+                    count += 1
+                    audit.append([part_name, location, PERSON_LABEL, 0, len(masked), masked])
+            elif attr in TEXT_ATTRIBUTES:
+                new_value, found = redact_text(value, pattern, settings)
+                if found:
+                    elem.set(attr, new_value)
+                    count += len(found)
+                    audit.extend([part_name, location, label, start, len(masked), masked]
+                                 for label, start, masked in found)
+    return count
+
+def redact_part(root, part_name, pattern, settings, audit):
+    """
+    对一个部件中的所有段落脱敏
+    
+    可见文字和域代码分别拼接匹配，互不相连
+    
+    Args:
+        root: 部件根元素
+        part_name: 部件路径
+        pattern: 编译后的正则
+        settings: 各分组的设置
+        audit: 脱敏记录列表
+    
+    Returns:
+        脱敏处数
+    """
+    p_tag = f"{{{W_NS}}}p"
+    count = 0
+    
+    for paragraph_index, p in enumerate(root.iter(p_tag), 1):
+        for text_tags in TEXT_GROUPS:
+            texts = [t for t in p.iter(*text_tags) if t.text and nearest_paragraph(t) is p]
+            if not texts:
+                continue
+            full_text = "".join(t.text for t in texts)
+            new_text, found = redact_text(full_text, pattern, settings)
+            if not found:
+                continue
+            count += len(found)
+            audit.extend([part_name, paragraph_index, label, start, len(masked), masked]
+                         for label, start, masked in found)
+            
+            # 长度不变，因此可以直接按位置写回各个文本元素
+            position = 0
+            for t in texts:
+                length = len(t.text)
+                if new_text[position:position + length] != t.text:
+                    t.text = new_text[position:position + length]
+                position += length
+    
+    return count + redact_attributes(root, part_name, pattern, settings, audit)
+
+def redact_relationships(root, part_name, pattern, settings, audit):
+    """
+    对关系部件中的外部链接地址脱敏（如 mailto: 邮箱）
+    
+    地址先做URL解码再匹配，以免遗漏 %40 这样转义过的字符
+    
+    Returns:
+        脱敏处数
+    """
+    count = 0
+    for rel in root:
+        target = rel.get("Target")
+        if rel.get("TargetMode") != "External" or not target:
+            continue
+        new_target, found = redact_text(unquote(target), pattern, settings)
+        if not found:
+            continue
+        rel.set("Target", quote(new_target, safe=URL_SAFE))
+        count += len(found)
+        audit.extend([part_name, rel.get("Id"), label, start, len(masked), masked]
+                     for label, start, masked in found)
+    return count
+
+def redact_properties(root, part_name, pattern, settings, audit):
+    """
+    对文档属性脱敏：作者、最后修改者等整体掩码，其余文字按规则匹配
+    
+    Returns:
+        脱敏处数
+    """
+    count = 0
+    for elem in root.iter():
+        if not isinstance(elem.tag, str) or not elem.text:
+            continue
+        location = prefixed_name(elem.tag, root)
+        if elem.tag in PERSON_ELEMENTS:
+            masked = mask_person(elem.text)
+            if masked != elem.text:
+                elem.text = masked
+                count += 1
+                audit.append([part_name, location, PERSON_LABEL, 0, len(masked), masked])
+            continue
+        new_text, found = redact_text(elem.text, pattern, settings)
+        if found:
+            elem.text = new_text
+            count += len(found)
+            audit.extend([part_name, location, label, start, len(masked), masked]
+                         for label, start, masked in found)
+    return count
+
+def find_part_handler(part_name):
+    """返回部件对应的脱敏函数，不需要处理的部件返回None"""
+    if PART_PATTERN.match(part_name):
+        return redact_part
+    if RELS_PATTERN.match(part_name):
+        return redact_relationships
+    if PROPERTIES_PATTERN.match(part_name):
+        return redact_properties
+    return None
+
+def check_unhandled_part(root, pattern):
+    """检查未处理的部件中是否含有疑似敏感信息，返回匹配到的类型"""
+    labels = set()
+    for text in root.itertext():
+        for match in pattern.finditer(text):
+            labels.add(match.lastgroup)
+    return labels
+
+# 子进程中编译好的规则（每个进程初始化一次）
+_pattern = None
+_settings = None
+
+def init_worker(names):
+    """子进程初始化：编译脱敏规则"""
+    global _pattern, _settings
+    _pattern, _settings = compile_rules(names)
+
+def redact_document(doc_path):
+    """
+    对单个Word文档脱敏，并输出脱敏记录（在子进程中运行）
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        (输出文件路径, 脱敏处数, 未处理但含疑似敏感信息的部件列表, 错误信息)
+    """
+    file_name, file_ext = os.path.splitext(doc_path)
+    output_file = f"{file_name}（已修改）{file_ext}"
+    audit_file = f"{file_name}_脱敏记录.csv"
+    
+    try:
+        audit = []
+        replacements = {}
+        unhandled = []
+        with zipfile.ZipFile(doc_path) as zf:
+            for part_name in zf.namelist():
+                handler = find_part_handler(part_name)
+                if handler is None:
+                    if CHECK_PATTERN.search(part_name):
+                        labels = check_unhandled_part(ET.fromstring(zf.read(part_name)), _pattern)
+                        if labels:
+                            unhandled.append(f"{part_name}（{', '.join(_settings[group][0] for group in sorted(labels))}）")
+                    continue
+                root = ET.fromstring(zf.read(part_name))
+                if handler(root, part_name, _pattern, _settings, audit):
+                    replacements[part_name] = ET.tostring(root, xml_declaration=True,
+                                                          encoding="UTF-8", standalone=True)
+            
+            # 重新打包，只替换被修改的部件
+            with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zout:
+                for item in zf.infolist():
+                    data = replacements.get(item.filename)
+                    if data is None:
+                        data = zf.read(item.filename)
+                    zout.writestr(item, data)
+        
+        with open(audit_file, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            # 位置为段落序号、属性名（如 @w:author）、元素名或关系ID
+            writer.writerow(["部件", "位置", "类型", "文本内位置", "长度", "脱敏后文本"])
+            writer.writerows(audit)
+        
+        return output_file, len(audit), unhandled, ""
+    except Exception as e:
+        return output_file, 0, [], str(e)
+
+def find_documents(path):
+    """查找需要处理的docx文件"""
+    if os.path.isfile(path):
+        return [path]
+    documents = []
+    for name in sorted(os.listdir(path)):
+        if (name.lower().endswith(".docx") and not name.startswith("~$")
+                and "（已修改）" not in name):
+            documents.append(os.path.join(path, name))
+    return documents
+
+def redact_sensitive(path):
+    """
+    对文件或文件夹中的Word文档脱敏
+    
+    Args:
+        path: 文件或文件夹路径
+    
+    Returns:
+        成功处理的文件数
+    """
+    # 检查文件是否存在
+    if not os.path.exists(path):
+        print(f"错误: 文件 '{path}' 不存在!")
+        return 0
+    
+    names = load_names()
+    print(f"脱敏规则: {', '.join(label for label, *_ in RULES.values())}"
+          + (f"，姓名名单 {len(names)} 个" if names else ""))
+    
+    documents = find_documents(path)
+    if not documents:
+        print(f"'{path}' 中没有找到docx文件")
+        return 0
+    
+    success = 0
+    total = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                             initargs=(names,)) as executor:
+        futures = [executor.submit(redact_document, doc_path) for doc_path in documents]
+        for doc_path, future in zip(documents, futures):
+            output_file, count, unhandled, error = future.result()
+            if error:
+                print(f"  - 警告: 无法处理 {doc_path}: {error}")
+                continue
+            success += 1
+            total += count
+            print(f"  - {doc_path}: {count} 处脱敏，已保存为 {output_file}")
+            if unhandled:
+                print(f"    警告: 以下部件未脱敏，仍含有疑似敏感信息，请人工检查: {'；'.join(unhandled)}")
+    
+    print(f"脱敏完成: {success} 个文件，共 {total} 处")
+    return success
+
+def main():
+    # 执行脱敏
+    redact_sensitive(input_file)
+
+if __name__ == "__main__":
+    main()
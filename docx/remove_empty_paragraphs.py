@@ -7,10 +7,34 @@
 
 import os
 from docx import Document
+from docx.oxml.ns import qn
 
 # 文件读取部分，便于修改需读取文件名
 input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
 
+# 原地模式：直接在原文档上删除多余的空段落，保留图片、分节符、页眉页脚和表格位置
+# 设为False则使用旧的重建文档方式
+in_place_mode = True
+
+# 含有以下元素的段落即使没有文字也视为非空，必须保留
+# （分节符、图片、嵌入对象、脚注尾注引用、批注、域、符号、公式）
+M_NS = "http://schemas.openxmlformats.org/officeDocument/2006/math"
+KEEP_TAGS = {qn("w:sectPr"), qn("w:drawing"), qn("w:pict"), qn("w:object"),
+             qn("w:footnoteReference"), qn("w:endnoteReference"),
+             qn("w:commentRangeStart"), qn("w:commentRangeEnd"), qn("w:commentReference"),
+             qn("w:fldChar"), qn("w:fldSimple"), qn("w:sym"),
+             f"{{{M_NS}}}oMath", f"{{{M_NS}}}oMathPara"}
+
+# Word自动插入的书签（记录上次编辑位置），不作为保留段落的理由
+IGNORED_BOOKMARKS = {"_GoBack"}
+
+# 零宽度的范围标记，位于段落之间时不打断连续空段落的统计
+RANGE_MARKER_TAGS = {qn("w:bookmarkStart"), qn("w:bookmarkEnd"),
+                     qn("w:commentRangeStart"), qn("w:commentRangeEnd"),
+                     qn("w:moveFromRangeStart"), qn("w:moveFromRangeEnd"),
+                     qn("w:moveToRangeStart"), qn("w:moveToRangeEnd"),
+                     qn("w:permStart"), qn("w:permEnd"), qn("w:proofErr")}
+
 def is_paragraph_empty(paragraph):
     """
     判断段落是否为空
@@ -24,6 +48,107 @@ def is_paragraph_empty(paragraph):
     # 检查段落文本是否为空或只包含空白字符
     return not paragraph.text.strip()
 
+def is_element_empty(p):
+    """
+    判断段落XML元素是否为可删除的空段落
+    
+    含分节符、图片、嵌入对象、分页符、书签（交叉引用和目录的目标）、
+    脚注尾注引用、批注、域、符号或公式的段落不视为空段落
+    
+    Args:
+        p: w:p元素
+    
+    Returns:
+        布尔值，表示段落是否为空
+    """
+    ignored_bookmark_ids = set()
+    for elem in p.iter():
+        tag = elem.tag
+        if tag == qn("w:bookmarkStart"):
+            if elem.get(qn("w:name")) not in IGNORED_BOOKMARKS:
+                return False
+            ignored_bookmark_ids.add(elem.get(qn("w:id")))
+        elif tag == qn("w:bookmarkEnd"):
+            # 起点在其他段落的书签终点同样需要保留
+            if elem.get(qn("w:id")) not in ignored_bookmark_ids:
+                return False
+        elif tag == qn("w:t"):
+            if elem.text and elem.text.strip():
+                return False
+        elif tag in KEEP_TAGS:
+            return False
+        elif tag == qn("w:br") and elem.get(qn("w:type")) == "page":
+            return False
+        elif tag == qn("w:pageBreakBefore") and elem.get(qn("w:val")) not in ("0", "false"):
+            return False
+    return True
+
+def collapse_empty_runs(container):
+    """
+    单次遍历容器的子元素，将连续的空段落只保留第一个
+    
+    表格单元格中的段落按同样规则处理
+    
+    Args:
+        container: w:body或w:tc元素
+    
+    Returns:
+        移除的段落数量
+    """
+    removed = 0
+    previous_empty = False
+    
+    for child in list(container):
+        if child.tag == qn("w:p"):
+            if is_element_empty(child):
+                if previous_empty:
+                    container.remove(child)
+                    removed += 1
+                    continue
+                previous_empty = True
+            else:
+                previous_empty = False
+        elif child.tag == qn("w:tbl"):
+            for tr in child.iterchildren(qn("w:tr")):
+                for tc in tr.iterchildren(qn("w:tc")):
+                    removed += collapse_empty_runs(tc)
+            previous_empty = False
+        else:
+            # 书签、批注范围等零宽度标记不打断连续空段落的统计，
+            # sdt等含有内容的元素则打断
+            if child.tag not in RANGE_MARKER_TAGS:
+                previous_empty = False
+    
+    return removed
+
+def remove_empty_paragraphs_in_place(doc_path):
+    """
+    原地清除Word文档中的多个连续空段落，保留一个空段落
+    
+    直接在原文档的body上操作，不重建文档，因此图片、分节符、页眉页脚、
+    表格位置等内容都会保留
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        Document对象
+    """
+    print(f"正在处理文件: {doc_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(doc_path):
+        print(f"错误: 文件 '{doc_path}' 不存在!")
+        return None
+    
+    # 打开文档
+    doc = Document(doc_path)
+    
+    removed_count = collapse_empty_runs(doc.element.body)
+    
+    print(f"处理完成，共移除了 {removed_count} 个多余的空段落")
+    return doc
+
 def remove_empty_paragraphs(doc_path):
     """
     清除Word文档中的多个连续空段落，保留一个空段落
@@ -130,7 +255,10 @@ def main():
     output_file = f"{file_name}（已修改）{file_ext}"
     
     # 执行空段落清除
-    doc = remove_empty_paragraphs(input_file)
+    if in_place_mode:
+        doc = remove_empty_paragraphs_in_place(input_file)
+    else:
+        doc = remove_empty_paragraphs(input_file)
     
     if doc:
         # 保存修改后的文档
@@ -15,6 +15,12 @@ from lxml import etree as ET
 # 文件读取部分，便于修改需读取文件名
 input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
 
+# 投影模式：True 不修改文档，只输出“接受所有修订”和“拒绝所有修订（原始）”两份纯文本
+projection_mode = False
+
+# 投影模式下读取的部件（按顺序输出）
+PROJECTION_PART_PATTERN = re.compile(r"^word/(document|header\d*|footer\d*|footnotes|endnotes)\.xml$")
+
 def remove_revisions(doc_path, accept_all=True):
     """
     移除Word文档中的所有修订内容
@@ -452,7 +458,164 @@ def remove_revisions(doc_path, accept_all=True):
         except:
             print(f"警告: 无法删除临时目录 {temp_dir}")
 
+def project_part(f):
+    """
+    流式读取一个部件，同时生成接受修订后和原始（拒绝修订）的文本
+    
+    - w:ins/w:moveTo中的内容只出现在接受视图中，w:del/w:moveFrom中的内容只出现在原始视图中
+    - pPr/rPr中的w:del/w:ins表示段落标记被删除/插入，对应视图中该段与下一段合并
+    - trPr中的w:del/w:ins表示整行被删除/插入，对应视图中跳过整行
+    - mc:Fallback是文本框等内容的兼容副本，跳过以免重复
+    - w:tab/w:br等只在run中才是文字，pPr/tabs中的w:tab是制表位定义
+    
+    Args:
+        f: 部件文件对象
+    
+    Returns:
+        (接受修订后的文本, 原始文本)
+    """
+    w_ns = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+    fallback_tag = "{http://schemas.openxmlformats.org/markup-compatibility/2006}Fallback"
+    inserted_tags = {w_ns + "ins", w_ns + "moveTo"}
+    deleted_tags = {w_ns + "del", w_ns + "moveFrom"}
+    text_tags = {w_ns + "t", w_ns + "delText"}
+    special_text = {w_ns + "tab": "\t", w_ns + "br": "\n", w_ns + "cr": "\n", w_ns + "noBreakHyphen": "-"}
+    tags = ([w_ns + "p", w_ns + "tr", fallback_tag] + list(inserted_tags) + list(deleted_tags)
+            + list(text_tags) + list(special_text))
+    
+    accepted, original = [], []
+    # 当前所在的插入/删除内容层数，被隐藏的表格行层数，mc:Fallback层数
+    inserted = deleted = 0
+    hidden_rows = {"accepted": 0, "original": 0}
+    row_stack = []
+    fallback = 0
+    # 段落栈：[接受视图文本, 原始视图文本, 段落标记被删除, 段落标记被插入]
+    paragraphs = []
+    
+    for event, elem in ET.iterparse(f, events=("start", "end"), tag=tags):
+        tag = elem.tag
+        parent = elem.getparent()
+        
+        if tag == fallback_tag:
+            fallback += 1 if event == "start" else -1
+            continue
+        
+        if tag in inserted_tags or tag in deleted_tags:
+            parent_name = parent.tag.rsplit("}", 1)[-1] if parent is not None else ""
+            if not parent_name.endswith("Pr"):
+                # 内容容器
+                step = 1 if event == "start" else -1
+                if tag in inserted_tags:
+                    inserted += step
+                else:
+                    deleted += step
+            elif event == "start" and parent_name == "rPr" and paragraphs \
+                    and parent.getparent() is not None and parent.getparent().tag == w_ns + "pPr":
+                # 段落标记的修订
+                paragraphs[-1][2 if tag in deleted_tags else 3] = True
+            elif event == "start" and parent_name == "trPr" and row_stack:
+                # 表格行的修订
+                view = "accepted" if tag in deleted_tags else "original"
+                if view not in row_stack[-1]:
+                    row_stack[-1].add(view)
+                    hidden_rows[view] += 1
+            continue
+        
+        if tag == w_ns + "tr":
+            if event == "start":
+                row_stack.append(set())
+            else:
+                for view in row_stack.pop():
+                    hidden_rows[view] -= 1
+            continue
+        
+        if tag == w_ns + "p":
+            if event == "start":
+                paragraphs.append([[], [], False, False])
+                continue
+            accepted_pieces, original_pieces, mark_deleted, mark_inserted = paragraphs.pop()
+            if not fallback:
+                if not hidden_rows["accepted"]:
+                    accepted.extend(accepted_pieces)
+                    if not mark_deleted:
+                        accepted.append("\n")
+                if not hidden_rows["original"]:
+                    original.extend(original_pieces)
+                    if not mark_inserted:
+                        original.append("\n")
+            # 顶层段落处理完后释放内存
+            if not paragraphs:
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+            continue
+        
+        if event == "start" or fallback or not paragraphs:
+            continue
+        # 制表位定义（pPr/tabs/tab）等同名元素不是文字，只取run中的
+        if tag in special_text and (parent is None or parent.tag != w_ns + "r"):
+            continue
+        
+        text = elem.text or "" if tag in text_tags else special_text[tag]
+        if not deleted:
+            paragraphs[-1][0].append(text)
+        if not inserted:
+            paragraphs[-1][1].append(text)
+    
+    return "".join(accepted), "".join(original)
+
+def project_text_views(doc_path):
+    """
+    不修改文档，只读取一次各部件，输出接受修订后和原始两份纯文本
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        (接受修订后文本文件路径, 原始文本文件路径)
+    """
+    print(f"正在处理文件: {doc_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(doc_path):
+        print(f"错误: 文件 '{doc_path}' 不存在!")
+        return None
+    
+    accepted_parts, original_parts = [], []
+    with zipfile.ZipFile(doc_path) as zf:
+        part_names = [name for name in zf.namelist() if PROJECTION_PART_PATTERN.match(name)]
+        # 正文在前，其他部件按名称排序
+        part_names.sort(key=lambda name: (name != "word/document.xml", name))
+        for part_name in part_names:
+            with zf.open(part_name) as f:
+                accepted_text, original_text = project_part(f)
+            if accepted_text.strip():
+                accepted_parts.append(accepted_text)
+            if original_text.strip():
+                original_parts.append(original_text)
+    
+    file_name = os.path.splitext(doc_path)[0]
+    accepted_file = f"{file_name}_接受修订.txt"
+    original_file = f"{file_name}_原始.txt"
+    with open(accepted_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(accepted_parts))
+    with open(original_file, "w", encoding="utf-8") as f:
+        f.write("\n".join(original_parts))
+    
+    accepted_length = sum(len(text) for text in accepted_parts)
+    original_length = sum(len(text) for text in original_parts)
+    print(f"接受修订后 {accepted_length} 个字符，原始 {original_length} 个字符")
+    return accepted_file, original_file
+
 def main():
+    if projection_mode:
+        # 只输出两份纯文本，不修改文档
+        result = project_text_views(input_file)
+        if result:
+            print(f"接受修订后的文本已保存为: {result[0]}")
+            print(f"原始文本已保存为: {result[1]}")
+        return
+    
     # 构建输出文件名
     file_name, file_ext = os.path.splitext(input_file)
     output_file = f"{file_name}（已修改）{file_ext}"
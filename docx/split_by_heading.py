@@ -0,0 +1,548 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+按标题将Word文档拆分为多个独立文档
+
+单次流式读取正文，在一级标题（或指定大纲级别）处切分，每一部分写成一个独立的docx，
+只保留该部分引用到的样式、编号、图片、脚注、尾注、批注和关系。每完成一部分立即写出，内存占用保持平稳
+"""
+
+import os
+import re
+import copy
+import zipfile
+import posixpath
+from collections import deque
+from lxml import etree as ET
+
+# 文件读取部分，便于修改需读取文件名
+input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
+
+# 拆分的大纲级别：0 表示在“标题 1”处拆分，1 表示在“标题 1”和“标题 2”处拆分，依此类推
+split_outline_level = 0
+
+# 输出文件夹
+output_folder = f"{os.path.splitext(input_file)[0]}_拆分"
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+W14_NS = "http://schemas.microsoft.com/office/word/2010/wordml"
+W15_NS = "http://schemas.microsoft.com/office/word/2012/wordml"
+W16CID_NS = "http://schemas.microsoft.com/office/word/2016/wordml/cid"
+W16CEX_NS = "http://schemas.microsoft.com/office/word/2018/wordml/cex"
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS = "word/_rels/document.xml.rels"
+
+# 只有被正文引用时才保留的关系类型，其余（样式、设置、主题、字体等）始终保留
+CONTENT_REL_TYPES = {"image", "hyperlink", "header", "footer", "oleObject", "chart", "package",
+                     "diagramData", "diagramLayout", "diagramQuickStyle", "diagramColors",
+                     "video", "audio", "media"}
+
+# 引用样式的元素
+STYLE_REF_TAGS = {f"{{{W_NS}}}{name}" for name in
+                  ("pStyle", "rStyle", "tblStyle", "numStyleLink", "styleLink")}
+
+# 按正文引用裁剪条目的部件：关系类型 -> (条目标签, 正文中引用条目的标签)
+NOTE_PARTS = {
+    "footnotes": (f"{{{W_NS}}}footnote", {f"{{{W_NS}}}footnoteReference"}),
+    "endnotes": (f"{{{W_NS}}}endnote", {f"{{{W_NS}}}endnoteReference"}),
+    "comments": (f"{{{W_NS}}}comment", {f"{{{W_NS}}}commentReference", f"{{{W_NS}}}commentRangeStart",
+                                         f"{{{W_NS}}}commentRangeEnd"}),
+}
+
+# 批注的附属部件：关系类型 -> 关联批注的属性（按顺序处理，commentsIds给出commentsExtensible的durableId）
+COMMENT_LINK_PARTS = (
+    ("commentsExtended", f"{{{W15_NS}}}paraId"),
+    ("commentsIds", f"{{{W16CID_NS}}}paraId"),
+    ("commentsExtensible", f"{{{W16CEX_NS}}}durableId"),
+)
+
+def w(name):
+    """返回带w命名空间的标签名或属性名"""
+    return f"{{{W_NS}}}{name}"
+
+def rels_path(part_name):
+    """返回部件对应的关系文件路径"""
+    part_dir, part_file = posixpath.split(part_name)
+    return posixpath.join(part_dir, "_rels", part_file + ".rels")
+
+def read_rels(zf, part_name):
+    """
+    读取部件的关系
+    
+    Args:
+        zf: 打开的ZipFile对象
+        part_name: 部件路径，包根关系使用空字符串
+    
+    Returns:
+        列表 [(rId, 类型短名, 目标部件路径或None)]
+    """
+    name = "_rels/.rels" if not part_name else rels_path(part_name)
+    if name not in zf.namelist():
+        return []
+    
+    part_dir = posixpath.dirname(part_name)
+    rels = []
+    for rel in ET.fromstring(zf.read(name)).iter(f"{{{PKG_REL_NS}}}Relationship"):
+        rel_type = rel.get("Type", "").rsplit("/", 1)[-1]
+        target = None
+        if rel.get("TargetMode") != "External":
+            target = rel.get("Target", "")
+            if target.startswith("/"):
+                target = target.lstrip("/")
+            else:
+                target = posixpath.normpath(posixpath.join(part_dir, target))
+        rels.append((rel.get("Id"), rel_type, target))
+    return rels
+
+def read_final_sectpr(zf):
+    """
+    读取正文末尾的分节符（页面大小、页边距、页眉页脚引用）
+    
+    流式解析document.xml，取最后一个作为w:body直接子元素的w:sectPr，
+    不受命名空间前缀和w:sectPrChange中嵌套的旧分节符影响；已处理的正文元素随即释放
+    
+    Args:
+        zf: 打开的ZipFile对象
+    
+    Returns:
+        w:sectPr元素，找不到时返回None
+    """
+    final_sectpr = None
+    with zf.open(DOCUMENT_PART) as f:
+        for event, elem in ET.iterparse(f, events=("end",)):
+            parent = elem.getparent()
+            if parent is None or parent.tag != w("body"):
+                continue
+            if elem.tag == w("sectPr"):
+                final_sectpr = copy.deepcopy(elem)
+            elem.clear()
+            while elem.getprevious() is not None:
+                del parent[0]
+    return final_sectpr
+
+def style_outline_levels(styles_root):
+    """
+    计算每个段落样式的大纲级别（沿basedOn继承）
+    
+    Args:
+        styles_root: styles.xml根元素
+    
+    Returns:
+        字典 {样式ID: 大纲级别}，没有大纲级别的样式不在字典中
+    """
+    styles = {style.get(w("styleId")): style for style in styles_root.findall(w("style"))}
+    cache = {}
+    
+    def resolve(style_id, depth=0):
+        if style_id in cache:
+            return cache[style_id]
+        style = styles.get(style_id)
+        if style is None or depth > 50:
+            return None
+        outline = style.find(f"{w('pPr')}/{w('outlineLvl')}")
+        if outline is not None:
+            level = int(outline.get(w("val"), "9"))
+        else:
+            based_on = style.find(w("basedOn"))
+            level = resolve(based_on.get(w("val")), depth + 1) if based_on is not None else None
+        cache[style_id] = level
+        return level
+    
+    levels = {}
+    for style_id in styles:
+        level = resolve(style_id)
+        if level is not None and level < 9:
+            levels[style_id] = level
+    return levels
+
+def paragraph_outline_level(p, style_levels):
+    """返回段落的大纲级别，直接设置的outlineLvl优先于样式"""
+    ppr = p.find(w("pPr"))
+    if ppr is None:
+        return None
+    outline = ppr.find(w("outlineLvl"))
+    if outline is not None:
+        level = int(outline.get(w("val"), "9"))
+        return level if level < 9 else None
+    pstyle = ppr.find(w("pStyle"))
+    if pstyle is not None:
+        return style_levels.get(pstyle.get(w("val")))
+    return None
+
+def paragraph_text(p):
+    """返回段落的纯文本"""
+    return "".join(t.text or "" for t in p.iter(w("t")))
+
+def collect_references(elements):
+    """
+    收集一组元素引用的关系ID、样式ID和编号ID
+    
+    Args:
+        elements: 元素列表
+    
+    Returns:
+        (关系ID集合, 样式ID集合, 编号ID集合)
+    """
+    rel_ids, style_ids, num_ids = set(), set(), set()
+    for element in elements:
+        for elem in element.iter():
+            if not isinstance(elem.tag, str):
+                continue
+            for attr, value in elem.attrib.items():
+                if attr.startswith(f"{{{R_NS}}}"):
+                    rel_ids.add(value)
+            if elem.tag in STYLE_REF_TAGS:
+                style_ids.add(elem.get(w("val")))
+            elif elem.tag == w("numId"):
+                num_ids.add(elem.get(w("val")))
+    return rel_ids, style_ids, num_ids
+
+def collect_note_ids(elements):
+    """
+    收集一组元素引用的脚注、尾注和批注ID
+    
+    Args:
+        elements: 元素列表
+    
+    Returns:
+        字典 {关系类型: ID集合}
+    """
+    ids = {rel_type: set() for rel_type in NOTE_PARTS}
+    tag_types = {tag: rel_type for rel_type, (_, tags) in NOTE_PARTS.items() for tag in tags}
+    for element in elements:
+        for elem in element.iter(*tag_types):
+            ids[tag_types[elem.tag]].add(elem.get(w("id")))
+    return ids
+
+class PackageTemplate:
+    """
+    源文档中除正文外的公共信息，每个拆分部分据此只保留自己引用到的内容
+    """
+    
+    def __init__(self, zf):
+        self.zf = zf
+        self.names = zf.namelist()
+        self.document_rels = read_rels(zf, DOCUMENT_PART)
+        self.part_by_type = {rel_type: target for _, rel_type, target in self.document_rels if target}
+        
+        # 所有部件的关系图，用于计算可达部件
+        self.rels_by_part = {"": read_rels(zf, "")}
+        for name in self.names:
+            if name.endswith(".rels") and "/_rels/" in "/" + name:
+                rel_dir, rel_file = posixpath.split(name)
+                part_name = posixpath.join(posixpath.dirname(rel_dir), rel_file[:-len(".rels")])
+                if part_name and part_name != DOCUMENT_PART:
+                    self.rels_by_part[part_name] = read_rels(zf, part_name)
+        
+        self.styles_root = ET.fromstring(zf.read("word/styles.xml")) if "word/styles.xml" in self.names else None
+        self.numbering_root = (ET.fromstring(zf.read("word/numbering.xml"))
+                               if "word/numbering.xml" in self.names else None)
+        self.content_types = ET.fromstring(zf.read("[Content_Types].xml"))
+        
+        # 样式的关联关系和编号
+        self.style_related = {}
+        self.style_num_ids = {}
+        if self.styles_root is not None:
+            for style in self.styles_root.findall(w("style")):
+                style_id = style.get(w("styleId"))
+                self.style_related[style_id] = [elem.get(w("val")) for tag in ("basedOn", "next", "link")
+                                                for elem in style.findall(w(tag))]
+                self.style_num_ids[style_id] = {elem.get(w("val")) for elem in style.iter(w("numId"))}
+        
+        # 其他部件（页眉、页脚、脚注等）引用的样式和编号，在部件被保留时一并保留
+        self.part_references = {}
+        for part_name in self.names:
+            if (part_name.startswith("word/") and part_name.endswith(".xml")
+                    and part_name not in (DOCUMENT_PART, "word/styles.xml")):
+                _, style_ids, num_ids = collect_references([ET.fromstring(zf.read(part_name))])
+                self.part_references[part_name] = (style_ids, num_ids)
+    
+    def reachable_parts(self, kept_document_rels):
+        """从包根出发，计算保留下来的所有部件"""
+        reachable = {DOCUMENT_PART}
+        queue = deque(target for _, _, target in self.rels_by_part[""] if target and target != DOCUMENT_PART)
+        queue.extend(target for _, _, target in kept_document_rels if target)
+        while queue:
+            part_name = queue.popleft()
+            if part_name in reachable or part_name not in self.names:
+                continue
+            reachable.add(part_name)
+            queue.extend(target for _, _, target in self.rels_by_part.get(part_name, []) if target)
+        return reachable
+    
+    def build_document_rels(self, kept_rels):
+        """生成只包含保留关系的document.xml.rels"""
+        root = ET.fromstring(self.zf.read(DOCUMENT_RELS))
+        kept_ids = {rel_id for rel_id, _, _ in kept_rels}
+        for rel in list(root):
+            if rel.get("Id") not in kept_ids:
+                root.remove(rel)
+        return ET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    
+    def build_styles(self, style_ids):
+        """生成只包含被引用样式（及其继承/关联样式、默认样式）的styles.xml"""
+        root = self.styles_root
+        kept = set()
+        queue = deque(style_ids)
+        for style in root.findall(w("style")):
+            if style.get(w("default")) in ("1", "true", "on"):
+                queue.append(style.get(w("styleId")))
+        while queue:
+            style_id = queue.popleft()
+            if style_id in kept or style_id not in self.style_related:
+                continue
+            kept.add(style_id)
+            queue.extend(self.style_related[style_id])
+        
+        new_root = ET.Element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap)
+        for child in root:
+            if child.tag == w("style") and child.get(w("styleId")) not in kept:
+                continue
+            new_root.append(copy.deepcopy(child))
+        return ET.tostring(new_root, xml_declaration=True, encoding="UTF-8", standalone=True), kept
+    
+    def build_numbering(self, num_ids):
+        """生成只包含被引用编号的numbering.xml"""
+        root = self.numbering_root
+        kept_abstract = set()
+        for num in root.findall(w("num")):
+            if num.get(w("numId")) in num_ids:
+                abstract = num.find(w("abstractNumId"))
+                if abstract is not None:
+                    kept_abstract.add(abstract.get(w("val")))
+        
+        new_root = ET.Element(root.tag, attrib=dict(root.attrib), nsmap=root.nsmap)
+        for child in root:
+            if child.tag == w("num") and child.get(w("numId")) not in num_ids:
+                continue
+            if (child.tag == w("abstractNum") and child.get(w("abstractNumId")) not in kept_abstract
+                    and child.find(w("styleLink")) is None and child.find(w("numStyleLink")) is None):
+                continue
+            new_root.append(copy.deepcopy(child))
+        return ET.tostring(new_root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    
+    def read_part(self, rel_type):
+        """读取正文关系中某一类型的部件，返回(部件路径, 根元素)，不存在时返回(None, None)"""
+        part_name = self.part_by_type.get(rel_type)
+        if part_name is None or part_name not in self.names:
+            return None, None
+        return part_name, ET.fromstring(self.zf.read(part_name))
+    
+    def build_notes(self, elements):
+        """
+        生成只包含该部分引用到的脚注、尾注和批注的部件
+        
+        分隔符等特殊脚注（w:type不为normal）始终保留；脚注尾注中引用的批注一并保留，
+        批注的附属部件（commentsExtended等）按批注段落的paraId同步裁剪
+        
+        Args:
+            elements: 该部分的正文元素列表
+        
+        Returns:
+            字典 {部件路径: 裁剪后的根元素}
+        """
+        ids = collect_note_ids(elements)
+        pruned = {}
+        for rel_type, (item_tag, _) in NOTE_PARTS.items():
+            part_name, root = self.read_part(rel_type)
+            if root is None:
+                continue
+            for item in root.findall(item_tag):
+                if item.get(w("type"), "normal") == "normal" and item.get(w("id")) not in ids[rel_type]:
+                    root.remove(item)
+            if rel_type != "comments":
+                ids["comments"] |= collect_note_ids([root])["comments"]
+            pruned[part_name] = root
+        
+        comments_name = self.part_by_type.get("comments")
+        if comments_name not in pruned:
+            return pruned
+        
+        para_ids = {p.get(f"{{{W14_NS}}}paraId") for p in pruned[comments_name].iter(w("p"))}
+        durable_ids = set()
+        for rel_type, key_attr in COMMENT_LINK_PARTS:
+            part_name, root = self.read_part(rel_type)
+            if root is None:
+                continue
+            kept_keys = durable_ids if rel_type == "commentsExtensible" else para_ids
+            for item in list(root):
+                key = item.get(key_attr) if isinstance(item.tag, str) else None
+                if key is None:
+                    continue
+                if key not in kept_keys:
+                    root.remove(item)
+                elif rel_type == "commentsIds":
+                    durable_ids.add(item.get(f"{{{W16CID_NS}}}durableId"))
+            pruned[part_name] = root
+        return pruned
+    
+    def build_content_types(self, kept_names):
+        """生成去掉已删除部件的[Content_Types].xml"""
+        root = copy.deepcopy(self.content_types)
+        for override in root.findall(f"{{{CT_NS}}}Override"):
+            if override.get("PartName", "").lstrip("/") not in kept_names:
+                root.remove(override)
+        return ET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+    
+    def write_chunk(self, output_path, root_shell, elements, final_sectpr):
+        """
+        将一部分正文写成独立的docx
+        
+        Args:
+            output_path: 输出文件路径
+            root_shell: 源文档根元素（用于复制命名空间和属性）
+            elements: 该部分的正文元素列表
+            final_sectpr: 正文末尾的分节符
+        
+        Returns:
+            (保留的图片数, 保留的样式数)
+        """
+        # 1. 组装document.xml
+        doc_root = ET.Element(root_shell.tag, attrib=dict(root_shell.attrib), nsmap=root_shell.nsmap)
+        body = ET.SubElement(doc_root, w("body"))
+        body.extend(elements)
+        if final_sectpr is not None:
+            body.append(copy.deepcopy(final_sectpr))
+        document_xml = ET.tostring(doc_root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        
+        # 2. 只保留被引用的内容类关系
+        rel_ids, style_ids, num_ids = collect_references([body])
+        kept_rels = [rel for rel in self.document_rels
+                     if rel[0] in rel_ids or rel[1] not in CONTENT_REL_TYPES]
+        reachable = self.reachable_parts(kept_rels)
+        
+        # 3. 脚注、尾注和批注只保留该部分引用到的条目
+        pruned_notes = self.build_notes([body])
+        
+        # 4. 保留部件（页眉、页脚、裁剪后的脚注等）中引用的样式和编号
+        for part_name in reachable:
+            if part_name in pruned_notes:
+                _, part_styles, part_nums = collect_references([pruned_notes[part_name]])
+            else:
+                part_styles, part_nums = self.part_references.get(part_name, (set(), set()))
+            if part_name != "word/numbering.xml":
+                style_ids |= part_styles
+            num_ids |= part_nums
+        
+        replacements = {DOCUMENT_PART: document_xml, DOCUMENT_RELS: self.build_document_rels(kept_rels)}
+        for part_name, root in pruned_notes.items():
+            replacements[part_name] = ET.tostring(root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        kept_styles = set()
+        if self.styles_root is not None:
+            replacements["word/styles.xml"], kept_styles = self.build_styles(style_ids)
+        if self.numbering_root is not None:
+            for style_id in kept_styles:
+                num_ids |= self.style_num_ids.get(style_id, set())
+            replacements["word/numbering.xml"] = self.build_numbering(num_ids)
+        
+        # 5. 保留可达部件及其关系文件
+        kept_names = set(reachable)
+        kept_names.update(rels_path(name) for name in reachable)
+        kept_names.update(("[Content_Types].xml", "_rels/.rels"))
+        replacements["[Content_Types].xml"] = self.build_content_types(kept_names)
+        
+        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in self.zf.infolist():
+                if item.filename not in kept_names:
+                    continue
+                data = replacements.get(item.filename)
+                if data is None:
+                    data = self.zf.read(item.filename)
+                # writestr会改写ZipInfo中的偏移量，源文件还要继续读取，因此使用副本
+                zout.writestr(copy.copy(item), data)
+        
+        media_count = sum(1 for name in kept_names if name.startswith("word/media/") and name in self.names)
+        return media_count, len(kept_styles)
+
+def safe_file_name(text, max_length=40):
+    """将标题文字转换为可用的文件名"""
+    text = re.sub(r'[\\/:*?"<>|\r\n\t]', "", text).strip()
+    return text[:max_length] or "无标题"
+
+def split_by_heading(doc_path):
+    """
+    按标题将Word文档拆分为多个独立文档
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        生成的文件数量
+    """
+    print(f"正在处理文件: {doc_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(doc_path):
+        print(f"错误: 文件 '{doc_path}' 不存在!")
+        return 0
+    
+    if not os.path.exists(output_folder):
+        os.makedirs(output_folder)
+        print(f"创建输出文件夹: {output_folder}")
+    
+    with zipfile.ZipFile(doc_path) as zf:
+        template = PackageTemplate(zf)
+        style_levels = style_outline_levels(template.styles_root) if template.styles_root is not None else {}
+        final_sectpr = read_final_sectpr(zf)
+        print(f"在大纲级别 {split_outline_level + 1} 及以上的标题处拆分")
+        
+        chunk_count = 0
+        chunk = []
+        chunk_title = "前言"
+        root_shell = None
+        body = None
+        
+        def flush():
+            nonlocal chunk_count, chunk
+            if not chunk:
+                return
+            chunk_count += 1
+            output_path = os.path.join(output_folder, f"{chunk_count:03d}_{safe_file_name(chunk_title)}.docx")
+            media_count, style_count = template.write_chunk(output_path, root_shell, chunk, final_sectpr)
+            print(f"  - 已写出: {output_path}（{len(chunk)} 个段落/表格，{media_count} 张图片，{style_count} 个样式）")
+            chunk = []
+        
+        with zf.open(DOCUMENT_PART) as f:
+            for event, elem in ET.iterparse(f, events=("start", "end")):
+                if event == "start":
+                    if root_shell is None:
+                        root_shell = elem
+                    elif elem.tag == w("body") and body is None:
+                        body = elem
+                    continue
+                
+                if body is None or elem.getparent() is not body:
+                    continue
+                
+                # 正文末尾的分节符已单独读取
+                if elem.tag == w("sectPr"):
+                    body.remove(elem)
+                    continue
+                
+                if elem.tag == w("p"):
+                    level = paragraph_outline_level(elem, style_levels)
+                    if level is not None and level <= split_outline_level:
+                        flush()
+                        chunk_title = paragraph_text(elem)
+                
+                # 从源树中摘下已处理的元素，内存只与当前部分的大小有关
+                body.remove(elem)
+                chunk.append(elem)
+        
+        flush()
+    
+    print(f"拆分完成，共生成 {chunk_count} 个文档，保存在: {output_folder}")
+    return chunk_count
+
+def main():
+    # 执行拆分
+    split_by_heading(input_file)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+批量为Word文档加上统一的页眉（如密级标识）和页脚（如文档编号、页码）
+
+页眉、页脚部件的XML只生成一次；处理每个文档时直接在压缩包层面添加（或替换）
+页眉页脚部件、关系和内容类型，并用字节级正则修改各节sectPr中的页眉页脚引用，
+不解析正文。多个文档使用多进程并行处理，每个文档的开销基本等于复制一次压缩包
+"""
+
+import os
+import re
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from xml.sax.saxutils import escape, quoteattr
+
+# 文件读取部分，便于修改需读取的文件夹（也可以是单个文件）
+input_folder = "documents"  # 请修改为实际的文件夹名
+
+# 页眉文字
+header_text = "内部资料 注意保密"
+
+# 页脚文字，可使用 {index}（序号）和 {file_name}（文件名，不含扩展名）
+footer_text = "文档编号：DOC-{index:05d}"
+
+# 是否在页脚中加上页码
+add_page_number = True
+
+# 对齐方式：left / center / right
+header_align = "center"
+footer_align = "center"
+
+# 是否同时替换首页和偶数页的页眉页脚（False时只替换默认页眉页脚）
+replace_all_types = True
+
+# 并行进程数，None表示使用全部CPU核心
+max_workers = None
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+R_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+
+DOCUMENT_PART = "word/document.xml"
+DOCUMENT_RELS = "word/_rels/document.xml.rels"
+CONTENT_TYPES = "[Content_Types].xml"
+
+# 加入的部件：类型 -> (部件路径, 关系ID, 内容类型)
+STAMP_PARTS = {
+    "header": ("word/header_stamp.xml", "rIdStampHeader",
+               "application/vnd.openxmlformats-officedocument.wordprocessingml.header+xml"),
+    "footer": ("word/footer_stamp.xml", "rIdStampFooter",
+               "application/vnd.openxmlformats-officedocument.wordprocessingml.footer+xml"),
+}
+
+REFERENCE_TYPES = ("default", "first", "even") if replace_all_types else ("default",)
+
+def compile_part(root_tag, text_xml, align):
+    """
+    生成页眉或页脚部件的XML，返回(文字之前的字节, 文字之后的字节)
+    
+    Args:
+        root_tag: hdr 或 ftr
+        text_xml: 段落中文字之后追加的XML（如页码域）
+        align: 对齐方式
+    
+    Returns:
+        (前缀字节, 后缀字节)
+    """
+    prefix = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+              f'<w:{root_tag} xmlns:w="{W_NS}" xmlns:r="{R_NS}">'
+              f'<w:p><w:pPr><w:jc w:val="{align}"/></w:pPr>'
+              f'<w:r><w:t xml:space="preserve">')
+    suffix = f'</w:t></w:r>{text_xml}</w:p></w:{root_tag}>'
+    return prefix.encode("utf-8"), suffix.encode("utf-8")
+
+def compile_stamp():
+    """
+    编译页眉页脚，只执行一次
+    
+    Returns:
+        字典 {"header": 完整XML字节, "footer": (前缀字节, 后缀字节)}
+    """
+    header_prefix, header_suffix = compile_part("hdr", "", header_align)
+    page_xml = ""
+    if add_page_number:
+        page_xml = ('<w:r><w:t xml:space="preserve">  第 </w:t></w:r>'
+                    '<w:fldSimple w:instr=" PAGE "><w:r><w:t>1</w:t></w:r></w:fldSimple>'
+                    '<w:r><w:t xml:space="preserve"> 页</w:t></w:r>')
+    return {
+        "header": header_prefix + escape(header_text).encode("utf-8") + header_suffix,
+        "footer": compile_part("ftr", page_xml, footer_align),
+    }
+
+def namespace_prefix(xml, namespace):
+    """查找命名空间在XML中使用的前缀"""
+    match = re.search(rb'xmlns:(\w+)="' + re.escape(namespace.encode()) + rb'"', xml)
+    return match.group(1) if match else None
+
+def build_references(prefix):
+    """生成插入sectPr中的页眉页脚引用"""
+    references = []
+    for kind in ("header", "footer"):
+        _, rel_id, _ = STAMP_PARTS[kind]
+        for ref_type in REFERENCE_TYPES:
+            references.append(f'<{prefix}:{kind}Reference xmlns:r="{R_NS}" {prefix}:type="{ref_type}" '
+                              f'r:id="{rel_id}"/>')
+    return "".join(references).encode("utf-8")
+
+def patch_sections(document_xml):
+    """
+    用字节级正则修改所有sectPr中的页眉页脚引用，不解析正文
+    
+    页眉页脚引用必须是sectPr的最前面的子元素，因此在开始标签之后替换这一段即可；
+    w:sectPrChange（修订记录）中的sectPr保持不变
+    
+    Args:
+        document_xml: document.xml的字节
+    
+    Returns:
+        (修改后的字节, 修改的节数)
+    """
+    prefix = namespace_prefix(document_xml, W_NS)
+    if prefix is None:
+        raise ValueError("document.xml中没有找到WordprocessingML命名空间")
+    p = re.escape(prefix)
+    references = build_references(prefix.decode())
+    
+    pattern = re.compile(
+        rb"(<" + p + rb":sectPrChange\b.*?</" + p + rb":sectPrChange>)"
+        rb"|<" + p + rb":sectPr\b([^>]*?)/>"
+        rb"|(<" + p + rb":sectPr\b[^>]*>)((?:\s*<" + p + rb":(?:header|footer)Reference\b[^>]*/>)*)",
+        re.DOTALL)
+    type_pattern = re.compile(p + rb':type="(\w+)"')
+    count = 0
+    
+    def replace(match):
+        nonlocal count
+        if match.group(1):
+            return match.group(0)
+        count += 1
+        if match.group(3) is None:
+            # 空的<w:sectPr/>
+            return b"<" + prefix + b":sectPr" + match.group(2) + b">" + references + b"</" + prefix + b":sectPr>"
+        
+        # 保留不替换的类型（如只替换默认页眉时的首页页眉）
+        kept = []
+        for ref in re.findall(rb"<[^>]+/>", match.group(4)):
+            ref_type = type_pattern.search(ref)
+            if (ref_type.group(1) if ref_type else b"default").decode() not in REFERENCE_TYPES:
+                kept.append(ref)
+        return match.group(3) + b"".join(kept) + references
+    
+    document_xml = pattern.sub(replace, document_xml)
+    
+    if count == 0:
+        # 没有sectPr时在body末尾加上一个
+        body_end = b"</" + prefix + b":body>"
+        document_xml = document_xml.replace(
+            body_end, b"<" + prefix + b":sectPr>" + references + b"</" + prefix + b":sectPr>" + body_end, 1)
+        count = 1
+    return document_xml, count
+
+def patch_rels(rels_xml):
+    """在document.xml.rels中加入页眉页脚的关系（已存在时不重复添加）"""
+    for kind, (part_name, rel_id, _) in STAMP_PARTS.items():
+        if f'Id="{rel_id}"'.encode() in rels_xml:
+            continue
+        rel = (f'<Relationship Id="{rel_id}" Type="{R_NS}/{kind}" '
+               f'Target={quoteattr(part_name.split("/", 1)[1])}/>').encode("utf-8")
+        rels_xml = rels_xml.replace(b"</Relationships>", rel + b"</Relationships>", 1)
+    return rels_xml
+
+def patch_content_types(content_types_xml):
+    """在[Content_Types].xml中加入页眉页脚部件的内容类型（已存在时不重复添加）"""
+    for part_name, _, content_type in STAMP_PARTS.values():
+        part_attr = f'PartName="/{part_name}"'.encode()
+        if part_attr in content_types_xml:
+            continue
+        override = f'<Override {part_attr.decode()} ContentType="{content_type}"/>'.encode("utf-8")
+        content_types_xml = content_types_xml.replace(b"</Types>", override + b"</Types>", 1)
+    return content_types_xml
+
+# 子进程中编译好的页眉页脚（每个进程初始化一次）
+_stamp = None
+
+def init_worker(stamp):
+    """子进程初始化"""
+    global _stamp
+    _stamp = stamp
+
+def stamp_document(task):
+    """
+    为单个文档加上页眉页脚（在子进程中运行）
+    
+    Args:
+        task: (序号, 文件路径)
+    
+    Returns:
+        (文件路径, 修改的节数, 错误信息)
+    """
+    index, doc_path = task
+    file_name, file_ext = os.path.splitext(doc_path)
+    output_file = f"{file_name}（已修改）{file_ext}"
+    
+    try:
+        footer_prefix, footer_suffix = _stamp["footer"]
+        footer = footer_text.format(index=index, file_name=os.path.basename(file_name))
+        new_parts = {
+            STAMP_PARTS["header"][0]: _stamp["header"],
+            STAMP_PARTS["footer"][0]: footer_prefix + escape(footer).encode("utf-8") + footer_suffix,
+        }
+        
+        with zipfile.ZipFile(doc_path) as zf:
+            names = set(zf.namelist())
+            document_xml, sections = patch_sections(zf.read(DOCUMENT_PART))
+            patched = {
+                DOCUMENT_PART: document_xml,
+                DOCUMENT_RELS: patch_rels(zf.read(DOCUMENT_RELS)),
+                CONTENT_TYPES: patch_content_types(zf.read(CONTENT_TYPES)),
+            }
+            
+            with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zout:
+                for item in zf.infolist():
+                    if item.filename in new_parts:
+                        continue
+                    data = patched.get(item.filename)
+                    if data is None:
+                        data = zf.read(item.filename)
+                    zout.writestr(item, data)
+                # 新加入的部件（再次处理已加过的文档时替换原来的部件）
+                for part_name, data in new_parts.items():
+                    if part_name in names:
+                        zout.writestr(zf.getinfo(part_name), data)
+                    else:
+                        zout.writestr(part_name, data)
+        
+        return doc_path, sections, ""
+    except Exception as e:
+        return doc_path, 0, str(e)
+
+def find_documents(path):
+    """查找需要处理的docx文件"""
+    if os.path.isfile(path):
+        return [path]
+    return [os.path.join(path, name) for name in sorted(os.listdir(path))
+            if name.lower().endswith(".docx") and not name.startswith("~$") and "（已修改）" not in name]
+
+def batch_stamp(path):
+    """
+    批量为文档加上页眉页脚
+    
+    Args:
+        path: 文件夹或文件路径
+    
+    Returns:
+        成功处理的文件数
+    """
+    # 检查文件夹是否存在
+    if not os.path.exists(path):
+        print(f"错误: '{path}' 不存在!")
+        return 0
+    
+    documents = find_documents(path)
+    print(f"找到 {len(documents)} 个docx文件")
+    if not documents:
+        return 0
+    
+    stamp = compile_stamp()
+    success = 0
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker, initargs=(stamp,)) as executor:
+        results = executor.map(stamp_document, enumerate(documents, 1), chunksize=16)
+        for index, (doc_path, sections, error) in enumerate(results, 1):
+            if error:
+                print(f"  - 警告: 无法处理 {doc_path}: {error}")
+            else:
+                success += 1
+            if index % 100 == 0 or index == len(documents):
+                print(f"  - 已处理 {index}/{len(documents)} 个文件")
+    
+    print(f"批量处理完成，成功 {success} 个，失败 {len(documents) - success} 个")
+    return success
+
+def main():
+    # 执行批量加页眉页脚
+    batch_stamp(input_folder)
+
+if __name__ == "__main__":
+    main()
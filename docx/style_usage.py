@@ -0,0 +1,226 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+统计Word文档中各样式的使用次数，并可删除未使用的样式
+
+单次流式遍历所有部件（正文、页眉、页脚、脚注、尾注、批注、编号等），
+统计pStyle/rStyle/tblStyle等样式引用。删除模式下保留被引用的样式以及
+通过basedOn/next/link可达的样式，其余样式从styles.xml中删除
+"""
+
+import os
+import csv
+import zipfile
+from collections import Counter, deque
+from lxml import etree as ET
+
+# 文件读取部分，便于修改需读取文件名
+input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
+
+# 删除模式：True 删除未使用的样式并保存新文档，False 只输出使用统计
+prune_mode = False
+
+# 使用统计报告文件
+report_file = f"{os.path.splitext(input_file)[0]}_style_usage.csv"
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# 引用样式的元素
+STYLE_REF_TAGS = [f"{{{W_NS}}}{name}" for name in
+                  ("pStyle", "rStyle", "tblStyle", "numStyleLink", "styleLink")]
+
+# 样式定义部件本身不参与统计
+STYLE_PARTS = {"word/styles.xml", "word/stylesWithEffects.xml"}
+
+def count_style_references(zf):
+    """
+    流式遍历所有部件，统计每个样式ID被引用的次数
+    
+    Args:
+        zf: 打开的ZipFile对象
+    
+    Returns:
+        Counter {样式ID: 引用次数}
+    """
+    usage = Counter()
+    val_attr = f"{{{W_NS}}}val"
+    part_names = [name for name in zf.namelist()
+                  if name.startswith("word/") and name.endswith(".xml")
+                  and name.count("/") == 1 and name not in STYLE_PARTS]
+    
+    for part_name in sorted(part_names):
+        part_count = 0
+        with zf.open(part_name) as f:
+            for _, elem in ET.iterparse(f, events=("end",), tag=STYLE_REF_TAGS):
+                style_id = elem.get(val_attr)
+                if style_id:
+                    usage[style_id] += 1
+                    part_count += 1
+                elem.clear()
+        if part_count:
+            print(f"  - {part_name}: {part_count} 处样式引用")
+    
+    return usage
+
+def read_styles(styles_root):
+    """
+    读取styles.xml中的样式定义
+    
+    Args:
+        styles_root: styles.xml的根元素
+    
+    Returns:
+        字典 {样式ID: 样式信息}
+    """
+    styles = {}
+    for style in styles_root.findall(f"{{{W_NS}}}style"):
+        style_id = style.get(f"{{{W_NS}}}styleId")
+        if not style_id:
+            continue
+        
+        name_elem = style.find(f"{{{W_NS}}}name")
+        related = []
+        for tag in ("basedOn", "next", "link"):
+            elem = style.find(f"{{{W_NS}}}{tag}")
+            if elem is not None and elem.get(f"{{{W_NS}}}val"):
+                related.append(elem.get(f"{{{W_NS}}}val"))
+        
+        styles[style_id] = {
+            "element": style,
+            "name": name_elem.get(f"{{{W_NS}}}val") if name_elem is not None else style_id,
+            "type": style.get(f"{{{W_NS}}}type", "paragraph"),
+            "default": style.get(f"{{{W_NS}}}default") in ("1", "true", "on"),
+            "related": related,
+        }
+    return styles
+
+def find_kept_styles(styles, usage):
+    """
+    计算需要保留的样式：被引用的样式、默认样式，以及通过basedOn/next/link可达的样式
+    
+    Args:
+        styles: 样式定义字典
+        usage: 样式引用计数
+    
+    Returns:
+        需要保留的样式ID集合
+    """
+    queue = deque(style_id for style_id, info in styles.items()
+                  if usage.get(style_id) or info["default"])
+    kept = set(queue)
+    
+    while queue:
+        style_id = queue.popleft()
+        for related_id in styles[style_id]["related"]:
+            if related_id in styles and related_id not in kept:
+                kept.add(related_id)
+                queue.append(related_id)
+    
+    return kept
+
+def save_report(styles, usage, kept):
+    """
+    保存样式使用统计报告
+    
+    Args:
+        styles: 样式定义字典
+        usage: 样式引用计数
+        kept: 需要保留的样式ID集合
+    """
+    with open(report_file, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["样式ID", "样式名称", "类型", "引用次数", "状态"])
+        for style_id, info in sorted(styles.items(), key=lambda item: -usage.get(item[0], 0)):
+            count = usage.get(style_id, 0)
+            if count:
+                status = "使用中"
+            elif info["default"]:
+                status = "默认样式"
+            elif style_id in kept:
+                status = "被继承/关联"
+            else:
+                status = "未使用"
+            writer.writerow([style_id, info["name"], info["type"], count, status])
+    print(f"样式使用统计已保存为: {report_file}")
+
+def analyze_style_usage(doc_path):
+    """
+    统计样式使用情况，删除模式下删除未使用的样式
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        删除模式下返回输出文件路径，否则返回None
+    """
+    print(f"正在处理文件: {doc_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(doc_path):
+        print(f"错误: 文件 '{doc_path}' 不存在!")
+        return None
+    
+    with zipfile.ZipFile(doc_path) as zf:
+        if "word/styles.xml" not in zf.namelist():
+            print("文档中没有styles.xml，无需处理")
+            return None
+        
+        # 1. 统计样式引用
+        print("正在统计样式引用...")
+        usage = count_style_references(zf)
+        
+        # 2. 读取样式定义并计算需要保留的样式
+        styles_xml = zf.read("word/styles.xml")
+        styles_root = ET.fromstring(styles_xml)
+        styles = read_styles(styles_root)
+        kept = find_kept_styles(styles, usage)
+        
+        used_count = sum(1 for style_id in styles if usage.get(style_id))
+        unused = [style_id for style_id in styles if style_id not in kept]
+        print(f"共 {len(styles)} 个样式: {used_count} 个被直接使用，"
+              f"{len(kept) - used_count} 个因默认/继承/关联保留，{len(unused)} 个未使用")
+        
+        missing = [style_id for style_id in usage if style_id not in styles]
+        if missing:
+            print(f"警告: 以下样式被引用但未定义: {', '.join(missing)}")
+        
+        save_report(styles, usage, kept)
+        
+        if not prune_mode:
+            return None
+        
+        if not unused:
+            print("没有未使用的样式，无需删除")
+            return None
+        
+        # 3. 删除未使用的样式
+        for style_id in unused:
+            styles_root.remove(styles[style_id]["element"])
+        new_styles_xml = ET.tostring(styles_root, xml_declaration=True, encoding="UTF-8", standalone=True)
+        
+        # 4. 重新打包，只替换styles.xml
+        file_name, file_ext = os.path.splitext(doc_path)
+        output_file = f"{file_name}（已修改）{file_ext}"
+        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zf.infolist():
+                if item.filename == "word/styles.xml":
+                    zout.writestr(item, new_styles_xml)
+                else:
+                    zout.writestr(item, zf.read(item.filename))
+    
+    saved = len(styles_xml) - len(new_styles_xml)
+    print(f"已删除 {len(unused)} 个未使用的样式，styles.xml: "
+          f"{len(styles_xml) / 1024:.1f} KB -> {len(new_styles_xml) / 1024:.1f} KB（节省 {saved / 1024:.1f} KB）")
+    return output_file
+
+def main():
+    # 执行样式统计
+    output_file = analyze_style_usage(input_file)
+    
+    if output_file:
+        print(f"文档已保存为: {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+将Word文档中的表格导出到Excel，每个表格一个工作表
+
+流式解析document.xml，逐行处理表格（不创建python-docx的Table对象），
+将w:gridSpan（横向合并）、w:vMerge（纵向合并）和w:gridBefore（行首空列）
+转换为Excel的合并单元格，并使用openpyxl的write_only模式逐行写入
+"""
+
+import os
+import re
+import zipfile
+from lxml import etree as ET
+from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment
+from openpyxl.utils import get_column_letter
+
+# 文件读取部分，便于修改需读取文件名
+input_file = "探索知识海洋.docx"  # 请修改为实际的文件名
+
+# 是否将纯数字文本转换为数字
+convert_numbers = True
+
+# 命名空间
+W_NS = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+# 纯数字文本（不含前导零，避免编号被转换）
+NUMBER_PATTERN = re.compile(r"^-?(0|[1-9]\d*)(\.\d+)?$")
+
+# 每个字符宽度约为105缇（twip）
+TWIPS_PER_CHAR = 105
+
+def w(name):
+    """返回带w命名空间的标签名"""
+    return f"{{{W_NS}}}{name}"
+
+def int_val(elem, default):
+    """读取元素的w:val整数值"""
+    if elem is None:
+        return default
+    try:
+        return int(elem.get(w("val"), default))
+    except ValueError:
+        return default
+
+def cell_text(tc):
+    """
+    提取单元格文本，段落之间用换行分隔（包含嵌套表格中的文本）
+    
+    Args:
+        tc: w:tc元素
+    
+    Returns:
+        单元格文本
+    """
+    paragraphs = []
+    for p in tc.iter(w("p")):
+        pieces = []
+        for elem in p.iter(w("t"), w("tab"), w("br"), w("cr")):
+            # 嵌套段落中的文本由嵌套段落自己输出
+            parent = elem.getparent()
+            while parent is not None and parent.tag != w("p"):
+                parent = parent.getparent()
+            if parent is not p:
+                continue
+            if elem.tag == w("t"):
+                pieces.append(elem.text or "")
+            elif elem.tag == w("tab"):
+                pieces.append("\t")
+            else:
+                pieces.append("\n")
+        paragraphs.append("".join(pieces))
+    return "\n".join(paragraphs).strip()
+
+def to_value(text):
+    """将文本转换为写入单元格的值"""
+    if not text:
+        return None
+    if convert_numbers and NUMBER_PATTERN.match(text):
+        return float(text) if "." in text else int(text)
+    return text
+
+class TableWriter:
+    """把一个Word表格逐行写入一个工作表，并记录合并区域"""
+    
+    def __init__(self, wb, title):
+        self.wb = wb
+        self.title = title
+        self.ws = None
+        self.row_index = 0
+        self.max_columns = 0
+        self.merge_count = 0
+        # 正在进行的纵向合并 {起始列: [起始行, 结束行, 跨列数]}
+        self.open_merges = {}
+        self.wrap = Alignment(wrap_text=True, vertical="top")
+        self.center = Alignment(wrap_text=True, vertical="center", horizontal="center")
+    
+    def start(self, tbl):
+        """收到第一行时创建工作表，并按w:tblGrid设置列宽"""
+        self.ws = self.wb.create_sheet(self.title)
+        grid = tbl.find(w("tblGrid"))
+        if grid is None:
+            return
+        for index, col in enumerate(grid.findall(w("gridCol")), 1):
+            try:
+                twips = int(col.get(w("w"), 0))
+            except ValueError:
+                continue
+            if twips > 0:
+                width = min(max(twips / TWIPS_PER_CHAR, 4), 80)
+                self.ws.column_dimensions[get_column_letter(index)].width = width
+    
+    def add_merge(self, first_row, last_row, first_col, span):
+        """记录一个合并区域"""
+        if first_row == last_row and span <= 1:
+            return
+        self.ws.merged_cells.add(f"{get_column_letter(first_col)}{first_row}:"
+                                 f"{get_column_letter(first_col + span - 1)}{last_row}")
+        self.merge_count += 1
+    
+    def close_merge(self, col):
+        """结束某列上的纵向合并"""
+        first_row, last_row, span = self.open_merges.pop(col)
+        self.add_merge(first_row, last_row, col, span)
+    
+    def write_row(self, tr):
+        """
+        写入一行，处理gridBefore、gridSpan和vMerge
+        
+        Args:
+            tr: w:tr元素
+        """
+        self.row_index += 1
+        row = self.row_index
+        
+        tr_pr = tr.find(w("trPr"))
+        col = 1 + int_val(tr_pr.find(w("gridBefore")) if tr_pr is not None else None, 0)
+        values = [None] * (col - 1)
+        continued = set()
+        
+        for tc in tr.iterchildren(w("tc")):
+            tc_pr = tc.find(w("tcPr"))
+            span = 1
+            v_merge = None
+            if tc_pr is not None:
+                span = max(int_val(tc_pr.find(w("gridSpan")), 1), 1)
+                v_merge = tc_pr.find(w("vMerge"))
+            
+            # w:vMerge没有val属性或val="continue"表示接续上一行的单元格
+            if v_merge is not None and v_merge.get(w("val"), "continue") == "continue" \
+                    and col in self.open_merges:
+                self.open_merges[col][1] = row
+                continued.add(col)
+                values.extend([None] * span)
+            else:
+                if col in self.open_merges:
+                    self.close_merge(col)
+                text = cell_text(tc)
+                cell = WriteOnlyCell(self.ws, value=to_value(text))
+                if v_merge is not None:
+                    self.open_merges[col] = [row, row, span]
+                    continued.add(col)
+                    cell.alignment = self.center
+                elif span > 1:
+                    self.add_merge(row, row, col, span)
+                    cell.alignment = self.center
+                elif "\n" in text:
+                    cell.alignment = self.wrap
+                values.append(cell)
+                values.extend([None] * (span - 1))
+            col += span
+        
+        # 本行没有接续的纵向合并到此结束
+        for open_col in [c for c in self.open_merges if c not in continued]:
+            self.close_merge(open_col)
+        
+        self.max_columns = max(self.max_columns, len(values))
+        self.ws.append(values)
+    
+    def finish(self):
+        """表格结束，关闭所有未结束的合并"""
+        for open_col in list(self.open_merges):
+            self.close_merge(open_col)
+
+def tables_to_xlsx(doc_path):
+    """
+    将Word文档中的所有表格导出到Excel
+    
+    Args:
+        doc_path: Word文档路径
+    
+    Returns:
+        输出文件路径
+    """
+    print(f"正在处理文件: {doc_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(doc_path):
+        print(f"错误: 文件 '{doc_path}' 不存在!")
+        return None
+    
+    # 构建输出文件名
+    file_name = os.path.splitext(doc_path)[0]
+    output_file = f"{file_name}_表格.xlsx"
+    
+    wb = Workbook(write_only=True)
+    table_count = 0
+    depth = 0
+    writer = None
+    
+    with zipfile.ZipFile(doc_path) as zf:
+        with zf.open("word/document.xml") as f:
+            for event, elem in ET.iterparse(f, events=("start", "end"),
+                                            tag=(w("tbl"), w("tr"), w("p"))):
+                if elem.tag == w("tbl"):
+                    if event == "start":
+                        depth += 1
+                        if depth == 1:
+                            writer = TableWriter(wb, f"表格{table_count + 1}")
+                        continue
+                    
+                    depth -= 1
+                    if depth > 0:
+                        continue
+                    # 顶层表格结束
+                    if writer.ws is not None:
+                        writer.finish()
+                        table_count += 1
+                        print(f"  - {writer.title}: {writer.row_index} 行 x {writer.max_columns} 列，"
+                              f"{writer.merge_count} 个合并区域")
+                    writer = None
+                
+                elif event == "start":
+                    continue
+                
+                elif elem.tag == w("tr"):
+                    # 嵌套表格的行随所在单元格一起处理
+                    if depth != 1:
+                        continue
+                    if writer.ws is None:
+                        writer.start(elem.getparent())
+                    writer.write_row(elem)
+                
+                elif depth > 0:
+                    # 表格内的段落随所在行一起处理
+                    continue
+                
+                # 已处理完的元素从树中删除，保持内存占用平稳
+                parent = elem.getparent()
+                elem.clear()
+                if parent is not None:
+                    parent.remove(elem)
+    
+    if table_count == 0:
+        print("文档中没有找到表格")
+        return None
+    
+    wb.save(output_file)
+    print(f"共导出 {table_count} 个表格")
+    return output_file
+
+def main():
+    # 执行表格导出
+    output_file = tables_to_xlsx(input_file)
+    
+    if output_file:
+        print(f"表格已保存为: {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,827 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+分析Excel工作簿中公式之间的依赖关系：追踪引用单元格（前驱）和从属单元格（后继）、
+查找循环引用、找出没有被任何公式引用的公式
+
+不使用openpyxl加载工作簿，逐块读取每个工作表的XML，只解析公式中的引用（包括跨工作表引用、
+区域、整列/整行引用和定义的名称），图表引用的区域和所有定义的名称指向的区域
+（包括只被数据验证、打印区域使用或未被使用的名称）也算作被引用。所有公式、引用区域都用整数编号，
+依赖图以CSR数组（行指针+列索引）保存，100万个公式时内存占用在1GB以内。
+
+区域到公式的边通过每列一棵线段树连接：引用一个区域只需连到O(log n)个线段树节点，
+累计求和（B2=SUM($A$2:A2)）这样每行一个不同区域的公式也不会产生O(n²)条边
+"""
+
+import os
+import re
+import csv
+import zipfile
+import posixpath
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter, deque
+from html import unescape
+import numpy as np
+from lxml import etree as ET
+from openpyxl.formula.translate import Translator
+from openpyxl.utils import get_column_letter, column_index_from_string
+
+# 文件读取部分，便于修改需读取文件名
+input_file = "example.xlsx"  # 请修改为实际的文件名
+
+# 追踪这些单元格的所有直接和间接引用（如关键合计由哪些单元格计算得出）
+trace_precedents = [
+    "汇总!B10",
+]
+
+# 追踪直接或间接引用了这些单元格的所有公式（如修改某个输入会影响哪些公式）
+trace_dependents = [
+    # "数据!A2",
+]
+
+# 追踪的最大层数，None表示不限制
+max_trace_depth = None
+
+# 每项结果最多打印的条数（完整结果保存在报告中）
+max_printed = 20
+
+# 分析报告（CSV）
+report_file = f"{os.path.splitext(input_file)[0]}_公式依赖.csv"
+
+# 每次读取的字节数
+CHUNK_SIZE = 1024 * 1024
+
+# 命名空间
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+MAX_ROWS = 1048576
+MAX_COLUMNS = 16384
+
+# 公式中的记号，只关心引用、函数名和名称，其他字符跳过
+TOKEN_PATTERN = re.compile(r"""
+    (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A|GETTING_DATA))
+  | (?P<ref>(?P<sheet>(?:'(?:[^']|'')+'|[^\W\d][\w.]*)!)?
+            (?P<address>\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?
+                       |\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}
+                       |\$?\d+:\$?\d+)
+            (?![\w(!.]))
+  | (?P<function>[^\W\d][\w.]*(?=\s*\())
+  | (?P<name>(?:(?:'(?:[^']|'')+'|[^\W\d][\w.]*)!)?[^\W\d][\w.]*)
+  | (?P<number>\d+\.?\d*(?:[eE][+-]?\d+)?)
+""", re.VERBOSE)
+
+ADDRESS_PART_PATTERN = re.compile(r"(\$?)([A-Za-z]*)(\$?)(\d*)")
+
+# 引用目标在计算时才能确定的函数，这些公式的引用关系可能不完整
+DYNAMIC_FUNCTIONS = {"INDIRECT", "OFFSET"}
+
+FUNCTION_PREFIXES = ("_XLFN._XLWS.", "_XLFN.", "_XLWS.")
+
+def read_workbook_parts(zf):
+    """
+    读取workbook.xml和关系文件
+    
+    Args:
+        zf: 打开的ZipFile对象
+    
+    Returns:
+        (列表[(工作表名, 部件路径)], 列表[(名称, 所属工作表序号或None, 引用文字)])
+    """
+    rels = {}
+    for rel in ET.fromstring(zf.read("xl/_rels/workbook.xml.rels")).iter(f"{{{PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target", "")
+        target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+        rels[rel.get("Id")] = target
+    
+    workbook = ET.fromstring(zf.read("xl/workbook.xml"))
+    sheets = []
+    for sheet in workbook.iter(f"{{{MAIN_NS}}}sheet"):
+        part_name = rels.get(sheet.get(f"{{{REL_NS}}}id"))
+        # 图表工作表等没有单元格，但保留位置以便localSheetId对应
+        sheets.append((sheet.get("name"), part_name if part_name and "/worksheets/" in part_name else None))
+    
+    names = []
+    for defined in workbook.iter(f"{{{MAIN_NS}}}definedName"):
+        local = defined.get("localSheetId")
+        names.append((defined.get("name"), int(local) if local is not None else None, defined.text or ""))
+    return sheets, names
+
+ATTRIBUTE_PATTERNS = {}
+
+def attribute(attrs, name):
+    """从标签属性字节中读取一个属性值"""
+    if not attrs:
+        return None
+    pattern = ATTRIBUTE_PATTERNS.get(name)
+    if pattern is None:
+        pattern = ATTRIBUTE_PATTERNS[name] = re.compile(rb"\b" + name + rb'="([^"]*)"')
+    match = pattern.search(attrs)
+    return match.group(1) if match else None
+
+def split_cell(ref):
+    """单元格地址（如 B10）转换为(行, 列)"""
+    letters = ref.rstrip("0123456789")
+    return int(ref[len(letters):]), column_index_from_string(letters.upper())
+
+def parse_address(address):
+    """
+    解析不含工作表名的引用
+    
+    Returns:
+        (起始行, 起始列, 结束行, 结束列, 绝对引用标记)，绝对引用标记为(起始行, 起始列, 结束行, 结束列)是否带$；
+        整列/整行引用缺少的部分按整个工作表范围处理，视为绝对引用
+    """
+    first, _, last = address.partition(":")
+    col_abs1, col1, row_abs1, row1 = ADDRESS_PART_PATTERN.fullmatch(first).groups()
+    col_abs2, col2, row_abs2, row2 = ADDRESS_PART_PATTERN.fullmatch(last or first).groups()
+    if row1:
+        r1, r2, abs_r1, abs_r2 = int(row1), int(row2), bool(row_abs1), bool(row_abs2)
+    else:
+        r1, r2, abs_r1, abs_r2 = 1, MAX_ROWS, True, True
+    if col1:
+        c1, c2 = column_index_from_string(col1.upper()), column_index_from_string(col2.upper())
+        abs_c1, abs_c2 = bool(col_abs1), bool(col_abs2)
+    else:
+        c1, c2, abs_c1, abs_c2 = 1, MAX_COLUMNS, True, True
+    if r1 > r2:
+        r1, r2, abs_r1, abs_r2 = r2, r1, abs_r2, abs_r1
+    if c1 > c2:
+        c1, c2, abs_c1, abs_c2 = c2, c1, abs_c2, abs_c1
+    return r1, c1, r2, c2, (abs_r1, abs_c1, abs_r2, abs_c2)
+
+def format_area(sheet_name, r1, c1, r2, c2):
+    """区域转换为显示用的地址"""
+    if r1 == 1 and r2 == MAX_ROWS:
+        address = f"{get_column_letter(c1)}:{get_column_letter(c2)}"
+    elif c1 == 1 and c2 == MAX_COLUMNS:
+        address = f"{r1}:{r2}"
+    elif r1 == r2 and c1 == c2:
+        address = f"{get_column_letter(c1)}{r1}"
+    else:
+        address = f"{get_column_letter(c1)}{r1}:{get_column_letter(c2)}{r2}"
+    return f"{sheet_name}!{address}"
+
+def iter_formula_cells(zf, part_name):
+    """
+    逐块读取工作表XML，依次返回含公式的单元格
+    
+    每次处理到缓冲区中最后一个</row>为止，剩余部分与下一块拼接，因此内存占用只与块大小有关
+    
+    Args:
+        zf: 打开的ZipFile对象
+        part_name: 工作表部件路径
+    
+    Returns:
+        生成器 (行, 列, <f>的属性字节, 公式文字字节)，共享公式的从属单元格公式文字为空
+    """
+    cell_pattern = formula_pattern = row_end = None
+    column_cache = {}
+    buffer = b""
+    
+    with zf.open(part_name) as source:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            buffer += chunk
+            
+            if cell_pattern is None:
+                root = re.search(rb"<(\w+:)?worksheet\b", buffer)
+                if root is None and chunk:
+                    continue
+                p = re.escape((root.group(1) or b"") if root else b"")
+                cell_pattern = re.compile(rb"<" + p + rb"c\b([^>]*?)(?:/>|>(.*?)</" + p + rb"c>)", re.DOTALL)
+                formula_pattern = re.compile(rb"<" + p + rb"f\b([^>]*?)(?:/>|>(.*?)</" + p + rb"f>)", re.DOTALL)
+                row_end = b"</" + ((root.group(1) or b"") if root else b"") + b"row>"
+            
+            if chunk:
+                cut = buffer.rfind(row_end)
+                if cut < 0:
+                    continue
+                cut += len(row_end)
+                data, buffer = buffer[:cut], buffer[cut:]
+            else:
+                data, buffer = buffer, b""
+            
+            for match in cell_pattern.finditer(data):
+                content = match.group(2)
+                if not content:
+                    continue
+                formula = formula_pattern.search(content)
+                ref = attribute(match.group(1), b"r")
+                if formula is None or ref is None:
+                    continue
+                letters = ref.rstrip(b"0123456789")
+                col = column_cache.get(letters)
+                if col is None:
+                    col = column_cache[letters] = column_index_from_string(letters.decode())
+                yield int(ref[len(letters):]), col, formula.group(1), formula.group(2) or b""
+            
+            if not chunk:
+                break
+
+class DependencyGraph:
+    """
+    公式依赖图
+    
+    节点编号：[0, F) 为公式单元格，[F, F+R) 为去重后的引用区域，之后为线段树的内部节点。
+    边的方向为“依赖于”：公式 -> 它引用的区域 -> 区域中的公式单元格（经过线段树节点）
+    """
+    
+    def __init__(self, excel_path):
+        self.sheet_names = []
+        self.sheet_index = {}
+        self.names = {}
+        self.name_cache = {}
+        self.unresolved_names = Counter()
+        self.external_references = 0
+        self.dynamic_formulas = 0
+        
+        # 公式单元格
+        self.formula_sheet = array("i")
+        self.formula_row = array("i")
+        self.formula_col = array("i")
+        # 引用（去重前），owner为-1表示图表、定义的名称等公式以外的引用
+        self.ref_owner = array("i")
+        self.ref_area = array("i")
+        
+        with zipfile.ZipFile(excel_path) as zf:
+            self.load(zf)
+        self.build()
+    
+    def load(self, zf):
+        """读取所有工作表的公式和图表引用"""
+        sheets, names = read_workbook_parts(zf)
+        self.sheet_parts = [part_name for _, part_name in sheets]
+        for index, (sheet_name, _) in enumerate(sheets):
+            self.sheet_names.append(sheet_name)
+            self.sheet_index[sheet_name.lower()] = index
+        for name, local, text in names:
+            self.names[(local, name.upper())] = text
+        
+        for sheet, part_name in enumerate(self.sheet_parts):
+            if part_name is None or part_name not in zf.namelist():
+                continue
+            before = len(self.formula_row)
+            masters = {}
+            for row, col, f_attrs, f_text in iter_formula_cells(zf, part_name):
+                owner = len(self.formula_row)
+                self.formula_sheet.append(sheet)
+                self.formula_row.append(row)
+                self.formula_col.append(col)
+                
+                is_shared = attribute(f_attrs, b"t") == b"shared"
+                row_offset = col_offset = 0
+                if is_shared and not f_text:
+                    # 共享公式的从属单元格：把主单元格解析出的相对引用平移到当前位置
+                    master = masters.get(attribute(f_attrs, b"si"))
+                    if master is None:
+                        continue
+                    master_row, master_col, areas, dynamic = master
+                    row_offset, col_offset = row - master_row, col - master_col
+                else:
+                    areas, dynamic = self.formula_areas(unescape(f_text.decode("utf-8")), sheet)
+                    if is_shared:
+                        masters[attribute(f_attrs, b"si")] = (row, col, areas, dynamic)
+                self.dynamic_formulas += dynamic
+                self.add_areas(owner, areas, row_offset, col_offset)
+            print(f"  - 工作表 '{self.sheet_names[sheet]}': {len(self.formula_row) - before} 个公式")
+        
+        # 图表引用的区域也算作被引用
+        charts = [name for name in zf.namelist() if re.match(r"^xl/charts/chart\d+\.xml$", name)]
+        for part_name in charts:
+            for text in re.findall(rb"<(?:\w+:)?f>(.*?)</(?:\w+:)?f>", zf.read(part_name), re.DOTALL):
+                self.add_areas(-1, self.formula_areas(unescape(text.decode("utf-8")), None)[0], 0, 0)
+        if charts:
+            print(f"  - {len(charts)} 个图表")
+        
+        # 定义的名称指向的区域也算作被引用（名称可能被数据验证、打印区域或其他工作簿使用）
+        for local, name in self.names:
+            self.add_areas(-1, self.resolve_name(name, local), 0, 0)
+        if self.names:
+            print(f"  - {len(self.names)} 个定义的名称")
+    
+    def formula_areas(self, formula, sheet):
+        """
+        解析公式中的引用和名称
+        
+        Args:
+            formula: 公式文字
+            sheet: 公式所在的工作表序号（图表中的引用为None，必须带工作表名）
+        
+        Returns:
+            ([(工作表序号, 起始行, 起始列, 结束行, 结束列, 绝对引用标记)], 是否使用了INDIRECT/OFFSET)
+        """
+        areas = []
+        dynamic = False
+        for match in TOKEN_PATTERN.finditer(formula):
+            kind = match.lastgroup
+            if kind == "ref":
+                target = self.resolve_sheet(match.group("sheet"), sheet)
+                if target is not None:
+                    areas.append((target,) + parse_address(match.group("address")))
+            elif kind == "function":
+                name = match.group().upper()
+                for prefix in FUNCTION_PREFIXES:
+                    if name.startswith(prefix):
+                        name = name[len(prefix):]
+                        break
+                dynamic = dynamic or name in DYNAMIC_FUNCTIONS
+            elif kind == "name":
+                areas.extend(self.resolve_name(match.group(), sheet))
+        return areas, dynamic
+    
+    def resolve_sheet(self, prefix, sheet):
+        """引用中的工作表名转换为序号，外部工作簿或不存在的工作表返回None"""
+        if not prefix:
+            return sheet
+        name = prefix[:-1]
+        if name.startswith("'"):
+            name = name[1:-1].replace("''", "'")
+        if "[" in name:
+            self.external_references += 1
+            return None
+        return self.sheet_index.get(name.lower())
+    
+    def resolve_name(self, text, sheet, depth=0):
+        """
+        定义的名称转换为它引用的区域（先找工作表级名称，再找工作簿级名称；名称可以引用其他名称）
+        
+        Returns:
+            [(工作表序号, 起始行, 起始列, 结束行, 结束列, 绝对引用标记)]，名称中的引用都按绝对引用处理
+        """
+        upper = text.upper()
+        if upper in ("TRUE", "FALSE"):
+            return []
+        prefix, _, name = upper.rpartition("!")
+        scope = self.resolve_sheet(text[:len(prefix) + 1], sheet) if prefix else sheet
+        key = (scope, name)
+        if key in self.name_cache:
+            return self.name_cache[key]
+        
+        definition = self.names.get((scope, name))
+        if definition is None:
+            definition = self.names.get((None, name))
+        if definition is None or depth > 10:
+            self.unresolved_names[text] += 1
+            return []
+        
+        areas = []
+        for match in TOKEN_PATTERN.finditer(definition):
+            if match.lastgroup == "ref":
+                target = self.resolve_sheet(match.group("sheet"), scope)
+                if target is not None:
+                    r1, c1, r2, c2, _ = parse_address(match.group("address"))
+                    areas.append((target, r1, c1, r2, c2, (True, True, True, True)))
+            elif match.lastgroup == "name":
+                areas.extend(self.resolve_name(match.group(), scope, depth + 1))
+        self.name_cache[key] = areas
+        return areas
+    
+    def add_areas(self, owner, areas, row_offset, col_offset):
+        """记录一个公式（或图表）的引用，相对引用按偏移量平移，平移到工作表以外的引用忽略"""
+        for target, r1, c1, r2, c2, absolute in areas:
+            if row_offset or col_offset:
+                r1 += 0 if absolute[0] else row_offset
+                c1 += 0 if absolute[1] else col_offset
+                r2 += 0 if absolute[2] else row_offset
+                c2 += 0 if absolute[3] else col_offset
+                if r1 < 1 or c1 < 1 or r2 > MAX_ROWS or c2 > MAX_COLUMNS:
+                    continue
+                if r1 > r2:
+                    r1, r2 = r2, r1
+                if c1 > c2:
+                    c1, c2 = c2, c1
+            self.ref_owner.append(owner)
+            self.ref_area.extend((target, r1, c1, r2, c2))
+    
+    def build(self):
+        """去重引用区域，建立每列公式的线段树和正向、反向CSR依赖图"""
+        sheets = np.frombuffer(self.formula_sheet, dtype=np.int32).astype(np.int64)
+        rows = np.frombuffer(self.formula_row, dtype=np.int32).astype(np.int64)
+        cols = np.frombuffer(self.formula_col, dtype=np.int32).astype(np.int64)
+        self.formula_count = formula_count = len(rows)
+        
+        # 按(工作表, 列, 行)排序的公式位置键，用于查找单元格和区域中的公式
+        keys = (sheets * (MAX_COLUMNS + 1) + cols) * (MAX_ROWS + 1) + rows
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_keys = keys[self.order]
+        
+        # 每个(工作表, 列)为一组，组内公式按行号排列
+        group_keys = self.sorted_keys // (MAX_ROWS + 1)
+        starts = np.flatnonzero(np.r_[True, group_keys[1:] != group_keys[:-1]]) if formula_count else np.array([], int)
+        ends = np.r_[starts[1:], formula_count]
+        self.group_start = starts
+        self.group_sheet_col = (group_keys[starts] if formula_count else np.array([], np.int64)).tolist()
+        self.group_rows = [rows[self.order[start:end]].tolist() for start, end in zip(starts.tolist(), ends.tolist())]
+        
+        # 线段树内部节点编号：组g中的内部节点i（1 <= i < m）编号为segment_base[g] + i - 1
+        sizes = ends - starts
+        internal = np.maximum(sizes - 1, 0)
+        
+        # 引用区域去重
+        areas = np.frombuffer(self.ref_area, dtype=np.int32).reshape(-1, 5)
+        owners = np.frombuffer(self.ref_owner, dtype=np.int32).astype(np.int64)
+        if len(areas):
+            self.areas, inverse = np.unique(areas, axis=0, return_inverse=True)
+            inverse = inverse.ravel()
+        else:
+            self.areas, inverse = areas, np.array([], np.int64)
+        area_count = len(self.areas)
+        segment_base = formula_count + area_count + np.r_[0, np.cumsum(internal)[:-1]].astype(np.int64)
+        self.node_count = formula_count + area_count + int(internal.sum())
+        
+        sources, targets = [], []
+        # 公式 -> 引用区域
+        owned = owners >= 0
+        sources.append(owners[owned])
+        targets.append(formula_count + inverse[owned].astype(np.int64))
+        
+        # 线段树内部节点 -> 子节点
+        for group, (start, size) in enumerate(zip(starts.tolist(), sizes.tolist())):
+            if size < 2:
+                continue
+            parents = np.arange(1, size)
+            for children in (2 * parents, 2 * parents + 1):
+                sources.append(segment_base[group] + parents - 1)
+                leaves = self.order[start + np.clip(children - size, 0, size - 1)]
+                targets.append(np.where(children >= size, leaves, segment_base[group] + children - 1))
+        
+        # 引用区域 -> 区域中的公式（单个单元格直接连到公式，区域连到线段树节点）
+        covered = np.zeros(formula_count + 1, dtype=np.int64)
+        self.area_formula = np.full(area_count, -1, dtype=np.int64)
+        area_sources, area_targets = array("q"), array("q")
+        group_index = {key: group for group, key in enumerate(self.group_sheet_col)}
+        group_sheet_col = self.group_sheet_col
+        order = self.order.tolist()
+        for area, (sheet, r1, c1, r2, c2) in enumerate(self.iter_areas()):
+            node = formula_count + area
+            first_key = sheet * (MAX_COLUMNS + 1) + c1
+            if c1 == c2:
+                groups = [group_index[first_key]] if first_key in group_index else []
+            else:
+                groups = range(bisect_left(group_sheet_col, first_key),
+                               bisect_right(group_sheet_col, sheet * (MAX_COLUMNS + 1) + c2))
+            for group in groups:
+                group_rows = self.group_rows[group]
+                low, high = bisect_left(group_rows, r1), bisect_right(group_rows, r2)
+                if low >= high:
+                    continue
+                start = int(starts[group])
+                covered[start + low] += 1
+                covered[start + high] -= 1
+                if high - low == 1 and r1 == r2 and c1 == c2:
+                    self.area_formula[area] = order[start + low]
+                size = len(group_rows)
+                base = int(segment_base[group]) - 1
+                # 自底向上的线段树区间分解
+                low += size
+                high += size
+                while low < high:
+                    if low & 1:
+                        area_sources.append(node)
+                        area_targets.append(order[start + low - size] if low >= size else base + low)
+                        low += 1
+                    if high & 1:
+                        high -= 1
+                        area_sources.append(node)
+                        area_targets.append(order[start + high - size] if high >= size else base + high)
+                    low >>= 1
+                    high >>= 1
+        sources.append(np.frombuffer(area_sources, dtype=np.int64))
+        targets.append(np.frombuffer(area_targets, dtype=np.int64))
+        
+        # 被引用的公式（按排序后的位置计算后换回公式编号）
+        self.referenced = np.zeros(formula_count, dtype=bool)
+        self.referenced[self.order] = np.cumsum(covered[:-1]) > 0
+        
+        sources = np.concatenate(sources) if sources else np.array([], np.int64)
+        targets = np.concatenate(targets) if targets else np.array([], np.int64)
+        self.edge_count = len(sources)
+        self.forward = self.csr(sources, targets)
+        self.backward = self.csr(targets, sources)
+    
+    def iter_areas(self):
+        """逐个返回引用区域 (工作表序号, 起始行, 起始列, 结束行, 结束列)，分块转换为列表以节省内存"""
+        for start in range(0, len(self.areas), 65536):
+            yield from self.areas[start:start + 65536].tolist()
+    
+    def csr(self, sources, targets):
+        """边列表转换为CSR数组 (行指针, 列索引)"""
+        order = np.argsort(sources, kind="stable")
+        indptr = np.zeros(self.node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=self.node_count), out=indptr[1:])
+        return indptr, targets[order]
+    
+    def cell_name(self, formula):
+        """公式编号转换为单元格地址"""
+        sheet = self.formula_sheet[formula]
+        return f"{self.sheet_names[sheet]}!{get_column_letter(self.formula_col[formula])}{self.formula_row[formula]}"
+    
+    def area_name(self, area):
+        """引用区域编号转换为地址"""
+        sheet, r1, c1, r2, c2 = self.areas[area].tolist()
+        return format_area(self.sheet_names[sheet], r1, c1, r2, c2)
+    
+    def find_formula(self, sheet, row, col):
+        """查找单元格对应的公式编号，不是公式时返回None"""
+        key = (sheet * (MAX_COLUMNS + 1) + col) * (MAX_ROWS + 1) + row
+        position = int(np.searchsorted(self.sorted_keys, key))
+        if position < len(self.sorted_keys) and self.sorted_keys[position] == key:
+            return int(self.order[position])
+        return None
+    
+    def find_cell(self, cell):
+        """
+        解析查询的单元格（如 汇总!B10）
+        
+        Returns:
+            (工作表序号, 行, 列)，工作表不存在时返回None
+        """
+        sheet_name, _, address = cell.rpartition("!")
+        sheet = self.sheet_index.get(sheet_name.strip("'").lower()) if sheet_name else 0
+        if sheet is None:
+            return None
+        row, col = split_cell(address.replace("$", ""))
+        return sheet, row, col
+    
+    def strongly_connected(self):
+        """
+        用Tarjan算法（非递归实现）找出所有包含多于一个节点的强连通分量
+        
+        Returns:
+            [[节点编号]]
+        """
+        # 100万个公式时节点和边都有几百万个，用array代替list节省内存
+        indptr, indices = (array("q", part.astype(np.int64).tobytes()) for part in self.forward)
+        count = self.node_count
+        index = array("q", [-1]) * count
+        low = array("q", [0]) * count
+        on_stack = bytearray(count)
+        stack = []
+        components = []
+        counter = 0
+        
+        for root in range(count):
+            if index[root] != -1 or indptr[root] == indptr[root + 1]:
+                continue
+            index[root] = low[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = 1
+            work = [[root, indptr[root]]]
+            while work:
+                frame = work[-1]
+                node, position = frame
+                if position < indptr[node + 1]:
+                    frame[1] += 1
+                    successor = indices[position]
+                    if index[successor] == -1:
+                        index[successor] = low[successor] = counter
+                        counter += 1
+                        stack.append(successor)
+                        on_stack[successor] = 1
+                        work.append([successor, indptr[successor]])
+                    elif on_stack[successor] and index[successor] < low[node]:
+                        low[node] = index[successor]
+                    continue
+                
+                work.pop()
+                if work and low[node] < low[work[-1][0]]:
+                    low[work[-1][0]] = low[node]
+                if low[node] == index[node]:
+                    component = []
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = 0
+                        component.append(member)
+                        if member == node:
+                            break
+                    if len(component) > 1:
+                        components.append(component)
+        return components
+    
+    def find_cycles(self):
+        """
+        查找循环引用
+        
+        Returns:
+            [[公式编号]]，每组为一个循环引用中的所有公式，按公式数从多到少排列
+        """
+        cycles = []
+        for component in self.strongly_connected():
+            formulas = sorted(node for node in component if node < self.formula_count)
+            if formulas:
+                cycles.append(formulas)
+        cycles.sort(key=len, reverse=True)
+        return cycles
+    
+    def unreferenced(self):
+        """没有被任何公式、名称或图表引用的公式编号"""
+        return np.flatnonzero(~self.referenced).tolist()
+    
+    def trace(self, starts, graph, max_depth):
+        """
+        从起始节点出发广度优先遍历，只有经过公式节点时层数加一
+        
+        Args:
+            starts: [(节点编号, 层数)]
+            graph: self.forward（追踪引用）或 self.backward（追踪从属）
+            max_depth: 最大层数，None表示不限制
+        
+        Returns:
+            {节点编号: 层数}
+        """
+        indptr, indices = graph
+        depths = dict(starts)
+        queue = deque(starts)
+        while queue:
+            node, depth = queue.popleft()
+            if node < self.formula_count:
+                if max_depth is not None and depth >= max_depth:
+                    continue
+                depth += 1
+            for successor in indices[indptr[node]:indptr[node + 1]].tolist():
+                if successor not in depths:
+                    depths[successor] = depth
+                    queue.append((successor, depth))
+        return depths
+    
+    def trace_precedents(self, cell, max_depth=None):
+        """
+        追踪单元格的所有直接和间接引用
+        
+        Returns:
+            (列表[(层数, 公式编号)], 列表[(层数, 引用区域编号)])；引用区域只包括常量单元格和多单元格区域
+        """
+        formula = self.find_formula(*cell)
+        if formula is None:
+            return [], []
+        depths = self.trace([(formula, 0)], self.forward, max_depth)
+        formulas = sorted((depth, node) for node, depth in depths.items() if node < self.formula_count and node != formula)
+        areas = sorted((depth, node - self.formula_count) for node, depth in depths.items()
+                       if self.formula_count <= node < self.formula_count + len(self.areas)
+                       and self.area_formula[node - self.formula_count] < 0)
+        return formulas, areas
+    
+    def trace_dependents(self, cell, max_depth=None):
+        """
+        追踪直接或间接引用了单元格的所有公式（单元格本身可以不是公式）
+        
+        Returns:
+            [(层数, 公式编号)]
+        """
+        sheet, row, col = cell
+        formula = self.find_formula(sheet, row, col)
+        if formula is not None:
+            starts = [(formula, 0)]
+        else:
+            # 常量单元格不是图中的节点，从包含它的引用区域出发
+            areas = self.areas
+            mask = ((areas[:, 0] == sheet) & (areas[:, 1] <= row) & (areas[:, 3] >= row)
+                    & (areas[:, 2] <= col) & (areas[:, 4] >= col)) if len(areas) else np.array([], bool)
+            # 引用区域不增加层数，直接引用这个单元格的公式为第1层
+            starts = [(self.formula_count + area, 1) for area in np.flatnonzero(mask).tolist()]
+        depths = self.trace(starts, self.backward, max_depth)
+        return sorted((depth, node) for node, depth in depths.items() if node < self.formula_count and node != formula)
+
+def read_formula_texts(excel_path, graph, wanted):
+    """
+    再次逐块读取工作表，取出需要输出的公式文字（共享公式的从属单元格用Translator换算）
+    
+    Args:
+        excel_path: Excel文件路径
+        graph: DependencyGraph对象
+        wanted: 需要的公式编号集合
+    
+    Returns:
+        {公式编号: 公式文字}
+    """
+    by_position = {(graph.formula_sheet[formula], graph.formula_row[formula], graph.formula_col[formula]): formula
+                   for formula in wanted}
+    sheets = {sheet for sheet, _, _ in by_position}
+    texts = {}
+    with zipfile.ZipFile(excel_path) as zf:
+        for sheet in sorted(sheets):
+            masters = {}
+            for row, col, f_attrs, f_text in iter_formula_cells(zf, graph.sheet_parts[sheet]):
+                is_shared = attribute(f_attrs, b"t") == b"shared"
+                if is_shared and f_text:
+                    masters[attribute(f_attrs, b"si")] = (f"{get_column_letter(col)}{row}",
+                                                          "=" + unescape(f_text.decode("utf-8")))
+                formula = by_position.get((sheet, row, col))
+                if formula is None:
+                    continue
+                if is_shared and not f_text:
+                    master = masters.get(attribute(f_attrs, b"si"))
+                    if master is None:
+                        continue
+                    texts[formula] = Translator(master[1], origin=master[0]).translate_formula(
+                        f"{get_column_letter(col)}{row}")
+                else:
+                    texts[formula] = "=" + unescape(f_text.decode("utf-8"))
+    return texts
+
+def print_items(title, items, texts=None):
+    """打印结果，超过max_printed条时只打印前面部分"""
+    print(title)
+    for depth, name, formula in items[:max_printed]:
+        prefix = f"    [{depth}] " if depth is not None else "    "
+        print(f"{prefix}{name}" + (f"  {texts[formula]}" if texts and formula in texts else ""))
+    if len(items) > max_printed:
+        print(f"    ……共 {len(items)} 条，完整结果见报告")
+
+def analyze_dependencies(excel_path):
+    """
+    分析工作簿的公式依赖关系
+    
+    Args:
+        excel_path: Excel文件路径
+    
+    Returns:
+        报告的行列表，失败时返回None
+    """
+    print(f"正在处理文件: {excel_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(excel_path):
+        print(f"错误: 文件 '{excel_path}' 不存在!")
+        return None
+    
+    print("正在读取公式...")
+    graph = DependencyGraph(excel_path)
+    print(f"共 {graph.formula_count} 个公式，{len(graph.areas)} 个不同的引用区域，"
+          f"依赖图 {graph.node_count} 个节点、{graph.edge_count} 条边")
+    if graph.dynamic_formulas:
+        print(f"注意: {graph.dynamic_formulas} 个公式使用了INDIRECT/OFFSET，实际引用在计算时才能确定，依赖关系可能不完整")
+    if graph.unresolved_names:
+        names = "、".join(name for name, _ in graph.unresolved_names.most_common(10))
+        print(f"注意: {len(graph.unresolved_names)} 个名称无法解析（如表格结构化引用）: {names}")
+    if graph.external_references:
+        print(f"注意: {graph.external_references} 处引用了外部工作簿，已忽略")
+    
+    # (类型, 查询单元格, 层数, 单元格或区域, 公式编号)
+    records = []
+    
+    cycles = graph.find_cycles()
+    for number, cycle in enumerate(cycles, 1):
+        records.extend(("循环引用", f"第{number}组", None, graph.cell_name(formula), formula) for formula in cycle)
+    
+    unreferenced = graph.unreferenced()
+    records.extend(("未被引用的公式", "", None, graph.cell_name(formula), formula) for formula in unreferenced)
+    
+    for cell_text in trace_precedents:
+        cell = graph.find_cell(cell_text)
+        if cell is None:
+            print(f"警告: 找不到单元格 {cell_text}")
+            continue
+        formulas, areas = graph.trace_precedents(cell, max_trace_depth)
+        records.extend(("引用的公式", cell_text, depth, graph.cell_name(formula), formula) for depth, formula in formulas)
+        records.extend(("引用的区域", cell_text, depth, graph.area_name(area), None) for depth, area in areas)
+    
+    for cell_text in trace_dependents:
+        cell = graph.find_cell(cell_text)
+        if cell is None:
+            print(f"警告: 找不到单元格 {cell_text}")
+            continue
+        formulas = graph.trace_dependents(cell, max_trace_depth)
+        records.extend(("从属的公式", cell_text, depth, graph.cell_name(formula), formula) for depth, formula in formulas)
+    
+    texts = read_formula_texts(excel_path, graph, {record[4] for record in records if record[4] is not None})
+    
+    # 打印结果
+    print(f"循环引用: {len(cycles)} 组")
+    for number, cycle in enumerate(cycles[:max_printed], 1):
+        cells = "、".join(graph.cell_name(formula) for formula in cycle[:10])
+        print(f"    第{number}组（{len(cycle)} 个公式）: {cells}" + ("……" if len(cycle) > 10 else ""))
+    print_items(f"未被引用的公式: {len(unreferenced)} 个",
+                [(None, graph.cell_name(formula), formula) for formula in unreferenced], texts)
+    for kind in ("引用的公式", "引用的区域", "从属的公式"):
+        for cell_text in dict.fromkeys(record[1] for record in records if record[0] == kind):
+            items = [(depth, name, formula) for record_kind, query, depth, name, formula in records
+                     if record_kind == kind and query == cell_text]
+            print_items(f"{cell_text} {kind}: {len(items)} 个", items, texts)
+    
+    return [(kind, query, depth if depth is not None else "", name, texts.get(formula, ""))
+            for kind, query, depth, name, formula in records]
+
+def save_report(rows):
+    """保存分析报告"""
+    with open(report_file, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["类型", "查询单元格", "层数", "单元格/区域", "公式"])
+        writer.writerows(rows)
+    print(f"分析报告已保存为: {report_file}")
+
+def main():
+    # 执行依赖关系分析
+    rows = analyze_dependencies(input_file)
+    
+    if rows is not None:
+        save_report(rows)
+
+if __name__ == "__main__":
+    main()
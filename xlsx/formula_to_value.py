@@ -3,10 +3,38 @@
 
 """
 将Excel表格中指定列的公式单元格改为它们自身计算得出的结果（固定值）
+
+除按列选择外，还可以按公式内容选择：包含指定函数（如INDIRECT、OFFSET、NOW、RAND等易失函数）、
+匹配正则表达式、引用整列/整行或估计重算成本较高的公式，并可限定工作表和区域；
+冻结的公式、冻结原因和估计减少的重算成本输出到CSV报告
+
+流式模式下不使用openpyxl加载工作簿，而是逐块读取每个xl/worksheets/sheetN.xml，
+只删除目标列中公式单元格的<f>元素并保留缓存的计算结果<v>，其他XML原样复制，
+同时更新calcChain.xml，内存占用与工作表大小无关
+
+公式没有缓存的计算结果时，用内置公式引擎计算：把公式解析为语法树，建立单元格依赖图，
+按拓扑顺序计算，区域参数用numpy数组表示
 """
 
 import os
+import re
+import csv
+import bisect
+import copy
+import math
+import calendar
+import operator
+import zipfile
+import posixpath
+from collections import Counter, defaultdict, deque
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_DOWN, ROUND_HALF_UP, ROUND_UP
+from html import unescape
+from xml.sax.saxutils import escape
+import numpy as np
 import openpyxl
+from lxml import etree as ET
+from openpyxl.formula.translate import Translator
 from openpyxl.utils import get_column_letter, column_index_from_string
 
 # 文件读取部分，便于修改需读取文件名
@@ -19,6 +47,45 @@ columns_to_process = [
     "D:F",     # 列范围
 ]
 
+# 按公式内容选择需要冻结的公式（满足任一条件即冻结，与上面的列配置同时生效；
+# 只想按内容选择时把columns_to_process设为空列表）
+# 包含这些函数的公式，如 ["INDIRECT", "OFFSET", "NOW", "TODAY", "RAND", "RANDBETWEEN"]
+freeze_functions = []
+
+# 公式文字（不含开头的等号）匹配该正则表达式时冻结，如 r"VLOOKUP\(.*!"，None表示不使用
+freeze_pattern = None
+
+# 是否冻结引用整列或整行（如 A:A、1:1）的公式
+freeze_full_references = False
+
+# 估计的重算成本（引用的单元格数）不低于该值时冻结，None表示不使用
+freeze_cost_threshold = None
+
+# 处理范围：只处理这些工作表（空列表表示所有工作表）
+sheets_to_process = []
+
+# 处理范围：只处理这些区域中的单元格，如 "A2:F5000"、"汇总!A:F"（不写工作表名时对所有工作表生效，空列表表示不限制）
+ranges_to_process = []
+
+# 冻结公式的报告（CSV，包括冻结原因和估计的重算成本），None表示不输出
+freeze_report_file = f"{os.path.splitext(input_file)[0]}_冻结公式.csv"
+
+# 流式模式：True 直接处理压缩包中的XML（适合大文件），False 使用openpyxl加载工作簿
+streaming_mode = True
+
+# 公式没有缓存的计算结果时（如openpyxl等程序生成、从未在Excel中打开保存过的文件），
+# 是否用内置公式引擎计算（支持SUM、IF、VLOOKUP、INDEX/MATCH、SUMIFS、ROUND、日期和文本函数等）
+evaluate_missing_values = True
+
+# 流式模式下每次读取的字节数
+CHUNK_SIZE = 1024 * 1024
+
+# 命名空间
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+PKG_REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+CALC_CHAIN_TYPE = f"{REL_NS}/calcChain"
+
 def parse_column_reference(column_ref):
     """
     解析列引用，支持单列和列范围
@@ -37,9 +104,2062 @@ def parse_column_reference(column_ref):
     else:
         return [column_index_from_string(column_ref)]
 
+MAX_ROWS = 1048576
+MAX_COLUMNS = 16384
+
+# Excel日期序列号的起点（1900年日期系统，忽略1900年2月29日的历史错误，只影响1900年3月以前的日期）
+EXCEL_EPOCH = datetime(1899, 12, 30)
+
+class ExcelError(Exception):
+    """Excel错误值（如#N/A、#DIV/0!），既作为计算结果保存，也作为异常在计算过程中传播"""
+    
+    def __init__(self, code):
+        super().__init__(code)
+        self.code = code
+    
+    def __str__(self):
+        return self.code
+    
+    def __eq__(self, other):
+        return isinstance(other, ExcelError) and other.code == self.code
+    
+    def __hash__(self):
+        return hash(self.code)
+
+class FormulaSyntaxError(ValueError):
+    """公式无法解析"""
+
+class UnsupportedFormula(Exception):
+    """
+    公式中有引擎不支持的内容（函数、定义的名称）或无法解析，计算结果不可信
+    
+    不是ExcelError，因此不会被IFERROR、ISERROR等函数当作错误值处理
+    """
+
+# 省略的参数，如 IF(A1,,1) 中的第二个参数
+MISSING = object()
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<error>\#(?:NULL!|DIV/0!|VALUE!|REF!|NAME\?|NUM!|N/A))
+  | (?P<ref>(?:(?:'(?:[^']|'')+'|[^\W\d][\w.]*)!)?
+            (?:\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?
+              |\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}
+              |\$?\d+:\$?\d+)
+            (?![\w(]))
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<function>[^\W\d][\w.]*(?=\s*\())
+  | (?P<name>[^\W\d][\w.]*)
+  | (?P<operator><>|<=|>=|[-+*/^&=<>%(),{};])
+""", re.VERBOSE)
+
+REF_PART_PATTERN = re.compile(r"(\$?)([A-Za-z]*)(\$?)(\d*)")
+
+# 引用中不带$的行号
+RELATIVE_ROW_PATTERN = re.compile(r"(?<![$\d])\d+")
+
+# 二元运算符的优先级（数字越大结合越紧），负号高于乘方：-2^2 = 4
+BINARY_PRECEDENCE = {"=": 1, "<>": 1, "<": 1, ">": 1, "<=": 1, ">=": 1,
+                     "&": 2, "+": 3, "-": 3, "*": 4, "/": 4, "^": 5}
+PREFIX_PRECEDENCE = 6
+
+FUNCTION_PREFIXES = ("_XLFN._XLWS.", "_XLFN.", "_XLWS.")
+
+def tokenize(formula):
+    """
+    把公式拆分为记号
+    
+    Args:
+        formula: 不含开头等号的公式
+    
+    Returns:
+        [(类型, 文字)]，最后一个为("end", "")
+    """
+    tokens = []
+    position = 0
+    while position < len(formula):
+        match = TOKEN_PATTERN.match(formula, position)
+        if match is None:
+            raise FormulaSyntaxError(f"无法识别: {formula[position:]}")
+        if match.lastgroup != "space":
+            tokens.append((match.lastgroup, match.group()))
+        position = match.end()
+    tokens.append(("end", ""))
+    return tokens
+
+def parse_reference(text):
+    """
+    解析单元格或区域引用
+    
+    Args:
+        text: 如 A1、$A$1:B5、Sheet1!A:A、'工作表 1'!3:3
+    
+    Returns:
+        ("ref", 工作表名或None, 起始行, 起始列, 结束行, 结束列, 绝对引用标记)，
+        整列/整行引用的结束行/列为None；绝对引用标记为(起始行, 起始列, 结束行, 结束列)是否带$
+    """
+    sheet = None
+    if "!" in text:
+        sheet, text = text.rsplit("!", 1)
+        if sheet.startswith("'"):
+            sheet = sheet[1:-1].replace("''", "'")
+    first, _, last = text.partition(":")
+    col_abs1, col1, row_abs1, row1 = REF_PART_PATTERN.fullmatch(first).groups()
+    col_abs2, col2, row_abs2, row2 = REF_PART_PATTERN.fullmatch(last or first).groups()
+    
+    if row1:
+        (r1, abs_r1), (r2, abs_r2) = sorted([(int(row1), bool(row_abs1)), (int(row2), bool(row_abs2))])
+        # A1:A1048576这样写到最后一行的区域按整列处理，避免按100多万行分配数组
+        if r2 == MAX_ROWS and r1 == 1:
+            r2 = None
+    else:
+        r1, r2, abs_r1, abs_r2 = 1, None, True, True
+    if col1:
+        (c1, abs_c1), (c2, abs_c2) = sorted([(column_index_from_string(col1.upper()), bool(col_abs1)),
+                                             (column_index_from_string(col2.upper()), bool(col_abs2))])
+        if c2 == MAX_COLUMNS and c1 == 1:
+            c2 = None
+    else:
+        c1, c2, abs_c1, abs_c2 = 1, None, True, True
+    return ("ref", sheet, r1, c1, r2, c2, (abs_r1, abs_c1, abs_r2, abs_c2))
+
+def fill_template(formula):
+    """
+    生成公式向下填充的模板：相对行号替换为占位符，向下填充k行后的公式为
+    template.format(*(row + k for row in rows))
+    
+    Args:
+        formula: 公式
+    
+    Returns:
+        (模板, 相对行号列表)，无法解析时返回None
+    """
+    body_start = 1 if formula.startswith("=") else 0
+    pieces = [formula[:body_start]]
+    rows = []
+    position = body_start
+    while position < len(formula):
+        match = TOKEN_PATTERN.match(formula, position)
+        if match is None:
+            return None
+        text = match.group().replace("{", "{{").replace("}", "}}")
+        if match.lastgroup == "ref":
+            # 工作表名中的数字不是行号，只处理!之后的部分
+            sheet, bang, address = text.rpartition("!")
+            pieces.append(sheet + bang)
+            last = 0
+            for row_match in RELATIVE_ROW_PATTERN.finditer(address):
+                pieces.append(address[last:row_match.start()] + "{}")
+                rows.append(int(row_match.group()))
+                last = row_match.end()
+            pieces.append(address[last:])
+        else:
+            pieces.append(text)
+        position = match.end()
+    return "".join(pieces), rows
+
+class FormulaParser:
+    """Pratt解析器，把公式解析为由元组组成的语法树"""
+    
+    def __init__(self, formula):
+        self.tokens = tokenize(formula[1:] if formula.startswith("=") else formula)
+        self.index = 0
+    
+    def peek(self):
+        return self.tokens[self.index]
+    
+    def next(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+    
+    def expect(self, text):
+        if self.next() != ("operator", text):
+            raise FormulaSyntaxError(f"缺少 {text}")
+    
+    def parse(self):
+        """解析整个公式"""
+        tree = self.parse_expression()
+        if self.peek()[0] != "end":
+            raise FormulaSyntaxError(f"多余的内容: {self.peek()[1]}")
+        return tree
+    
+    def parse_expression(self, precedence=0):
+        """解析优先级高于precedence的表达式（同级运算符左结合）"""
+        left = self.parse_prefix()
+        while True:
+            kind, text = self.peek()
+            if kind != "operator":
+                return left
+            if text == "%":
+                self.next()
+                left = ("percent", left)
+            elif BINARY_PRECEDENCE.get(text, 0) > precedence:
+                self.next()
+                left = ("binary", text, left, self.parse_expression(BINARY_PRECEDENCE[text]))
+            else:
+                return left
+    
+    def parse_prefix(self):
+        """解析表达式开头的部分：常量、引用、函数调用、括号和正负号"""
+        kind, text = self.next()
+        if kind == "number":
+            return ("number", float(text))
+        if kind == "string":
+            return ("string", text[1:-1].replace('""', '"'))
+        if kind == "error":
+            return ("error", text)
+        if kind == "ref":
+            return parse_reference(text)
+        if kind == "name":
+            if text.upper() in ("TRUE", "FALSE"):
+                return ("boolean", text.upper() == "TRUE")
+            # 定义的名称暂不支持
+            return ("name", text)
+        if kind == "function":
+            return self.parse_call(text)
+        if (kind, text) == ("operator", "-"):
+            return ("negate", self.parse_expression(PREFIX_PRECEDENCE))
+        if (kind, text) == ("operator", "+"):
+            return self.parse_expression(PREFIX_PRECEDENCE)
+        if (kind, text) == ("operator", "("):
+            tree = self.parse_expression()
+            self.expect(")")
+            return tree
+        raise FormulaSyntaxError(f"不支持的语法: {text}")
+    
+    def parse_call(self, name):
+        """解析函数调用的参数列表"""
+        name = name.upper()
+        for prefix in FUNCTION_PREFIXES:
+            if name.startswith(prefix):
+                name = name[len(prefix):]
+        self.expect("(")
+        args = []
+        if self.peek() == ("operator", ")"):
+            self.next()
+            return ("call", name, tuple(args))
+        while True:
+            if self.peek() in (("operator", ","), ("operator", ")")):
+                args.append(("missing",))
+            else:
+                args.append(self.parse_expression())
+            token = self.next()
+            if token == ("operator", ")"):
+                return ("call", name, tuple(args))
+            if token != ("operator", ","):
+                raise FormulaSyntaxError("函数参数之间缺少逗号")
+
+def iter_nodes(tree, kind):
+    """遍历语法树中指定类型的节点"""
+    if tree[0] == kind:
+        yield tree
+    if tree[0] == "call":
+        children = tree[2]
+    elif tree[0] == "binary":
+        children = tree[2:]
+    elif tree[0] in ("negate", "percent"):
+        children = tree[1:]
+    else:
+        children = ()
+    for child in children:
+        yield from iter_nodes(child, kind)
+
+# 把区域参数整体作为区域使用的函数（其他位置上的多单元格区域按公式所在行/列隐式交叉）
+RANGE_FUNCTIONS = {"SUM", "AVERAGE", "MIN", "MAX", "COUNT", "COUNTA", "SUMPRODUCT", "SUMIF", "SUMIFS",
+                   "COUNTIF", "COUNTIFS", "AVERAGEIF", "AVERAGEIFS", "VLOOKUP", "HLOOKUP", "MATCH",
+                   "INDEX", "CONCAT", "AND", "OR"}
+
+def is_invariant(tree, in_range_function=False):
+    """判断语法树的值是否与公式所在的行无关（没有相对行引用，也不依赖隐式交叉）"""
+    kind = tree[0]
+    if kind == "ref":
+        _, _, r1, c1, r2, c2, absolute = tree
+        if r2 is not None and not (absolute[0] and absolute[2]):
+            return False
+        return in_range_function or (r1 == r2 and c1 == c2)
+    if kind == "call":
+        accepts_range = tree[1] in RANGE_FUNCTIONS
+        return all(is_invariant(arg, accepts_range) for arg in tree[2])
+    if kind == "binary":
+        return is_invariant(tree[2]) and is_invariant(tree[3])
+    if kind in ("negate", "percent"):
+        return is_invariant(tree[1])
+    return True
+
+class SheetGrid:
+    """
+    一个工作表的单元格值
+    
+    values保存原始值（object数组），numbers保存数值（非数字为NaN），errors标记错误值，
+    区域参数直接取这三个数组的切片
+    """
+    
+    def __init__(self, rows, cols):
+        self.values = np.full((rows, cols), None, dtype=object)
+        self.numbers = np.full((rows, cols), np.nan)
+        self.errors = np.zeros((rows, cols), dtype=bool)
+    
+    def fill(self, rows, cols, values):
+        """批量写入常量单元格"""
+        self.values[rows - 1, cols - 1] = np.array(values, dtype=object)
+        self.numbers[rows - 1, cols - 1] = [value if isinstance(value, float) else np.nan for value in values]
+        self.errors[rows - 1, cols - 1] = [isinstance(value, ExcelError) for value in values]
+    
+    def set(self, row, col, value):
+        """写入一个公式的计算结果"""
+        self.values[row - 1, col - 1] = value
+        self.numbers[row - 1, col - 1] = value if isinstance(value, float) else np.nan
+        self.errors[row - 1, col - 1] = isinstance(value, ExcelError)
+    
+    def set_column(self, start, col, values):
+        """写入一列中连续单元格的向量化计算结果（数字或逻辑值数组）"""
+        end = start + len(values) - 1
+        self.values[start - 1:end, col - 1] = values.astype(object)
+        self.numbers[start - 1:end, col - 1] = np.nan if values.dtype == bool else values
+        self.errors[start - 1:end, col - 1] = False
+    
+    def get(self, row, col):
+        rows, cols = self.values.shape
+        if row > rows or col > cols:
+            return None
+        return self.values[row - 1, col - 1]
+
+class Area:
+    """工作表上的矩形区域，values/numbers/errors为工作表网格的视图，超出网格的部分视为空白"""
+    
+    def __init__(self, grid, r1, c1, r2, c2, origin):
+        self.grid = grid
+        self.r1, self.c1, self.r2, self.c2 = r1, c1, r2, c2
+        # 引用所在公式的位置(行, 列)，用于单值上下文中的隐式交叉
+        self.origin = origin
+    
+    @property
+    def shape(self):
+        return (self.r2 - self.r1 + 1, self.c2 - self.c1 + 1)
+    
+    def view(self, array, fill):
+        part = array[self.r1 - 1:self.r2, self.c1 - 1:self.c2]
+        if part.shape != self.shape:
+            padded = np.full(self.shape, fill, dtype=array.dtype)
+            padded[:part.shape[0], :part.shape[1]] = part
+            return padded
+        return part
+    
+    @property
+    def values(self):
+        return self.view(self.grid.values, None)
+    
+    @property
+    def numbers(self):
+        return self.view(self.grid.numbers, np.nan)
+    
+    @property
+    def errors(self):
+        return self.view(self.grid.errors, False)
+    
+    def raise_error(self):
+        """区域中有错误值时抛出第一个错误"""
+        errors = self.errors
+        if errors.any():
+            raise self.values[errors][0]
+    
+    def sub(self, r1, c1, r2, c2):
+        """相对于区域左上角的子区域（行列从1开始）"""
+        return Area(self.grid, self.r1 + r1 - 1, self.c1 + c1 - 1, self.r1 + r2 - 1, self.c1 + c2 - 1, self.origin)
+    
+    def scalar(self):
+        """单值上下文中区域的值：单个单元格直接取值，一行或一列按公式所在的列或行取交叉单元格"""
+        height, width = self.shape
+        row, col = self.r1, self.c1
+        if height > 1 or width > 1:
+            origin_row, origin_col = self.origin
+            if width == 1 and self.r1 <= origin_row <= self.r2:
+                row = origin_row
+            elif height == 1 and self.c1 <= origin_col <= self.c2:
+                col = origin_col
+            else:
+                raise ExcelError("#VALUE!")
+        return self.grid.get(row, col)
+
+def to_serial(value):
+    """把日期时间转换为Excel序列号"""
+    if isinstance(value, datetime):
+        delta = value - EXCEL_EPOCH
+        return delta.days + (delta.seconds + delta.microseconds / 1e6) / 86400
+    if isinstance(value, date):
+        return float((value - EXCEL_EPOCH.date()).days)
+    if isinstance(value, time):
+        return (value.hour * 3600 + value.minute * 60 + value.second + value.microsecond / 1e6) / 86400
+    if isinstance(value, timedelta):
+        return value.total_seconds() / 86400
+    return value
+
+DATE_TEXT_FORMATS = ("%Y-%m-%d", "%Y/%m/%d", "%Y-%m-%d %H:%M:%S", "%Y/%m/%d %H:%M:%S",
+                     "%Y-%m-%d %H:%M", "%Y/%m/%d %H:%M", "%Y年%m月%d日")
+
+def parse_date_text(text):
+    """把日期文字转换为序列号，无法识别时返回None"""
+    for date_format in DATE_TEXT_FORMATS:
+        try:
+            return to_serial(datetime.strptime(text.strip(), date_format))
+        except ValueError:
+            continue
+    return None
+
+def normalize_cell_value(value, data_type):
+    """把openpyxl读到的单元格值转换为引擎内部的表示：数字统一为float，日期时间为序列号"""
+    if data_type == "e":
+        return ExcelError(str(value))
+    if isinstance(value, (bool, str)):
+        return value
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, (datetime, date, time, timedelta)):
+        return to_serial(value)
+    return value
+
+def value_of(arg):
+    """取参数的单个值，错误值作为异常抛出"""
+    if isinstance(arg, Area):
+        arg = arg.scalar()
+    if isinstance(arg, ExcelError):
+        raise arg
+    return None if arg is MISSING else arg
+
+def to_number(arg):
+    """转换为数字：空白为0，逻辑值为1/0，文本按数字、百分比或日期解析"""
+    value = value_of(arg)
+    if value is None:
+        return 0.0
+    if isinstance(value, (bool, int, float)):
+        return float(value)
+    text = value.strip().replace(",", "")
+    try:
+        if text.endswith("%"):
+            return float(text[:-1]) / 100
+        return float(text)
+    except ValueError:
+        pass
+    serial = parse_date_text(value)
+    if serial is None:
+        raise ExcelError("#VALUE!")
+    return serial
+
+def number_text(number):
+    """数字转换为文本（与Excel常规格式一致，最多15位有效数字）"""
+    if number.is_integer() and abs(number) < 1e15:
+        return str(int(number))
+    return f"{number:.15g}".replace("e", "E")
+
+def to_text(arg):
+    """转换为文本"""
+    value = value_of(arg)
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, (int, float)):
+        return number_text(float(value))
+    return value
+
+def to_bool(arg):
+    """转换为逻辑值"""
+    value = value_of(arg)
+    if value is None:
+        return False
+    if isinstance(value, (bool, int, float)):
+        return value != 0
+    if value.upper() in ("TRUE", "FALSE"):
+        return value.upper() == "TRUE"
+    raise ExcelError("#VALUE!")
+
+def to_date(arg):
+    """把序列号（或日期文字）转换为datetime"""
+    serial = to_number(arg)
+    if serial < 0:
+        raise ExcelError("#NUM!")
+    return EXCEL_EPOCH + timedelta(days=serial)
+
+def require_area(arg):
+    """要求参数为区域引用"""
+    if not isinstance(arg, Area):
+        raise ExcelError("#VALUE!")
+    return arg
+
+def optional(args, index, default=None):
+    """取可选参数，省略时返回默认值"""
+    if index >= len(args) or args[index] is MISSING:
+        return default
+    return args[index]
+
+def type_rank(value):
+    """比较时的类型顺序：数字 < 文本 < 逻辑值"""
+    if isinstance(value, bool):
+        return 2
+    if isinstance(value, str):
+        return 1
+    return 0
+
+def compare(left, right):
+    """按Excel规则比较两个值，文本不区分大小写，返回-1/0/1"""
+    left, right = value_of(left), value_of(right)
+    if left is None:
+        left = "" if isinstance(right, str) else (False if isinstance(right, bool) else 0.0)
+    if right is None:
+        right = "" if isinstance(left, str) else (False if isinstance(left, bool) else 0.0)
+    left_rank, right_rank = type_rank(left), type_rank(right)
+    if left_rank != right_rank:
+        return -1 if left_rank < right_rank else 1
+    if isinstance(left, str):
+        left, right = left.lower(), right.lower()
+    return (left > right) - (left < right)
+
+def divide(left, right):
+    if right == 0:
+        raise ExcelError("#DIV/0!")
+    return left / right
+
+def power(left, right):
+    if left == 0 and right < 0:
+        raise ExcelError("#DIV/0!")
+    result = left ** right
+    if isinstance(result, complex):
+        raise ExcelError("#NUM!")
+    return result
+
+COMPARISONS = {
+    "=": lambda result: result == 0,
+    "<>": lambda result: result != 0,
+    "<": lambda result: result < 0,
+    ">": lambda result: result > 0,
+    "<=": lambda result: result <= 0,
+    ">=": lambda result: result >= 0,
+}
+
+ARITHMETIC = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": divide,
+    "^": power,
+}
+
+def round_number(number, digits, rounding=ROUND_HALF_UP):
+    """按Excel的方式舍入：先取15位有效数字，再按指定方式舍入，避免2.675变成2.67这类二进制误差"""
+    if digits >= 0 and abs(number) >= 1e15:
+        return number
+    quantum = Decimal(1).scaleb(-digits)
+    return float(Decimal(f"{number:.15g}").quantize(quantum, rounding=rounding))
+
+def wildcard_pattern(text):
+    """把Excel通配符（* ? 和转义用的 ~）转换为正则表达式，不含通配符时返回None"""
+    if not re.search(r"[*?~]", text):
+        return None
+    regex = []
+    for part in re.findall(r"~[*?~]|\*|\?|[^*?~]+|~", text):
+        if part == "*":
+            regex.append(".*")
+        elif part == "?":
+            regex.append(".")
+        elif len(part) == 2 and part[0] == "~":
+            regex.append(re.escape(part[1]))
+        else:
+            regex.append(re.escape(part))
+    return re.compile("".join(regex), re.IGNORECASE | re.DOTALL)
+
+def text_matcher(text):
+    """返回判断单元格值是否与文本相等的函数（不区分大小写，支持通配符）"""
+    pattern = wildcard_pattern(text)
+    if pattern is not None:
+        return lambda value: isinstance(value, str) and pattern.fullmatch(value) is not None
+    lowered = text.lower()
+    return lambda value: isinstance(value, str) and value.lower() == lowered
+
+def elementwise(function, values):
+    """对object数组逐个元素计算布尔函数"""
+    return np.frompyfunc(function, 1, 1)(values).astype(bool)
+
+# 函数表
+FUNCTIONS = {}
+
+def excel_function(*names):
+    """注册Excel函数，函数接收已计算的参数列表（区域参数为Area对象）"""
+    def register(function):
+        for name in names:
+            FUNCTIONS[name] = function
+        return function
+    return register
+
+def collect_numbers(args):
+    """收集数值参数：区域中只取数字（忽略文本、逻辑值和空白），直接给出的参数转换为数字"""
+    parts = []
+    for arg in args:
+        if isinstance(arg, Area):
+            arg.raise_error()
+            numbers = arg.numbers.ravel()
+            parts.append(numbers[~np.isnan(numbers)])
+        elif arg is not MISSING:
+            parts.append(np.array([to_number(arg)]))
+    return np.concatenate(parts) if parts else np.empty(0)
+
+@excel_function("SUM")
+def function_sum(args):
+    return float(collect_numbers(args).sum())
+
+@excel_function("AVERAGE")
+def function_average(args):
+    numbers = collect_numbers(args)
+    if numbers.size == 0:
+        raise ExcelError("#DIV/0!")
+    return float(numbers.mean())
+
+@excel_function("MIN")
+def function_min(args):
+    numbers = collect_numbers(args)
+    return float(numbers.min()) if numbers.size else 0.0
+
+@excel_function("MAX")
+def function_max(args):
+    numbers = collect_numbers(args)
+    return float(numbers.max()) if numbers.size else 0.0
+
+@excel_function("COUNT")
+def function_count(args):
+    total = 0
+    for arg in args:
+        if isinstance(arg, Area):
+            total += int(np.count_nonzero(~np.isnan(arg.numbers)))
+        elif arg is not MISSING:
+            try:
+                to_number(arg)
+                total += 1
+            except ExcelError:
+                pass
+    return float(total)
+
+@excel_function("COUNTA")
+def function_counta(args):
+    total = 0
+    for arg in args:
+        if isinstance(arg, Area):
+            total += sum(value is not None for value in arg.values.flat)
+        elif arg is not MISSING:
+            total += 1
+    return float(total)
+
+@excel_function("SUMPRODUCT")
+def function_sumproduct(args):
+    areas = [require_area(arg) for arg in args]
+    product = np.ones(areas[0].shape)
+    for area in areas:
+        if area.shape != product.shape:
+            raise ExcelError("#VALUE!")
+        area.raise_error()
+        product *= np.nan_to_num(area.numbers, nan=0.0)
+    return float(product.sum())
+
+@excel_function("ROUND")
+def function_round(args):
+    return round_number(to_number(args[0]), int(to_number(optional(args, 1, 0.0))))
+
+@excel_function("ROUNDUP")
+def function_roundup(args):
+    return round_number(to_number(args[0]), int(to_number(optional(args, 1, 0.0))), ROUND_UP)
+
+@excel_function("ROUNDDOWN")
+def function_rounddown(args):
+    return round_number(to_number(args[0]), int(to_number(optional(args, 1, 0.0))), ROUND_DOWN)
+
+@excel_function("INT")
+def function_int(args):
+    return float(math.floor(to_number(args[0])))
+
+@excel_function("ABS")
+def function_abs(args):
+    return abs(to_number(args[0]))
+
+@excel_function("MOD")
+def function_mod(args):
+    number, divisor = to_number(args[0]), to_number(args[1])
+    if divisor == 0:
+        raise ExcelError("#DIV/0!")
+    return number - divisor * math.floor(number / divisor)
+
+def logical_values(args):
+    """收集AND/OR的参数：区域中只取逻辑值和数字"""
+    results = []
+    for arg in args:
+        if isinstance(arg, Area):
+            arg.raise_error()
+            results.extend(bool(value) for value in arg.values.flat if isinstance(value, (bool, float)))
+        elif arg is not MISSING:
+            results.append(to_bool(arg))
+    if not results:
+        raise ExcelError("#VALUE!")
+    return results
+
+@excel_function("AND")
+def function_and(args):
+    return all(logical_values(args))
+
+@excel_function("OR")
+def function_or(args):
+    return any(logical_values(args))
+
+@excel_function("NOT")
+def function_not(args):
+    return not to_bool(args[0])
+
+@excel_function("ISNUMBER")
+def function_isnumber(args):
+    value = args[0].scalar() if isinstance(args[0], Area) else args[0]
+    return isinstance(value, float)
+
+@excel_function("ISTEXT")
+def function_istext(args):
+    value = args[0].scalar() if isinstance(args[0], Area) else args[0]
+    return isinstance(value, str)
+
+@excel_function("ISBLANK")
+def function_isblank(args):
+    return isinstance(args[0], Area) and args[0].scalar() is None
+
+def lookup_position(value, area, match_type):
+    """
+    在一行或一列中查找值的位置
+    
+    Args:
+        value: 要查找的值
+        area: 一行或一列的区域
+        match_type: 0 精确匹配（文本支持通配符）；1 升序数据中小于等于value的最大值；
+                    -1 降序数据中大于等于value的最小值
+    
+    Returns:
+        从0开始的位置，找不到时抛出#N/A
+    """
+    value = value_of(value)
+    values = area.values.ravel()
+    numbers = area.numbers.ravel()
+    if value is None:
+        raise ExcelError("#N/A")
+    
+    if match_type == 0:
+        if isinstance(value, float):
+            hits = np.flatnonzero(numbers == value)
+            if hits.size:
+                return int(hits[0])
+        else:
+            matcher = text_matcher(value) if isinstance(value, str) else (lambda item: item is value)
+            for index, item in enumerate(values):
+                if matcher(item):
+                    return index
+        raise ExcelError("#N/A")
+    
+    if isinstance(value, float):
+        valid = np.flatnonzero(~np.isnan(numbers))
+        if match_type > 0:
+            # 与Excel一样假设数据已排序，二分查找
+            index = np.searchsorted(numbers[valid], value, side="right") - 1
+            if index < 0:
+                raise ExcelError("#N/A")
+            return int(valid[index])
+        candidates = valid[numbers[valid] >= value]
+        if candidates.size == 0:
+            raise ExcelError("#N/A")
+        return int(candidates[-1])
+    
+    lowered = to_text(value).lower()
+    best = None
+    for index, item in enumerate(values):
+        if not isinstance(item, str):
+            continue
+        if (item.lower() <= lowered) if match_type > 0 else (item.lower() >= lowered):
+            best = index
+        else:
+            break
+    if best is None:
+        raise ExcelError("#N/A")
+    return best
+
+@excel_function("VLOOKUP")
+def function_vlookup(args):
+    table = require_area(args[1])
+    column = int(to_number(args[2]))
+    approximate = to_bool(optional(args, 3, True))
+    height, width = table.shape
+    if column < 1:
+        raise ExcelError("#VALUE!")
+    if column > width:
+        raise ExcelError("#REF!")
+    row = lookup_position(args[0], table.sub(1, 1, height, 1), 1 if approximate else 0) + 1
+    return table.sub(row, column, row, column)
+
+@excel_function("HLOOKUP")
+def function_hlookup(args):
+    table = require_area(args[1])
+    row = int(to_number(args[2]))
+    approximate = to_bool(optional(args, 3, True))
+    height, width = table.shape
+    if row < 1:
+        raise ExcelError("#VALUE!")
+    if row > height:
+        raise ExcelError("#REF!")
+    column = lookup_position(args[0], table.sub(1, 1, 1, width), 1 if approximate else 0) + 1
+    return table.sub(row, column, row, column)
+
+@excel_function("MATCH")
+def function_match(args):
+    area = require_area(args[1])
+    if min(area.shape) != 1:
+        raise ExcelError("#N/A")
+    match_type = int(to_number(optional(args, 2, 1.0)))
+    return float(lookup_position(args[0], area, max(-1, min(1, match_type))) + 1)
+
+@excel_function("INDEX")
+def function_index(args):
+    area = require_area(args[0])
+    height, width = area.shape
+    row = int(to_number(args[1]))
+    column = optional(args, 2)
+    if column is None:
+        if height == 1:
+            row, column = 1, row
+        else:
+            column = 1 if width == 1 else 0
+    else:
+        column = int(to_number(column))
+    if row < 0 or column < 0 or row > height or column > width:
+        raise ExcelError("#REF!")
+    r1, r2 = (1, height) if row == 0 else (row, row)
+    c1, c2 = (1, width) if column == 0 else (column, column)
+    return area.sub(r1, c1, r2, c2)
+
+CRITERIA_PATTERN = re.compile(r"(<=|>=|<>|<|>|=)?(.*)", re.DOTALL)
+
+NUMBER_COMPARISONS = {"<": np.less, ">": np.greater, "<=": np.less_equal, ">=": np.greater_equal}
+TEXT_COMPARISONS = {"<": operator.lt, ">": operator.gt, "<=": operator.le, ">=": operator.ge}
+
+def criteria_mask(area, criterion):
+    """
+    计算SUMIFS等函数的条件在区域上的布尔数组
+    
+    Args:
+        area: 条件区域
+        criterion: 条件，如 10、">=10"、"<>已完成"、"张*"
+    
+    Returns:
+        与区域形状相同的布尔数组
+    """
+    criterion = value_of(criterion)
+    if criterion is None:
+        criterion = 0.0
+    if isinstance(criterion, bool):
+        return elementwise(lambda value: value is criterion, area.values)
+    
+    comparison, operand, number = "=", None, criterion
+    if isinstance(criterion, str):
+        comparison, operand = CRITERIA_PATTERN.fullmatch(criterion).groups()
+        number = None
+        if operand.upper() in ("TRUE", "FALSE"):
+            flag = operand.upper() == "TRUE"
+            mask = elementwise(lambda value: value is flag, area.values)
+            return ~mask if comparison == "<>" else mask
+        if operand:
+            try:
+                number = to_number(operand)
+            except ExcelError:
+                pass
+    
+    if number is not None:
+        numbers = area.numbers
+        if comparison in (None, "="):
+            return numbers == number
+        if comparison == "<>":
+            return ~(numbers == number)
+        return NUMBER_COMPARISONS[comparison](numbers, number)
+    
+    values = area.values
+    if operand == "":
+        if comparison == "=":
+            return elementwise(lambda value: value is None, values)
+        if comparison == "<>":
+            return elementwise(lambda value: value is not None and value != "", values)
+        return elementwise(lambda value: value is None or value == "", values)
+    if comparison in (None, "=", "<>"):
+        mask = elementwise(text_matcher(operand), values)
+        return ~mask if comparison == "<>" else mask
+    lowered = operand.lower()
+    compare_text = TEXT_COMPARISONS[comparison]
+    return elementwise(lambda value: isinstance(value, str) and compare_text(value.lower(), lowered), values)
+
+def conditions_mask(args, shape):
+    """把多组(条件区域, 条件)的结果合并（同时满足）"""
+    mask = np.ones(shape, dtype=bool)
+    for area, criterion in zip(args[::2], args[1::2]):
+        area = require_area(area)
+        if area.shape != shape:
+            raise ExcelError("#VALUE!")
+        mask &= criteria_mask(area, criterion)
+    return mask
+
+def masked_numbers(area, mask):
+    """取区域中满足条件的数字，满足条件的单元格中有错误值时抛出"""
+    errors = area.errors & mask
+    if errors.any():
+        raise area.values[errors][0]
+    numbers = area.numbers[mask]
+    return numbers[~np.isnan(numbers)]
+
+def masked_average(area, mask):
+    numbers = masked_numbers(area, mask)
+    if numbers.size == 0:
+        raise ExcelError("#DIV/0!")
+    return float(numbers.mean())
+
+@excel_function("SUMIF")
+def function_sumif(args):
+    area = require_area(args[0])
+    total = require_area(optional(args, 2, area))
+    # 求和区域与条件区域大小不同时，Excel从求和区域左上角按条件区域的大小取值
+    total = total.sub(1, 1, *area.shape)
+    return float(masked_numbers(total, criteria_mask(area, args[1])).sum())
+
+@excel_function("SUMIFS")
+def function_sumifs(args):
+    total = require_area(args[0])
+    return float(masked_numbers(total, conditions_mask(args[1:], total.shape)).sum())
+
+@excel_function("COUNTIF")
+def function_countif(args):
+    return float(np.count_nonzero(criteria_mask(require_area(args[0]), args[1])))
+
+@excel_function("COUNTIFS")
+def function_countifs(args):
+    return float(np.count_nonzero(conditions_mask(args, require_area(args[0]).shape)))
+
+@excel_function("AVERAGEIF")
+def function_averageif(args):
+    area = require_area(args[0])
+    average = require_area(optional(args, 2, area)).sub(1, 1, *area.shape)
+    return masked_average(average, criteria_mask(area, args[1]))
+
+@excel_function("AVERAGEIFS")
+def function_averageifs(args):
+    average = require_area(args[0])
+    return masked_average(average, conditions_mask(args[1:], average.shape))
+
+def add_months(day, months):
+    """日期加上若干个月，日超出该月天数时取该月最后一天"""
+    year, month = divmod(day.year * 12 + day.month - 1 + months, 12)
+    return date(year, month + 1, min(day.day, calendar.monthrange(year, month + 1)[1]))
+
+@excel_function("DATE")
+def function_date(args):
+    year, month, day = (int(to_number(arg)) for arg in args[:3])
+    if 0 <= year < 1900:
+        year += 1900
+    start = add_months(date(year, 1, 1), month - 1)
+    return to_serial(start + timedelta(days=day - 1))
+
+@excel_function("YEAR")
+def function_year(args):
+    return float(to_date(args[0]).year)
+
+@excel_function("MONTH")
+def function_month(args):
+    return float(to_date(args[0]).month)
+
+@excel_function("DAY")
+def function_day(args):
+    return float(to_date(args[0]).day)
+
+@excel_function("TODAY")
+def function_today(args):
+    return to_serial(date.today())
+
+@excel_function("NOW")
+def function_now(args):
+    return to_serial(datetime.now())
+
+@excel_function("EDATE")
+def function_edate(args):
+    return to_serial(add_months(to_date(args[0]).date(), int(to_number(args[1]))))
+
+@excel_function("EOMONTH")
+def function_eomonth(args):
+    day = add_months(to_date(args[0]).date().replace(day=1), int(to_number(args[1])))
+    return to_serial(day.replace(day=calendar.monthrange(day.year, day.month)[1]))
+
+@excel_function("WEEKDAY")
+def function_weekday(args):
+    weekday = to_date(args[0]).weekday()
+    return_type = int(to_number(optional(args, 1, 1.0)))
+    if return_type == 1:
+        return float((weekday + 1) % 7 + 1)
+    if return_type == 2:
+        return float(weekday + 1)
+    if return_type == 3:
+        return float(weekday)
+    raise ExcelError("#NUM!")
+
+@excel_function("DATEDIF")
+def function_datedif(args):
+    start, end = to_date(args[0]).date(), to_date(args[1]).date()
+    unit = to_text(args[2]).upper()
+    if start > end:
+        raise ExcelError("#NUM!")
+    months = (end.year - start.year) * 12 + end.month - start.month - (end.day < start.day)
+    if unit == "Y":
+        return float(months // 12)
+    if unit == "M":
+        return float(months)
+    if unit == "D":
+        return float((end - start).days)
+    if unit == "YM":
+        return float(months % 12)
+    if unit == "MD":
+        return float((end - add_months(start, months)).days)
+    raise ExcelError("#NUM!")
+
+@excel_function("LEFT")
+def function_left(args):
+    count = int(to_number(optional(args, 1, 1.0)))
+    if count < 0:
+        raise ExcelError("#VALUE!")
+    return to_text(args[0])[:count]
+
+@excel_function("RIGHT")
+def function_right(args):
+    count = int(to_number(optional(args, 1, 1.0)))
+    if count < 0:
+        raise ExcelError("#VALUE!")
+    return to_text(args[0])[-count:] if count else ""
+
+@excel_function("MID")
+def function_mid(args):
+    start, count = int(to_number(args[1])), int(to_number(args[2]))
+    if start < 1 or count < 0:
+        raise ExcelError("#VALUE!")
+    return to_text(args[0])[start - 1:start - 1 + count]
+
+@excel_function("LEN")
+def function_len(args):
+    return float(len(to_text(args[0])))
+
+@excel_function("TRIM")
+def function_trim(args):
+    return re.sub(" +", " ", to_text(args[0])).strip(" ")
+
+@excel_function("UPPER")
+def function_upper(args):
+    return to_text(args[0]).upper()
+
+@excel_function("LOWER")
+def function_lower(args):
+    return to_text(args[0]).lower()
+
+@excel_function("CONCATENATE")
+def function_concatenate(args):
+    return "".join(to_text(arg) for arg in args)
+
+@excel_function("CONCAT")
+def function_concat(args):
+    parts = []
+    for arg in args:
+        if isinstance(arg, Area):
+            arg.raise_error()
+            parts.extend(to_text(value) for value in arg.values.flat)
+        else:
+            parts.append(to_text(arg))
+    return "".join(parts)
+
+@excel_function("SUBSTITUTE")
+def function_substitute(args):
+    text, old, new = to_text(args[0]), to_text(args[1]), to_text(args[2])
+    instance = optional(args, 3)
+    if not old:
+        return text
+    if instance is None:
+        return text.replace(old, new)
+    instance = int(to_number(instance))
+    if instance < 1:
+        raise ExcelError("#VALUE!")
+    position = -1
+    for _ in range(instance):
+        position = text.find(old, position + 1)
+        if position < 0:
+            return text
+    return text[:position] + new + text[position + len(old):]
+
+@excel_function("FIND")
+def function_find(args):
+    start = int(to_number(optional(args, 2, 1.0)))
+    text = to_text(args[1])
+    if start < 1 or start > len(text) + 1:
+        raise ExcelError("#VALUE!")
+    position = text.find(to_text(args[0]), start - 1)
+    if position < 0:
+        raise ExcelError("#VALUE!")
+    return float(position + 1)
+
+@excel_function("VALUE")
+def function_value(args):
+    return to_number(to_text(args[0]))
+
+DATE_FORMAT_TOKEN = re.compile(r'"[^"]*"|\\.|yyyy|yy|mm|m|dd|d|hh|h|ss|s|.', re.IGNORECASE | re.DOTALL)
+NUMBER_FORMAT_PATTERN = re.compile(r'(.*?)([#0,]*[0#](?:\.[0#]+)?|\.[0#]+)(%?)(.*)', re.DOTALL)
+
+def format_date(serial, pattern):
+    """按日期格式（yyyy、m、d、h、mm、s等）格式化序列号"""
+    moment = EXCEL_EPOCH + timedelta(days=serial, microseconds=500000)
+    tokens = DATE_FORMAT_TOKEN.findall(pattern)
+    kinds = [token[0].lower() if token[0].lower() in "ymdhs" and token[0] not in '"\\' else ""
+             for token in tokens]
+    parts = []
+    for index, token in enumerate(tokens):
+        kind = kinds[index]
+        if not kind:
+            parts.append(token[1:-1] if token.startswith('"') else token.lstrip("\\") or token)
+            continue
+        width = 2 if len(token) == 2 else 1
+        if kind == "y":
+            parts.append(str(moment.year) if len(token) == 4 else f"{moment.year % 100:02d}")
+            continue
+        if kind == "m":
+            # m紧跟在h之后或紧挨在s之前时表示分钟
+            previous = next((k for k in reversed(kinds[:index]) if k), "")
+            following = next((k for k in kinds[index + 1:] if k), "")
+            number = moment.minute if previous == "h" or following == "s" else moment.month
+        else:
+            number = {"d": moment.day, "h": moment.hour, "s": moment.second}[kind]
+        parts.append(f"{number:0{width}d}")
+    return "".join(parts)
+
+def format_number(number, pattern):
+    """按数字格式（0、0.00、#,##0、0%等，可带前后缀文字）格式化数字"""
+    match = NUMBER_FORMAT_PATTERN.fullmatch(pattern)
+    if match is None:
+        raise ExcelError("#VALUE!")
+    prefix, body, percent, suffix = match.groups()
+    if percent:
+        number *= 100
+    decimals = len(body.split(".")[1]) if "." in body else 0
+    number = round_number(number, decimals)
+    text = f"{abs(number):,.{decimals}f}" if "," in body else f"{abs(number):.{decimals}f}"
+    sign = "-" if number < 0 else ""
+    return sign + prefix.replace('"', "") + text + percent + suffix.replace('"', "")
+
+@excel_function("TEXT")
+def function_text(args):
+    value = value_of(args[0])
+    pattern = to_text(args[1])
+    if pattern == "@" or pattern.lower() in ("general", "g/通用格式"):
+        return to_text(value)
+    if isinstance(value, str):
+        try:
+            value = to_number(value)
+        except ExcelError:
+            return value
+    number = to_number(value)
+    if re.search(r"[ymdhs]", re.sub(r'"[^"]*"', "", pattern), re.IGNORECASE):
+        if number < 0:
+            raise ExcelError("#VALUE!")
+        return format_date(number, pattern)
+    return format_number(number, pattern)
+
+class NotVectorizable(Exception):
+    """公式块无法向量化计算，改为逐个单元格计算"""
+
+VECTOR_COMPARISONS = {"=": np.equal, "<>": np.not_equal, "<": np.less, ">": np.greater,
+                      "<=": np.less_equal, ">=": np.greater_equal}
+VECTOR_ARITHMETIC = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide, "^": np.power}
+VECTOR_ROUNDING = {"ROUND": ROUND_HALF_UP, "ROUNDUP": ROUND_UP, "ROUNDDOWN": ROUND_DOWN}
+
+def is_boolean(value):
+    """向量化计算的中间结果是否为逻辑值"""
+    return isinstance(value, (bool, np.bool_)) or (isinstance(value, np.ndarray) and value.dtype == bool)
+
+def as_numbers(value):
+    """逻辑值按1/0参与计算"""
+    return value.astype(float) if isinstance(value, np.ndarray) and value.dtype == bool else value * 1.0
+
+def round_vector(numbers, digits, rounding):
+    """对数组逐个按Excel的方式舍入，非有限值（错误）保持不变"""
+    result = np.array(numbers, dtype=float)
+    finite = np.isfinite(result)
+    result[finite] = [round_number(number, digits, rounding) for number in result[finite].tolist()]
+    return result
+
+def normalize_result(value):
+    """把公式的计算结果转换为单元格中保存的值"""
+    if isinstance(value, Area):
+        value = value.scalar()
+    if value is None or value is MISSING:
+        # 引用空白单元格的公式结果为0
+        return 0.0
+    if isinstance(value, (bool, np.bool_)):
+        return bool(value)
+    if isinstance(value, (int, float, np.number)):
+        value = float(value)
+        if not math.isfinite(value):
+            raise ExcelError("#NUM!")
+    return value
+
+class FormulaEngine:
+    """
+    内置公式引擎，用于计算没有缓存结果的公式（如openpyxl生成、从未在Excel中打开过的文件）
+    
+    加载时用openpyxl只读模式读取整个工作簿的常量和公式；计算时把公式解析为语法树，
+    从目标单元格出发建立依赖图并按拓扑顺序计算，区域参数用numpy数组表示
+    
+    每列中向下填充的同一个公式（R1C1形式相同）合并为一个公式块，依赖图和拓扑排序都以公式块为单位，
+    每个公式块尽量作为一个numpy表达式一次算完，不能向量化的部分逐个单元格计算
+    """
+    
+    def __init__(self, excel_path):
+        # {(工作表, 行, 列): 公式}
+        self.formulas = {}
+        # {工作表: (行数组, 列数组, 值列表)}
+        self.constants = {}
+        # {工作表: (有公式的列数组, {列: 行数组})}
+        self.formula_index = {}
+        # {工作表: (最大行, 最大列)}
+        self.extents = {}
+        self.sheet_names = {}
+        self.grids = {}
+        self.trees = {}
+        self.max_rows = self.max_columns = 1
+        # 不支持的函数 {函数名: 次数}
+        self.unsupported = Counter()
+        self.circular = 0
+        # 无法计算、不能冻结的公式单元格 {(工作表, 行, 列): 原因}，以及按位置的索引 {工作表: {列: 有序行列表}}
+        self.skipped = {}
+        self.skipped_rows = defaultdict(dict)
+        # 公式块 [(工作表, 列, 起始行, 结束行)] 和索引 {工作表: (列数组, {列: (起始行数组, 结束行数组, 编号数组)})}
+        self.blocks = None
+        self.block_index = {}
+        # 向量化计算时需要逐个单元格重新计算的行
+        self.vector_invalid = None
+        self.vectorized_blocks = self.vectorized_cells = 0
+        self.lazy_functions = {
+            "IF": self.function_if,
+            "IFERROR": self.function_iferror,
+            "IFNA": self.function_ifna,
+            "ISERROR": self.function_iserror,
+            "ISERR": self.function_iserr,
+            "ISNA": self.function_isna,
+        }
+        self.load(excel_path)
+    
+    def load(self, excel_path):
+        """读取工作簿中的常量和公式"""
+        wb = openpyxl.load_workbook(excel_path, read_only=True, data_only=False)
+        try:
+            for ws in wb.worksheets:
+                rows, cols, values = [], [], []
+                formula_rows = defaultdict(list)
+                max_row = max_col = 1
+                for row in ws.iter_rows():
+                    for cell in row:
+                        value = cell.value
+                        if value is None:
+                            continue
+                        max_row, max_col = max(max_row, cell.row), max(max_col, cell.column)
+                        if cell.data_type == "f":
+                            # 数组公式取其公式文字，模拟运算表等其他公式不计算
+                            text = getattr(value, "text", value)
+                            if isinstance(text, str):
+                                self.formulas[(ws.title, cell.row, cell.column)] = text
+                                formula_rows[cell.column].append(cell.row)
+                            continue
+                        rows.append(cell.row)
+                        cols.append(cell.column)
+                        values.append(normalize_cell_value(value, cell.data_type))
+                
+                self.sheet_names[ws.title.lower()] = ws.title
+                self.constants[ws.title] = (np.array(rows, dtype=np.int64), np.array(cols, dtype=np.int64), values)
+                self.formula_index[ws.title] = (np.array(sorted(formula_rows), dtype=np.int64),
+                                                {col: np.array(r, dtype=np.int64) for col, r in formula_rows.items()})
+                self.extents[ws.title] = (max_row, max_col)
+                self.max_rows = max(self.max_rows, max_row)
+                self.max_columns = max(self.max_columns, max_col)
+        finally:
+            wb.close()
+    
+    def grid(self, sheet):
+        """取工作表的网格，第一次使用时用常量填充"""
+        grid = self.grids.get(sheet)
+        if grid is None:
+            grid = SheetGrid(*self.extents[sheet])
+            rows, cols, values = self.constants[sheet]
+            if values:
+                grid.fill(rows, cols, values)
+            self.grids[sheet] = grid
+        return grid
+    
+    def resolve_sheet(self, name, current):
+        """引用中的工作表名（不区分大小写），没有时为公式所在的工作表"""
+        if name is None:
+            return current
+        sheet = self.sheet_names.get(name.lower())
+        if sheet is None:
+            raise ExcelError("#REF!")
+        return sheet
+    
+    def parse(self, key):
+        """解析公式，结果缓存；无法解析的公式计算时抛出UnsupportedFormula"""
+        tree = self.trees.get(key)
+        if tree is None:
+            try:
+                tree = FormulaParser(self.formulas[key]).parse()
+            except FormulaSyntaxError:
+                tree = ("unsupported", "无法解析的公式")
+            self.trees[key] = tree
+        return tree
+    
+    def block_references(self, block):
+        """
+        公式块中所有单元格引用的区域（每个引用取整个块范围内的并集）
+        
+        Args:
+            block: (工作表, 列, 起始行, 结束行)
+        
+        Returns:
+            生成器 (工作表, 起始行, 起始列, 结束行, 结束列)
+        """
+        sheet, col, start, end = block
+        span = end - start
+        for _, sheet_name, r1, c1, r2, c2, absolute in iter_nodes(self.parse((sheet, start, col)), "ref"):
+            try:
+                ref_sheet = self.resolve_sheet(sheet_name, sheet)
+            except ExcelError:
+                continue
+            if r2 is not None:
+                # 相对行引用随行号下移，绝对行引用不变
+                rows = [r1, r2] + [row + span for row, fixed in ((r1, absolute[0]), (r2, absolute[2])) if not fixed]
+                r1, r2 = min(rows), max(rows)
+            yield ref_sheet, r1, c1, r2, c2
+    
+    def is_self_dependent(self, block):
+        """公式块是否引用了自身所在的区域（如累计求和 D2=D1+C2）"""
+        sheet, col, start, end = block
+        for ref_sheet, r1, c1, r2, c2 in self.block_references(block):
+            if (ref_sheet == sheet and c1 <= col <= (MAX_COLUMNS if c2 is None else c2)
+                    and r1 <= end and (r2 is None or r2 >= start)):
+                return True
+        return False
+    
+    def build_blocks(self):
+        """
+        把每列中行号连续、R1C1形式相同的公式合并为公式块
+        
+        引用了自身所在区域的公式块拆回单个单元格，保证块内的单元格之间没有依赖关系
+        """
+        self.blocks = []
+        self.block_index = {}
+        for sheet, (columns, rows_by_column) in self.formula_index.items():
+            column_index = {}
+            for col in columns.tolist():
+                runs = []
+                template = None
+                for row in rows_by_column[col].tolist():
+                    formula = self.formulas[(sheet, row, col)]
+                    # 与上一行的公式向下填充一行的结果相同时并入同一个块，只有新块的第一个公式需要解析
+                    if template is not None and row == runs[-1][1] + 1:
+                        offset = row - runs[-1][0]
+                        if formula == template[0].format(*(base + offset for base in template[1])):
+                            runs[-1][1] = row
+                            continue
+                    runs.append([row, row])
+                    template = fill_template(formula)
+                
+                starts, ends, ids = [], [], []
+                for start, end in runs:
+                    pieces = [(start, end)]
+                    if end > start and self.is_self_dependent((sheet, col, start, end)):
+                        pieces = [(row, row) for row in range(start, end + 1)]
+                    for piece_start, piece_end in pieces:
+                        starts.append(piece_start)
+                        ends.append(piece_end)
+                        ids.append(len(self.blocks))
+                        self.blocks.append((sheet, col, piece_start, piece_end))
+                column_index[col] = (np.array(starts, dtype=np.int64), np.array(ends, dtype=np.int64),
+                                     np.array(ids, dtype=np.int64))
+            self.block_index[sheet] = (np.array(sorted(column_index), dtype=np.int64), column_index)
+    
+    def find_blocks(self, sheet, r1, c1, r2, c2):
+        """与区域重叠的公式块编号"""
+        columns, column_index = self.block_index[sheet]
+        start = np.searchsorted(columns, c1)
+        end = np.searchsorted(columns, MAX_COLUMNS if c2 is None else c2, side="right")
+        for col in columns[start:end].tolist():
+            starts, ends, ids = column_index[col]
+            first = np.searchsorted(ends, r1)
+            last = np.searchsorted(starts, MAX_ROWS if r2 is None else r2, side="right")
+            yield from ids[first:last].tolist()
+    
+    def build_order(self, cells):
+        """
+        从目标单元格所在的公式块出发，找出所有直接或间接引用的公式块，建立依赖图并拓扑排序
+        
+        Args:
+            cells: 目标公式单元格 [(工作表, 行, 列)]
+        
+        Returns:
+            (按计算顺序排列的公式块编号列表, 循环引用中的公式块编号列表)
+        """
+        if self.blocks is None:
+            self.build_blocks()
+        
+        nodes = {}
+        edges = []
+        stack = []
+        
+        def add(block):
+            if block not in nodes:
+                nodes[block] = len(nodes)
+                stack.append(block)
+            return nodes[block]
+        
+        # 每个公式单元格恰好属于一个公式块，按列分组后批量查找
+        targets = defaultdict(list)
+        for sheet, row, col in cells:
+            if (sheet, row, col) in self.formulas:
+                targets[(sheet, col)].append(row)
+        for (sheet, col), rows in targets.items():
+            _, ends, ids = self.block_index[sheet][1][col]
+            for block in np.unique(ids[np.searchsorted(ends, rows)]).tolist():
+                add(block)
+        
+        while stack:
+            block = stack.pop()
+            index = nodes[block]
+            for ref in self.block_references(self.blocks[block]):
+                for precedent in self.find_blocks(*ref):
+                    edges.append((add(precedent), index))
+        
+        # Kahn算法
+        blocks = list(nodes)
+        indegree = [0] * len(blocks)
+        dependents = [[] for _ in blocks]
+        for source, target in edges:
+            dependents[source].append(target)
+            indegree[target] += 1
+        queue = deque(index for index, degree in enumerate(indegree) if degree == 0)
+        order = []
+        while queue:
+            index = queue.popleft()
+            order.append(blocks[index])
+            for target in dependents[index]:
+                indegree[target] -= 1
+                if indegree[target] == 0:
+                    queue.append(target)
+        cyclic = [blocks[index] for index, degree in enumerate(indegree) if degree > 0]
+        return order, cyclic
+    
+    def evaluate(self, cells):
+        """
+        计算公式单元格的值
+        
+        Args:
+            cells: 目标公式单元格 [(工作表, 行, 列)]
+        
+        Returns:
+            字典 {(工作表, 行, 列): 值}，包括计算过程中用到的其他公式单元格；
+            错误值为ExcelError。无法计算的单元格（不支持的函数、无法解析、循环引用，
+            以及引用了这些单元格的公式）记录在self.skipped中，不能用结果替换公式
+        """
+        order, cyclic = self.build_order(cells)
+        results = {}
+        for block in cyclic:
+            sheet, col, start, end = self.blocks[block]
+            self.circular += end - start + 1
+            for row in range(start, end + 1):
+                results[(sheet, row, col)] = None
+                self.skip((sheet, row, col), "循环引用")
+        for block in order:
+            if self.depends_on_skipped(block):
+                sheet, col, start, end = self.blocks[block]
+                for row in range(start, end + 1):
+                    results[(sheet, row, col)] = None
+                    self.skip((sheet, row, col), "引用了无法计算的单元格")
+                continue
+            results.update(self.evaluate_block(block))
+        return results
+    
+    def skip(self, key, reason):
+        """记录无法计算的单元格"""
+        self.skipped[key] = reason
+        sheet, row, col = key
+        bisect.insort(self.skipped_rows[sheet].setdefault(col, []), row)
+    
+    def depends_on_skipped(self, block):
+        """公式块引用的区域中是否有无法计算的单元格"""
+        if not self.skipped:
+            return False
+        for ref_sheet, r1, c1, r2, c2 in self.block_references(self.blocks[block]):
+            columns = self.skipped_rows.get(ref_sheet)
+            if not columns:
+                continue
+            r2 = MAX_ROWS if r2 is None else r2
+            c2 = MAX_COLUMNS if c2 is None else c2
+            for col, rows in columns.items():
+                if c1 <= col <= c2 and bisect.bisect_left(rows, r1) < bisect.bisect_right(rows, r2):
+                    return True
+        return False
+    
+    def evaluate_block(self, block):
+        """
+        计算一个公式块：先尝试对整个块向量化计算，无法向量化的块和结果为错误值的行逐个单元格计算
+        
+        Returns:
+            字典 {(工作表, 行, 列): 值}
+        """
+        sheet, col, start, end = self.blocks[block]
+        keys = [(sheet, row, col) for row in range(start, end + 1)]
+        grid = self.grid(sheet)
+        
+        values = None
+        if len(keys) > 1:
+            tree = self.parse(keys[0])
+            if all(name in FUNCTIONS or name in self.lazy_functions for _, name, _ in iter_nodes(tree, "call")):
+                self.vector_invalid = np.zeros(len(keys), dtype=bool)
+                try:
+                    with np.errstate(all="ignore"):
+                        values = self.evaluate_vector(tree, (sheet, start, col), len(keys))
+                except NotVectorizable:
+                    values = None
+        
+        if values is None:
+            results = {}
+            for key in keys:
+                value = self.evaluate_cell(key)
+                grid.set(key[1], col, value)
+                results[key] = value
+            return results
+        
+        values = np.broadcast_to(values, (len(keys),))
+        invalid = self.vector_invalid
+        if values.dtype != bool:
+            values = values.astype(float)
+            invalid = invalid | ~np.isfinite(values)
+        grid.set_column(start, col, values)
+        results = dict(zip(keys, values.tolist()))
+        
+        # 含有错误（除以0等）的行按单个单元格重新计算，得到对应的错误值
+        for index in np.flatnonzero(invalid).tolist():
+            value = self.evaluate_cell(keys[index])
+            grid.set(keys[index][1], col, value)
+            results[keys[index]] = value
+        self.vectorized_blocks += 1
+        self.vectorized_cells += len(keys) - int(np.count_nonzero(invalid))
+        return results
+    
+    def evaluate_vector(self, node, position, length):
+        """
+        对公式块中的所有行一次计算语法树节点
+        
+        Args:
+            node: 语法树节点（公式块第一行的公式）
+            position: 公式块第一行的(工作表, 行, 列)
+            length: 公式块的行数
+        
+        Returns:
+            长度为length的数组（数字或逻辑值），或对所有行相同的标量；错误用NaN/inf表示，
+            遇到文本、错误值或不支持向量化的函数时抛出NotVectorizable
+        """
+        kind = node[0]
+        if kind in ("number", "boolean"):
+            return node[1]
+        if kind == "missing":
+            return 0.0
+        if kind in ("string", "name", "error", "unsupported"):
+            raise NotVectorizable()
+        if is_invariant(node):
+            return self.invariant_value(node, position)
+        if kind == "ref":
+            area = self.row_window(node, position, length)
+            if area.shape[1] != 1:
+                raise NotVectorizable()
+            values, numbers = area.values.ravel(), area.numbers.ravel()
+            blank = np.equal(values, None)
+            # 只处理数字和空白（空白按0计算），文本、逻辑值和错误值所在的行之后逐个单元格计算
+            other = np.isnan(numbers) & ~blank
+            if other.all():
+                raise NotVectorizable()
+            self.vector_invalid |= other
+            return np.where(blank, 0.0, numbers)
+        if kind == "negate":
+            return -as_numbers(self.evaluate_vector(node[1], position, length))
+        if kind == "percent":
+            return as_numbers(self.evaluate_vector(node[1], position, length)) / 100
+        if kind == "binary":
+            _, op, left, right = node
+            if op == "&":
+                raise NotVectorizable()
+            left = self.evaluate_vector(left, position, length)
+            right = self.evaluate_vector(right, position, length)
+            if op in VECTOR_COMPARISONS:
+                # 逻辑值与数字比较的规则不同（TRUE大于任何数字）
+                if is_boolean(left) or is_boolean(right):
+                    raise NotVectorizable()
+                self.mark_invalid(left, right)
+                return VECTOR_COMPARISONS[op](left, right)
+            return VECTOR_ARITHMETIC[op](as_numbers(left), as_numbers(right))
+        return self.vector_call(node, position, length)
+    
+    def vector_call(self, node, position, length):
+        """向量化计算函数调用，只支持逐行计算的常用函数"""
+        _, name, args = node
+        if name in ("SUM", "AVERAGE", "MIN", "MAX"):
+            return self.vector_aggregate(name, args, position, length)
+        if name == "IF":
+            condition = self.vector_condition(args[0], position, length)
+            when_true = self.evaluate_vector(args[1], position, length) if len(args) > 1 else True
+            when_false = self.evaluate_vector(args[2], position, length) if len(args) > 2 else False
+            if is_boolean(when_true) != is_boolean(when_false):
+                raise NotVectorizable()
+            return np.where(condition, when_true, when_false)
+        if name == "IFERROR":
+            value = self.evaluate_vector(args[0], position, length)
+            fallback = self.evaluate_vector(args[1], position, length)
+            if is_boolean(value):
+                return value
+            if is_boolean(fallback):
+                raise NotVectorizable()
+            return np.where(np.isfinite(value), value, fallback)
+        if name in ("AND", "OR"):
+            # AND/OR忽略空白单元格（向量化时空白按0即FALSE计算），含空白的行之后逐个单元格计算
+            for arg in args:
+                if arg[0] != "ref":
+                    continue
+                if is_invariant(arg):
+                    raise NotVectorizable()
+                area = self.row_window(arg, position, length)
+                if area.shape[1] == 1:
+                    self.vector_invalid |= np.equal(area.values.ravel(), None)
+            conditions = [np.broadcast_to(self.vector_condition(arg, position, length), (length,)) for arg in args]
+            return (np.logical_and if name == "AND" else np.logical_or).reduce(conditions)
+        if name == "NOT":
+            return ~np.broadcast_to(self.vector_condition(args[0], position, length), (length,))
+        if name in VECTOR_ROUNDING:
+            digits = args[1] if len(args) > 1 else ("number", 0.0)
+            if not is_invariant(digits):
+                raise NotVectorizable()
+            number = as_numbers(self.evaluate_vector(args[0], position, length))
+            return round_vector(np.broadcast_to(number, (length,)),
+                                int(self.invariant_value(digits, position)), VECTOR_ROUNDING[name])
+        if name == "ABS":
+            return np.abs(as_numbers(self.evaluate_vector(args[0], position, length)))
+        if name == "INT":
+            return np.floor(as_numbers(self.evaluate_vector(args[0], position, length)))
+        if name == "MOD":
+            number = as_numbers(self.evaluate_vector(args[0], position, length))
+            divisor = as_numbers(self.evaluate_vector(args[1], position, length))
+            return np.where(divisor == 0, np.nan, number - divisor * np.floor(number / divisor))
+        raise NotVectorizable()
+    
+    def vector_aggregate(self, name, args, position, length):
+        """向量化计算SUM、AVERAGE、MIN、MAX：每个参数先按行归约为和、个数、最小值和最大值"""
+        total = np.zeros(length)
+        count = np.zeros(length)
+        low = np.full(length, np.inf)
+        high = np.full(length, -np.inf)
+        for arg in args:
+            if arg[0] == "ref" and is_invariant(arg, True):
+                # 固定区域（如$C$2:$C$100）对所有行相同，只取一次
+                try:
+                    numbers = collect_numbers([self.evaluate_node(arg, position)])
+                except ExcelError:
+                    raise NotVectorizable()
+                sums, counts = numbers.sum(), numbers.size
+                mins, maxs = numbers.min(initial=np.inf), numbers.max(initial=-np.inf)
+            elif arg[0] == "ref":
+                # 同一行中的区域（如C2:E2），区域中的文本、逻辑值和空白被忽略
+                area = self.row_window(arg, position, length)
+                if area.errors.any():
+                    raise NotVectorizable()
+                numbers = area.numbers
+                valid = ~np.isnan(numbers)
+                sums, counts = np.where(valid, numbers, 0.0).sum(axis=1), valid.sum(axis=1)
+                mins = np.where(valid, numbers, np.inf).min(axis=1)
+                maxs = np.where(valid, numbers, -np.inf).max(axis=1)
+            else:
+                sums = mins = maxs = as_numbers(self.evaluate_vector(arg, position, length))
+                counts = 1
+            total += sums
+            count += counts
+            low = np.minimum(low, mins)
+            high = np.maximum(high, maxs)
+        
+        if name == "SUM":
+            return total
+        if name == "AVERAGE":
+            # 没有数字时为NaN，之后按单个单元格计算得到#DIV/0!
+            return total / count
+        return np.where(count > 0, low if name == "MIN" else high, 0.0)
+    
+    def vector_condition(self, node, position, length):
+        """计算作为条件使用的参数，数字非0为真；参与判断的错误所在的行记为无效"""
+        value = self.evaluate_vector(node, position, length)
+        if is_boolean(value):
+            return value
+        self.mark_invalid(value)
+        return np.not_equal(value, 0)
+    
+    def mark_invalid(self, *values):
+        """比较和条件判断会丢失NaN/inf表示的错误，把这些行记下来，之后逐个单元格计算"""
+        for value in values:
+            if not is_boolean(value):
+                self.vector_invalid |= ~np.isfinite(value)
+    
+    def invariant_value(self, node, position):
+        """与行无关的部分（常量、绝对引用、固定区域的汇总等）只用标量方式计算一次"""
+        try:
+            value = value_of(self.evaluate_node(node, position))
+        except (ExcelError, UnsupportedFormula, ArithmeticError, ValueError, IndexError):
+            raise NotVectorizable()
+        if value is None:
+            return 0.0
+        if isinstance(value, (bool, float)):
+            return value
+        raise NotVectorizable()
+    
+    def row_window(self, node, position, length):
+        """相对行引用在公式块各行对应的区域：第i行取引用下移i行后的那一行，返回length行的Area"""
+        _, sheet_name, r1, c1, r2, c2, absolute = node
+        if r1 != r2 or absolute[0] or absolute[2] or c2 is None:
+            raise NotVectorizable()
+        try:
+            sheet = self.resolve_sheet(sheet_name, position[0])
+        except ExcelError:
+            raise NotVectorizable()
+        return Area(self.grid(sheet), r1, c1, r1 + length - 1, c2, position[1:])
+    
+    def evaluate_cell(self, key):
+        """计算一个公式单元格"""
+        sheet, row, col = key
+        try:
+            return normalize_result(self.evaluate_node(self.parse(key), (sheet, row, col)))
+        except ExcelError as error:
+            return error
+        except UnsupportedFormula as error:
+            # 网格中按#NAME?保存，引用它的公式块在计算前就会被跳过
+            self.skip(key, str(error))
+            return ExcelError("#NAME?")
+        except ZeroDivisionError:
+            return ExcelError("#DIV/0!")
+        except (ArithmeticError, ValueError):
+            return ExcelError("#NUM!")
+        except IndexError:
+            # 函数缺少必需的参数
+            return ExcelError("#VALUE!")
+    
+    def evaluate_node(self, node, position):
+        """
+        计算语法树节点
+        
+        Args:
+            node: 语法树节点
+            position: 公式所在的(工作表, 行, 列)
+        
+        Returns:
+            数字、文本、逻辑值、None或Area，错误值作为ExcelError抛出
+        """
+        kind = node[0]
+        if kind in ("number", "string", "boolean"):
+            return node[1]
+        if kind == "ref":
+            _, sheet_name, r1, c1, r2, c2, _ = node
+            sheet = self.resolve_sheet(sheet_name, position[0])
+            return Area(self.grid(sheet), r1, c1, self.max_rows if r2 is None else r2,
+                        self.max_columns if c2 is None else c2, position[1:])
+        if kind == "binary":
+            _, op, left, right = node
+            left, right = self.evaluate_node(left, position), self.evaluate_node(right, position)
+            if op in COMPARISONS:
+                return COMPARISONS[op](compare(left, right))
+            if op == "&":
+                return to_text(left) + to_text(right)
+            return ARITHMETIC[op](to_number(left), to_number(right))
+        if kind == "call":
+            _, name, args = node
+            lazy = self.lazy_functions.get(name)
+            if lazy is not None:
+                return lazy(args, position)
+            function = FUNCTIONS.get(name)
+            if function is None:
+                self.unsupported[name] += 1
+                raise UnsupportedFormula(f"不支持的函数 {name}")
+            return function([self.evaluate_node(arg, position) for arg in args])
+        if kind == "negate":
+            return -to_number(self.evaluate_node(node[1], position))
+        if kind == "percent":
+            return to_number(self.evaluate_node(node[1], position)) / 100
+        if kind == "missing":
+            return MISSING
+        if kind == "error":
+            raise ExcelError(node[1])
+        if kind == "unsupported":
+            self.unsupported[f"({node[1]})"] += 1
+            raise UnsupportedFormula(node[1])
+        # 定义的名称
+        self.unsupported["(定义的名称)"] += 1
+        raise UnsupportedFormula(f"定义的名称 {node[1]}")
+    
+    def function_if(self, args, position):
+        if to_bool(self.evaluate_node(args[0], position)):
+            branch = args[1] if len(args) > 1 else ("boolean", True)
+        else:
+            branch = args[2] if len(args) > 2 else ("boolean", False)
+        value = self.evaluate_node(branch, position)
+        return 0.0 if value is MISSING else value
+    
+    def error_code(self, node, position):
+        """计算参数，返回(值, 错误代码或None)"""
+        try:
+            value = self.evaluate_node(node, position)
+            value_of(value)
+            return value, None
+        except ExcelError as error:
+            return None, error.code
+    
+    def function_iferror(self, args, position):
+        value, code = self.error_code(args[0], position)
+        return value if code is None else self.evaluate_node(args[1], position)
+    
+    def function_ifna(self, args, position):
+        value, code = self.error_code(args[0], position)
+        if code is None:
+            return value
+        if code != "#N/A":
+            raise ExcelError(code)
+        return self.evaluate_node(args[1], position)
+    
+    def function_iserror(self, args, position):
+        return self.error_code(args[0], position)[1] is not None
+    
+    def function_iserr(self, args, position):
+        return self.error_code(args[0], position)[1] not in (None, "#N/A")
+    
+    def function_isna(self, args, position):
+        return self.error_code(args[0], position)[1] == "#N/A"
+
+def output_value(value):
+    """把引擎的计算结果转换为写入单元格的值"""
+    if isinstance(value, ExcelError):
+        return str(value)
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return int(value)
+    return value
+
+def print_engine_summary(engine, keys, results):
+    """输出公式引擎的计算情况"""
+    skipped = sum(key in engine.skipped for key in keys)
+    errors = sum(isinstance(results.get(key), ExcelError) for key in keys if key not in engine.skipped)
+    print(f"  - 公式引擎计算了 {len(keys) - skipped} 个单元格，其中 {errors} 个结果为错误值")
+    if skipped:
+        print(f"  - {skipped} 个单元格无法计算，保留公式不冻结")
+    if engine.unsupported:
+        names = "、".join(f"{name}({count})" for name, count in engine.unsupported.most_common())
+        print(f"  - 不支持的函数或内容: {names}")
+    if engine.vectorized_cells:
+        print(f"  - 其中 {engine.vectorized_cells} 个单元格按 {engine.vectorized_blocks} 个公式块向量化计算")
+    if engine.circular:
+        print(f"  - {engine.circular} 个单元格存在循环引用，未计算")
+
+# 易失函数：工作簿中任何单元格改动后都会重新计算
+VOLATILE_FUNCTIONS = {"NOW", "TODAY", "RAND", "RANDBETWEEN", "RANDARRAY", "OFFSET", "INDIRECT", "CELL", "INFO"}
+
+STRING_LITERAL_PATTERN = re.compile(r'"(?:[^"]|"")*"')
+FUNCTION_NAME_PATTERN = re.compile(r"([^\W\d][\w.]*)\s*\(")
+
+# 公式文字中的单元格和区域引用，只用于估计成本，不需要完整解析公式
+REFERENCE_SCAN_PATTERN = re.compile(r"""
+    (?<![\w.$'!])
+    (?:(?:'(?:[^']|'')+'|[^\W\d][\w.]*)!)?
+    (?:\$?[A-Za-z]{1,3}\$?\d+(?::\$?[A-Za-z]{1,3}\$?\d+)?
+      |\$?[A-Za-z]{1,3}:\$?[A-Za-z]{1,3}
+      |\$?\d+:\$?\d+)
+    (?![\w(!])
+""", re.VERBOSE)
+
+class FormulaSelector:
+    """
+    按列、公式内容和处理范围选择需要冻结的公式，并统计冻结后减少的重算成本
+    
+    重算成本按公式引用的单元格数估计：整列/整行引用按所在工作表的已用区域计算，
+    OFFSET、INDIRECT等函数实际引用的区域无法静态确定，只计算其参数中的引用
+    """
+    
+    REPORT_HEADER = ["工作表", "单元格", "公式", "冻结原因", "估计重算成本", "易失函数"]
+    
+    def __init__(self, columns, extents):
+        """
+        Args:
+            columns: 要处理的列配置列表
+            extents: 各工作表的已用区域 {工作表名: (最大行, 最大列)}
+        """
+        self.columns = set()
+        for col_ref in columns:
+            self.columns.update(parse_column_reference(col_ref))
+        self.functions = {name.upper() for name in freeze_functions}
+        self.pattern = re.compile(freeze_pattern) if freeze_pattern else None
+        self.full_references = freeze_full_references
+        self.cost_threshold = freeze_cost_threshold
+        # 是否需要读取公式文字（只按列选择时不需要）
+        self.by_content = bool(self.functions or self.pattern or self.full_references
+                               or self.cost_threshold is not None)
+        self.sheets = {name.lower() for name in sheets_to_process}
+        self.ranges = []
+        for text in ranges_to_process:
+            _, sheet, r1, c1, r2, c2, _ = parse_reference(text)
+            self.ranges.append((sheet.lower() if sheet else None, r1, c1, r2 or MAX_ROWS, c2 or MAX_COLUMNS))
+        self.extents = {name.lower(): extent for name, extent in extents.items()}
+        self.analysis_cache = {}
+        
+        # 统计
+        self.count = 0
+        self.total_cost = 0
+        self.volatile_count = 0
+        self.volatile_cost = 0
+        self.reasons = Counter()
+        self.skipped = Counter()
+        self.report = None
+        self.writer = None
+    
+    def open_report(self, path):
+        """打开报告文件，之后冻结的公式逐条写入"""
+        self.report = open(path, "w", encoding="utf-8-sig", newline="")
+        self.writer = csv.writer(self.report)
+        self.writer.writerow(self.REPORT_HEADER)
+    
+    def close_report(self):
+        if self.report is not None:
+            self.report.close()
+            self.report = self.writer = None
+    
+    def in_scope(self, sheet_name, row, col):
+        """判断单元格是否在处理范围（工作表和区域）内"""
+        sheet = sheet_name.lower()
+        if self.sheets and sheet not in self.sheets:
+            return False
+        if not self.ranges:
+            return True
+        return any((range_sheet is None or range_sheet == sheet) and r1 <= row <= r2 and c1 <= col <= c2
+                   for range_sheet, r1, c1, r2, c2 in self.ranges)
+    
+    def is_candidate(self, sheet_name, row, col):
+        """不看公式内容时单元格是否可能被选中，用于跳过不需要读取公式文字的单元格"""
+        if not self.in_scope(sheet_name, row, col):
+            return False
+        return self.by_content or col in self.columns
+    
+    def analyze(self, sheet_name, formula):
+        """
+        分析公式文字
+        
+        Returns:
+            (使用的函数名集合, 是否有整列/整行引用, 估计重算成本)
+        """
+        key = (sheet_name, formula)
+        result = self.analysis_cache.get(key)
+        if result is not None:
+            return result
+        
+        text = STRING_LITERAL_PATTERN.sub('""', formula)
+        functions = set()
+        for name in FUNCTION_NAME_PATTERN.findall(text):
+            name = name.upper()
+            for prefix in FUNCTION_PREFIXES:
+                if name.startswith(prefix):
+                    name = name[len(prefix):]
+                    break
+            functions.add(name)
+        
+        full = False
+        cost = 1
+        for match in REFERENCE_SCAN_PATTERN.finditer(text):
+            _, sheet, r1, c1, r2, c2, _ = parse_reference(match.group())
+            max_row, max_col = self.extents.get((sheet or sheet_name).lower(), (1, 1))
+            if r2 is None or c2 is None:
+                full = True
+            rows = max(max_row - r1 + 1, 0) if r2 is None else r2 - r1 + 1
+            cols = max(max_col - c1 + 1, 0) if c2 is None else c2 - c1 + 1
+            cost += rows * cols
+        
+        if len(self.analysis_cache) > 100000:
+            self.analysis_cache.clear()
+        result = self.analysis_cache[key] = (functions, full, cost)
+        return result
+    
+    def match(self, sheet_name, row, col, formula):
+        """
+        判断公式单元格是否需要冻结
+        
+        Args:
+            sheet_name: 工作表名
+            row, col: 行号、列号
+            formula: 公式文字（不含开头的等号）
+        
+        Returns:
+            (冻结原因列表, 估计重算成本, 是否含易失函数)，不需要冻结时返回None
+        """
+        if not self.is_candidate(sheet_name, row, col):
+            return None
+        functions, full, cost = self.analyze(sheet_name, formula)
+        reasons = []
+        if col in self.columns:
+            reasons.append("指定列")
+        reasons.extend(f"函数 {name}" for name in sorted(functions & self.functions))
+        if self.pattern is not None and self.pattern.search(formula):
+            reasons.append("正则匹配")
+        if self.full_references and full:
+            reasons.append("整列/整行引用")
+        if self.cost_threshold is not None and cost >= self.cost_threshold:
+            reasons.append("重算成本高")
+        if not reasons:
+            return None
+        return reasons, cost, bool(functions & VOLATILE_FUNCTIONS)
+    
+    def record(self, sheet_name, ref, formula, reasons, cost, volatile):
+        """记录一个被冻结的公式"""
+        self.count += 1
+        self.total_cost += cost
+        if volatile:
+            self.volatile_count += 1
+            self.volatile_cost += cost
+        self.reasons.update(reasons)
+        if self.writer is not None:
+            self.writer.writerow([sheet_name, ref, "=" + formula, "；".join(reasons), cost, "是" if volatile else ""])
+    
+    def skip(self, sheet_name, ref, formula, reason):
+        """记录一个选中但没有缓存值、内置引擎也无法计算，因此保留公式的单元格"""
+        self.skipped[reason] += 1
+        if self.writer is not None:
+            self.writer.writerow([sheet_name, ref, "=" + formula, f"未冻结：{reason}", "", ""])
+    
+    def print_summary(self):
+        """输出冻结原因和减少的重算成本"""
+        if self.skipped:
+            reasons = "、".join(f"{reason} {count} 个" for reason, count in self.skipped.most_common())
+            print(f"有 {sum(self.skipped.values())} 个选中的公式无法计算，已保留公式: {reasons}")
+        if not self.count:
+            return
+        reasons = "、".join(f"{reason} {count} 个" for reason, count in self.reasons.most_common())
+        print(f"冻结原因: {reasons}")
+        print(f"估计每次完整重算减少读取约 {self.total_cost} 个单元格")
+        if self.volatile_count:
+            print(f"其中 {self.volatile_count} 个公式含易失函数（任何改动都会触发重算），"
+                  f"约 {self.volatile_cost} 个单元格")
+        if freeze_report_file:
+            print(f"冻结公式的报告已保存为: {freeze_report_file}")
+
 def convert_formulas_to_values(excel_path, columns):
     """
-    将指定列的公式单元格转换为它们的计算结果（固定值）
+    将选中的公式单元格转换为它们的计算结果（固定值）
     
     Args:
         excel_path: Excel文件路径
@@ -62,16 +2182,23 @@ def convert_formulas_to_values(excel_path, columns):
         # 同时打开一个data_only=True的工作簿，用于获取公式计算结果
         wb_values = openpyxl.load_workbook(excel_path, data_only=True)
         
-        # 解析所有要处理的列索引
-        column_indices = []
-        for col_ref in columns:
-            column_indices.extend(parse_column_reference(col_ref))
+        selector = FormulaSelector(columns, {ws.title: (ws.max_row, ws.max_column) for ws in wb.worksheets})
+        if freeze_report_file:
+            selector.open_report(freeze_report_file)
+        
+        # 只按列选择时只需要检查指定的列，按公式内容选择时检查所有列
+        if selector.by_content:
+            column_indices = None
+        else:
+            column_indices = sorted(selector.columns)
         
-        # 去重并排序
-        column_indices = sorted(set(column_indices))
+        # 没有缓存计算结果的公式单元格 {(工作表, 行, 列): (公式, 选择结果, 原始公式)}，计算后再记录
+        missing = {}
         
         # 处理每个工作表
         for sheet_name in wb.sheetnames:
+            if selector.sheets and sheet_name.lower() not in selector.sheets:
+                continue
             ws = wb[sheet_name]
             ws_values = wb_values[sheet_name]
             
@@ -83,11 +2210,18 @@ def convert_formulas_to_values(excel_path, columns):
             # 遍历每一行
             for row in range(1, ws.max_row + 1):
                 # 只处理指定的列
-                for col_idx in column_indices:
+                for col_idx in column_indices if column_indices is not None else range(1, ws.max_column + 1):
                     cell = ws.cell(row=row, column=col_idx)
                     
                     # 检查单元格是否包含公式
                     if cell.data_type == 'f':
+                        # 数组公式取其公式文字
+                        formula = getattr(cell.value, "text", cell.value)
+                        formula = formula[1:] if isinstance(formula, str) and formula.startswith("=") else ""
+                        selection = selector.match(sheet_name, row, col_idx, formula)
+                        if selection is None:
+                            continue
+                        
                         # 获取对应的计算结果
                         value_cell = ws_values.cell(row=row, column=col_idx)
                         
@@ -96,6 +2230,10 @@ def convert_formulas_to_values(excel_path, columns):
                         
                         # 将公式替换为计算结果
                         cell.value = value_cell.value
+                        if value_cell.value is None and evaluate_missing_values:
+                            missing[(sheet_name, row, col_idx)] = (formula, selection, original_formula)
+                        else:
+                            selector.record(sheet_name, cell.coordinate, formula, *selection)
                         
                         # 保持原始格式
                         cell.number_format = value_cell.number_format
@@ -109,17 +2247,434 @@ def convert_formulas_to_values(excel_path, columns):
             
             print(f"  - 工作表 '{sheet_name}' 中共处理了 {formula_count} 个公式单元格")
         
+        if missing:
+            print(f"有 {len(missing)} 个公式没有缓存的计算结果，正在用内置公式引擎计算...")
+            engine = FormulaEngine(excel_path)
+            results = engine.evaluate(list(missing))
+            for key, (formula, selection, original_formula) in missing.items():
+                sheet_name, row, col_idx = key
+                cell = wb[sheet_name].cell(row=row, column=col_idx)
+                if key in engine.skipped:
+                    # 结果不可信，恢复公式
+                    cell.value = original_formula
+                    selector.skip(sheet_name, cell.coordinate, formula, engine.skipped[key])
+                else:
+                    cell.value = output_value(results.get(key))
+                    selector.record(sheet_name, cell.coordinate, formula, *selection)
+            print_engine_summary(engine, list(missing), results)
+        
+        selector.close_report()
+        selector.print_summary()
+        
         return wb
     
     except Exception as e:
         print(f"处理过程中出错: {str(e)}")
         return None
 
+def read_worksheet_parts(zf):
+    """
+    读取workbook.xml和关系文件，找到每个工作表对应的XML部件
+    
+    Args:
+        zf: 打开的ZipFile对象
+    
+    Returns:
+        (列表[(工作表名, sheetId, 部件路径)], calcChain部件路径或None)
+    """
+    rels = {}
+    calc_chain = None
+    for rel in ET.fromstring(zf.read("xl/_rels/workbook.xml.rels")).iter(f"{{{PKG_REL_NS}}}Relationship"):
+        target = rel.get("Target", "")
+        target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+        rels[rel.get("Id")] = target
+        if rel.get("Type") == CALC_CHAIN_TYPE:
+            calc_chain = target
+    
+    sheets = []
+    for sheet in ET.fromstring(zf.read("xl/workbook.xml")).iter(f"{{{MAIN_NS}}}sheet"):
+        part_name = rels.get(sheet.get(f"{{{REL_NS}}}id"))
+        if part_name and part_name in zf.namelist() and "/worksheets/" in part_name:
+            sheets.append((sheet.get("name"), sheet.get("sheetId"), part_name))
+    return sheets, calc_chain
+
+def read_dimension(zf, part_name):
+    """
+    从工作表XML开头的<dimension>读取已用区域
+    
+    Returns:
+        (最大行, 最大列)，没有<dimension>时返回(1, 1)
+    """
+    with zf.open(part_name) as source:
+        head = source.read(65536)
+    match = re.search(rb'<(?:\w+:)?dimension\b[^>]*\bref="([^"]+)"', head)
+    if match is None:
+        return 1, 1
+    last = match.group(1).decode().split(":")[-1].replace("$", "")
+    letters = last.rstrip("0123456789")
+    return int(last[len(letters):] or 1), column_index_from_string(letters) if letters else 1
+
+def attribute(attrs, name):
+    """从标签属性字节中读取一个属性值"""
+    match = re.search(rb"\b" + name + rb'="([^"]*)"', attrs)
+    return match.group(1) if match else None
+
+def set_attribute(attrs, name, value):
+    """设置（或删除，value为None时）标签属性字节中的一个属性"""
+    pattern = re.compile(rb"\s" + name + rb'="[^"]*"')
+    if value is None:
+        return pattern.sub(b"", attrs)
+    if pattern.search(attrs):
+        return pattern.sub(b" " + name + b'="' + value + b'"', attrs)
+    return attrs + b" " + name + b'="' + value + b'"'
+
+def value_xml(prefix, value):
+    """
+    把公式引擎的计算结果转换为单元格XML
+    
+    Returns:
+        (t属性值或None, 单元格内容字节)
+    """
+    p = prefix
+    if value is None:
+        return None, b""
+    if isinstance(value, ExcelError):
+        return b"e", b"<" + p + b"v>" + str(value).encode() + b"</" + p + b"v>"
+    if isinstance(value, bool):
+        return b"b", b"<" + p + b"v>" + (b"1" if value else b"0") + b"</" + p + b"v>"
+    if isinstance(value, float):
+        return None, b"<" + p + b"v>" + repr(output_value(value)).encode() + b"</" + p + b"v>"
+    return b"inlineStr", (b"<" + p + b"is><" + p + b't xml:space="preserve">' + escape(value).encode("utf-8")
+                          + b"</" + p + b"t></" + p + b"is>")
+
+class MissingValueEvaluator:
+    """流式模式下第一次遇到没有缓存值的公式时才加载公式引擎，一次计算所有需要冻结的公式"""
+    
+    def __init__(self, excel_path, selector):
+        self.excel_path = excel_path
+        self.selector = selector
+        self.results = None
+        self.skipped = None
+    
+    def __call__(self, sheet_name, row, col):
+        """返回(计算结果, 无法计算的原因或None)"""
+        if self.results is None:
+            print("  - 发现没有缓存计算结果的公式，正在用内置公式引擎计算...")
+            engine = FormulaEngine(self.excel_path)
+            targets = [key for key, formula in engine.formulas.items()
+                       if self.selector.match(*key, formula[1:] if formula.startswith("=") else formula)]
+            self.results = engine.evaluate(targets)
+            self.skipped = engine.skipped
+            print_engine_summary(engine, targets, self.results)
+        key = (sheet_name, row, col)
+        return self.results.get(key), self.skipped.get(key)
+
+class SheetFreezer:
+    """逐块处理一个工作表的XML，冻结选中的公式"""
+    
+    def __init__(self, prefix, selector, sheet_name=None, evaluate=None):
+        self.prefix = prefix
+        self.selector = selector
+        self.sheet_name = sheet_name
+        # 计算没有缓存值的公式的函数 evaluate(工作表, 行, 列) -> (结果, 无法计算的原因或None)
+        self.evaluate = evaluate
+        self.column_cache = {}
+        p = re.escape(prefix)
+        self.cell_pattern = re.compile(rb"<" + p + rb"c\b([^>]*?)(?:/>|>(.*?)</" + p + rb"c>)", re.DOTALL)
+        self.formula_pattern = re.compile(rb"<" + p + rb"f\b([^>]*?)(?:/>|>(.*?)</" + p + rb"f>)", re.DOTALL)
+        self.value_pattern = re.compile(rb"<" + p + rb"v(?:\s[^>]*)?>(.*?)</" + p + rb"v>", re.DOTALL)
+        # 共享公式 {si: 公式}，用于判断引用它的其他单元格是否需要冻结
+        self.shared_formulas = {}
+        # 被冻结的共享公式主单元格 {si: (主单元格地址, 公式)}
+        self.frozen_masters = {}
+        # 被冻结的单元格地址，用于过滤calcChain
+        self.frozen_refs = set()
+        self.frozen = 0
+        self.missing_values = 0
+        self.evaluated = 0
+        self.expanded = 0
+    
+    def position(self, ref):
+        """单元格地址转换为(行, 列)"""
+        letters = ref.rstrip(b"0123456789")
+        col = self.column_cache.get(letters)
+        if col is None:
+            col = self.column_cache[letters] = column_index_from_string(letters.decode())
+        return int(ref[len(letters):]), col
+    
+    def freeze_cell(self, ref, attrs, content, formula):
+        """
+        删除单元格中的公式，保留缓存值；公式字符串结果转换为内联字符串
+        
+        Returns:
+            (新的单元格XML, None)；没有缓存值且内置引擎无法计算时为(None, 原因)，公式保持不变
+        """
+        p = self.prefix
+        content = content[:formula.start()] + content[formula.end():]
+        cell_type = attribute(attrs, b"t")
+        value = self.value_pattern.search(content)
+        if value is not None and not value.group(1) and cell_type != b"str":
+            # openpyxl等程序写入的公式带有空的<v></v>
+            value = None
+        
+        if value is None:
+            result = None
+            if self.evaluate is not None:
+                result, reason = self.evaluate(self.sheet_name, *self.position(ref))
+                if reason is not None:
+                    return None, reason
+            if result is None:
+                self.missing_values += 1
+            else:
+                self.evaluated += 1
+            cell_type, content = value_xml(p, result)
+            attrs = set_attribute(attrs, b"t", cell_type)
+        elif cell_type == b"str":
+            # t="str"只能用于公式，去掉公式后改为内联字符串
+            attrs = set_attribute(attrs, b"t", b"inlineStr")
+            content = (b"<" + p + b"is><" + p + b't xml:space="preserve">' + value.group(1)
+                       + b"</" + p + b"t></" + p + b"is>")
+        
+        self.frozen += 1
+        if not content:
+            return b"<" + p + b"c" + attrs + b"/>", None
+        return b"<" + p + b"c" + attrs + b">" + content + b"</" + p + b"c>", None
+    
+    def expand_shared(self, ref, content, formula):
+        """共享公式的主单元格已被冻结时，把其他列中引用它的单元格改为普通公式"""
+        p = self.prefix
+        origin, text = self.frozen_masters[attribute(formula.group(1), b"si")]
+        translated = Translator(text, origin=origin).translate_formula(ref.decode())
+        self.expanded += 1
+        new_formula = b"<" + p + b"f>" + escape(translated.lstrip("=")).encode("utf-8") + b"</" + p + b"f>"
+        return content[:formula.start()] + new_formula + content[formula.end():]
+    
+    def replace_cell(self, match):
+        """处理单个单元格，不需要修改时原样返回"""
+        attrs, content = match.group(1), match.group(2)
+        if not content:
+            return match.group(0)
+        formula = self.formula_pattern.search(content)
+        if formula is None:
+            return match.group(0)
+        ref = attribute(attrs, b"r")
+        if ref is None:
+            return match.group(0)
+        
+        f_attrs, f_text = formula.group(1), formula.group(2)
+        is_shared = attribute(f_attrs, b"t") == b"shared"
+        si = attribute(f_attrs, b"si") if is_shared else None
+        text = None
+        if is_shared and f_text:
+            text = self.shared_formulas[si] = unescape(f_text.decode("utf-8"))
+        
+        row, col = self.position(ref)
+        if self.selector.is_candidate(self.sheet_name, row, col):
+            if text is None:
+                # 共享公式的其他单元格按主单元格的公式判断（函数和整列引用不随位置变化）
+                text = unescape(f_text.decode("utf-8")) if f_text else self.shared_formulas.get(si, "")
+            selection = self.selector.match(self.sheet_name, row, col, text)
+            if selection is not None:
+                cell_xml, reason = self.freeze_cell(ref, attrs, content, formula)
+                if cell_xml is None:
+                    self.selector.skip(self.sheet_name, ref.decode(), text, reason)
+                    return match.group(0)
+                self.selector.record(self.sheet_name, ref.decode(), text, *selection)
+                self.frozen_refs.add(ref)
+                if is_shared and f_text:
+                    self.frozen_masters[si] = (ref.decode(), "=" + text)
+                return cell_xml
+        
+        if is_shared and not f_text and si in self.frozen_masters:
+            content = self.expand_shared(ref, content, formula)
+            return b"<" + self.prefix + b"c" + attrs + b">" + content + b"</" + self.prefix + b"c>"
+        return match.group(0)
+    
+    def process(self, data):
+        """处理一段完整的XML（以行结束）"""
+        return self.cell_pattern.sub(self.replace_cell, data)
+
+def freeze_sheet_stream(zf, zout, item, selector, sheet_name=None, evaluate=None):
+    """
+    逐块读取工作表XML并写入新压缩包，只修改选中的公式单元格
+    
+    每次处理到缓冲区中最后一个</row>为止，剩余部分与下一块拼接，因此内存占用只与块大小有关
+    
+    Args:
+        zf: 源ZipFile
+        zout: 目标ZipFile
+        item: 工作表的ZipInfo
+        selector: FormulaSelector对象
+        sheet_name: 工作表名
+        evaluate: 计算没有缓存值的公式的函数，None表示不计算
+    
+    Returns:
+        SheetFreezer对象（包含统计信息）
+    """
+    freezer = None
+    row_end = None
+    buffer = b""
+    
+    with zf.open(item) as source, zout.open(copy.copy(item), "w", force_zip64=True) as target:
+        while True:
+            chunk = source.read(CHUNK_SIZE)
+            buffer += chunk
+            
+            if freezer is None:
+                root = re.search(rb"<(\w+:)?worksheet\b", buffer)
+                if root is None and chunk:
+                    continue
+                prefix = (root.group(1) or b"") if root else b""
+                freezer = SheetFreezer(prefix, selector, sheet_name, evaluate)
+                row_end = b"</" + prefix + b"row>"
+            
+            if not chunk:
+                target.write(freezer.process(buffer))
+                break
+            
+            cut = buffer.rfind(row_end)
+            if cut < 0:
+                continue
+            cut += len(row_end)
+            target.write(freezer.process(buffer[:cut]))
+            buffer = buffer[cut:]
+    
+    return freezer
+
+def filter_calc_chain(xml, frozen):
+    """
+    从calcChain.xml中删除被冻结的单元格
+    
+    calcChain中的i（sheetId）省略时沿用上一条的值，删除条目后需要在下一条保留的条目上补写i
+    
+    Args:
+        xml: calcChain.xml的字节
+        frozen: 被冻结的单元格 {sheetId: 单元格地址字节集合}
+    
+    Returns:
+        (新的XML字节, 剩余条目数)
+    """
+    entry_pattern = re.compile(rb"<(\w+:)?c\b([^>]*?)/>")
+    current_sheet = None
+    written_sheet = None
+    kept = 0
+    
+    def replace(match):
+        nonlocal current_sheet, written_sheet, kept
+        attrs = match.group(2)
+        sheet_id = attribute(attrs, b"i")
+        if sheet_id is not None:
+            current_sheet = sheet_id
+        ref = attribute(attrs, b"r") or b""
+        if current_sheet is not None and ref in frozen.get(current_sheet.decode(), ()):
+            return b""
+        
+        kept += 1
+        if sheet_id is None and current_sheet != written_sheet:
+            attrs = set_attribute(attrs, b"i", current_sheet)
+        written_sheet = current_sheet
+        return b"<" + (match.group(1) or b"") + b"c" + attrs + b"/>"
+    
+    return entry_pattern.sub(replace, xml), kept
+
+def remove_calc_chain_references(xml, part_name, is_content_types):
+    """从[Content_Types].xml或workbook.xml.rels中删除calcChain的条目"""
+    if is_content_types:
+        pattern = rb'<Override\b[^>]*PartName="/' + re.escape(part_name.encode()) + rb'"[^>]*/>'
+    else:
+        pattern = rb'<Relationship\b[^>]*Type="' + re.escape(CALC_CHAIN_TYPE.encode()) + rb'"[^>]*/>'
+    return re.sub(pattern, b"", xml)
+
+def convert_formulas_streaming(excel_path, columns, output_file):
+    """
+    流式模式：直接处理压缩包中的工作表XML，将选中的公式替换为缓存的计算结果
+    
+    Args:
+        excel_path: Excel文件路径
+        columns: 要处理的列配置列表
+        output_file: 输出文件路径
+    
+    Returns:
+        冻结的公式数，失败时返回None
+    """
+    print(f"正在处理文件: {excel_path}")
+    
+    # 检查文件是否存在
+    if not os.path.exists(excel_path):
+        print(f"错误: 文件 '{excel_path}' 不存在!")
+        return None
+    
+    total = 0
+    with zipfile.ZipFile(excel_path) as zf:
+        sheets, calc_chain = read_worksheet_parts(zf)
+        sheet_parts = {part_name: (name, sheet_id) for name, sheet_id, part_name in sheets}
+        selector = FormulaSelector(columns, {name: read_dimension(zf, part_name) for name, _, part_name in sheets})
+        evaluator = MissingValueEvaluator(excel_path, selector) if evaluate_missing_values else None
+        if freeze_report_file:
+            selector.open_report(freeze_report_file)
+        
+        # 被冻结的单元格要处理完工作表才知道，calcChain和引用它的两个部件放到最后写入
+        deferred_parts = {calc_chain, "[Content_Types].xml", "xl/_rels/workbook.xml.rels"}
+        frozen = {}
+        
+        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zout:
+            for item in zf.infolist():
+                if item.filename in sheet_parts:
+                    sheet_name, sheet_id = sheet_parts[item.filename]
+                    if selector.sheets and sheet_name.lower() not in selector.sheets:
+                        zout.writestr(item, zf.read(item.filename))
+                        continue
+                    print(f"正在处理工作表: {sheet_name}")
+                    freezer = freeze_sheet_stream(zf, zout, item, selector, sheet_name, evaluator)
+                    frozen[sheet_id] = freezer.frozen_refs
+                    total += freezer.frozen
+                    print(f"  - 工作表 '{sheet_name}' 中共处理了 {freezer.frozen} 个公式单元格")
+                    if freezer.evaluated:
+                        print(f"  - {freezer.evaluated} 个公式没有缓存的计算结果，已用公式引擎的计算结果代替")
+                    if freezer.missing_values:
+                        print(f"  - 警告: {freezer.missing_values} 个公式没有缓存的计算结果，已变为空单元格"
+                              f"（请先在Excel中打开并保存一次）")
+                    if freezer.expanded:
+                        print(f"  - 共享公式的主单元格被冻结，{freezer.expanded} 个其他单元格已改为普通公式")
+                    continue
+                if item.filename in deferred_parts:
+                    continue
+                zout.writestr(item, zf.read(item.filename))
+            
+            # calcChain较小，直接在内存中过滤，没有剩余条目时删除整个部件
+            drop_calc_chain = False
+            if calc_chain and calc_chain in zf.namelist():
+                new_calc_chain, kept = filter_calc_chain(zf.read(calc_chain), frozen)
+                drop_calc_chain = kept == 0
+                if not drop_calc_chain:
+                    zout.writestr(zf.getinfo(calc_chain), new_calc_chain)
+            for part_name in ("[Content_Types].xml", "xl/_rels/workbook.xml.rels"):
+                if part_name not in zf.namelist():
+                    continue
+                data = zf.read(part_name)
+                if drop_calc_chain:
+                    data = remove_calc_chain_references(data, calc_chain, part_name == "[Content_Types].xml")
+                zout.writestr(zf.getinfo(part_name), data)
+    
+    selector.close_report()
+    selector.print_summary()
+    if drop_calc_chain:
+        print("calcChain.xml中已没有公式，已删除")
+    return total
+
 def main():
     # 构建输出文件名
     file_name, file_ext = os.path.splitext(input_file)
     output_file = f"{file_name}（已修改）{file_ext}"
     
+    if streaming_mode:
+        # 流式处理，不加载工作簿
+        total = convert_formulas_streaming(input_file, columns_to_process, output_file)
+        if total is not None:
+            print(f"处理完成! 共处理 {total} 个公式单元格，工作簿已保存为: {output_file}")
+            print(f"注意: 所有选中的公式已被替换为它们的计算结果（固定值）")
+        return
+    
     # 执行公式转换
     wb = convert_formulas_to_values(input_file, columns_to_process)
     
@@ -127,7 +2682,7 @@ def main():
         # 保存修改后的工作簿
         wb.save(output_file)
         print(f"处理完成! 工作簿已保存为: {output_file}")
-        print(f"注意: 所有指定列中的公式已被替换为它们的计算结果（固定值）")
+        print(f"注意: 所有选中的公式已被替换为它们的计算结果（固定值）")
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -3,11 +3,22 @@
 
 """
 合并多个Excel工作簿
+
+流式模式下以只读方式逐行读取源文件，逐行追加到只写模式的合并结果中：
+样式按源文件的样式编号预先映射（每种样式只注册一次），列宽、行高和合并单元格
+从源工作表的XML中分块扫描得到，内存占用不随总行数增长，适合合并大量大文件
 """
 
 import os
+import re
+import zipfile
 import openpyxl
 from datetime import datetime
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE
+from openpyxl.utils import get_column_letter
+from openpyxl.worksheet.dimensions import ColumnDimension
 
 # 文件读取部分，便于修改需读取文件名
 input_files = [
@@ -19,6 +30,253 @@ input_files = [
 # 输出文件名
 output_file = f"合并工作簿（{datetime.now().strftime('%Y%m%d_%H%M%S')}）.xlsx"
 
+# 流式模式：True 以只读方式逐行读取、以只写方式逐行写入，内存占用不随总行数增长（适合大文件）；
+# False 把所有工作簿完整加载到内存中复制
+streaming_mode = True
+
+# 流式扫描工作表XML时每次读取的字节数
+CHUNK_SIZE = 1 << 20
+
+# 工作表XML中的列宽、行和合并单元格标签
+LAYOUT_TAG_PATTERN = re.compile(rb"<(?:\w+:)?(col|row|mergeCell)\b([^>]*)>")
+ATTRIBUTE_PATTERN = re.compile(rb'([\w:]+)="([^"]*)"')
+
+def unique_sheet_name(file_name, sheet_name, existing_names):
+    """
+    生成合并后的工作表名称（文件名_工作表名），超长时截断并保证唯一
+    
+    Args:
+        file_name: 文件名（不含扩展名）
+        sheet_name: 源工作表名
+        existing_names: 已有的工作表名称
+    
+    Returns:
+        新的工作表名称
+    """
+    new_sheet_name = f"{file_name}_{sheet_name}"
+    
+    # 如果名称太长，进行截断
+    if len(new_sheet_name) > 31:  # Excel工作表名称最大长度为31个字符
+        new_sheet_name = new_sheet_name[:28] + "..."
+    
+    # 确保工作表名称唯一
+    counter = 1
+    original_name = new_sheet_name
+    while new_sheet_name in existing_names:
+        suffix = f"_{counter}"
+        # 确保添加后缀后的名称不超过31个字符
+        if len(original_name) + len(suffix) > 31:
+            new_sheet_name = original_name[:31-len(suffix)] + suffix
+        else:
+            new_sheet_name = original_name + suffix
+        counter += 1
+    
+    return new_sheet_name
+
+class StyleMapper:
+    """把源工作簿中的单元格样式映射为目标工作簿中的样式，每种样式只注册一次"""
+    
+    def __init__(self, source_wb, target_wb):
+        self.source = source_wb
+        self.target = target_wb
+        self.cache = {}
+    
+    def map(self, source_style):
+        """
+        返回源样式（StyleArray）在目标工作簿中对应的样式
+        
+        Args:
+            source_style: 源单元格的样式数组
+        
+        Returns:
+            目标工作簿中的StyleArray，赋给单元格前需要复制
+        """
+        style = self.cache.get(source_style)
+        if style is not None:
+            return style
+        
+        source, target = self.source, self.target
+        style = StyleArray()
+        style.fontId = target._fonts.add(source._fonts[source_style.fontId])
+        style.fillId = target._fills.add(source._fills[source_style.fillId])
+        style.borderId = target._borders.add(source._borders[source_style.borderId])
+        style.alignmentId = target._alignments.add(source._alignments[source_style.alignmentId])
+        style.protectionId = target._protections.add(source._protections[source_style.protectionId])
+        # 内置数字格式的编号在各工作簿中相同，自定义格式需要重新编号
+        if source_style.numFmtId < BUILTIN_FORMATS_MAX_SIZE:
+            style.numFmtId = source_style.numFmtId
+        else:
+            number_format = source._number_formats[source_style.numFmtId - BUILTIN_FORMATS_MAX_SIZE]
+            style.numFmtId = target._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE
+        style.quotePrefix = source_style.quotePrefix
+        
+        self.cache[StyleArray(source_style)] = style
+        return style
+
+def parse_attributes(raw):
+    """解析标签中的属性，返回去掉命名空间前缀的属性字典"""
+    return {name.split(b":")[-1].decode(): value.decode() for name, value in ATTRIBUTE_PATTERN.findall(raw)}
+
+def scan_sheet_layout(zf, part_name, layout):
+    """
+    分块扫描工作表XML，按顺序返回设置了行高或隐藏的行 (行号, 行高, 是否隐藏)
+    
+    列宽写入layout["columns"]（位于sheetData之前，第一次取值后即可使用），
+    合并单元格写入layout["merged_cells"]（扫描结束后才完整）
+    
+    Args:
+        zf: 打开的ZipFile
+        part_name: 工作表部件路径
+        layout: 接收列宽和合并单元格的字典
+    """
+    layout["columns"] = []
+    layout["merged_cells"] = []
+    row_idx = 0
+    buffer = b""
+    
+    with zf.open(part_name) as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            data = buffer + chunk
+            # 只处理到最后一个完整标签，剩余部分留到下一块
+            cut = data.rfind(b">") + 1 if chunk else len(data)
+            buffer = data[cut:]
+            
+            for match in LAYOUT_TAG_PATTERN.finditer(data, 0, cut):
+                tag = match.group(1)
+                attrs = parse_attributes(match.group(2))
+                if tag == b"row":
+                    # 省略r属性的行紧接上一行
+                    row_idx = int(attrs["r"]) if "r" in attrs else row_idx + 1
+                    height = float(attrs["ht"]) if "ht" in attrs else None
+                    hidden = attrs.get("hidden") in ("1", "true")
+                    if height is not None or hidden:
+                        yield row_idx, height, hidden
+                elif tag == b"col":
+                    layout["columns"].append((int(attrs["min"]), int(attrs["max"]),
+                                              float(attrs["width"]) if "width" in attrs else None,
+                                              attrs.get("hidden") in ("1", "true")))
+                elif "ref" in attrs:
+                    layout["merged_cells"].append(attrs["ref"])
+            
+            if not chunk:
+                break
+
+def copy_sheet_streaming(source_sheet, target_sheet, zf, mapper):
+    """
+    逐行复制只读工作表到只写工作表，返回复制的行数
+    
+    Args:
+        source_sheet: 只读模式的源工作表
+        target_sheet: 只写模式的目标工作表
+        zf: 源文件的ZipFile，用于读取列宽、行高和合并单元格
+        mapper: 源工作簿的StyleMapper
+    """
+    layout = {}
+    row_layout = scan_sheet_layout(zf, source_sheet._worksheet_path, layout)
+    # 第一次取值时列宽已经读到；列宽必须在写入第一行之前设置
+    next_row = next(row_layout, None)
+    for min_col, max_col, width, hidden in layout["columns"]:
+        if width is None and not hidden:
+            continue
+        letter = get_column_letter(min_col)
+        target_sheet.column_dimensions[letter] = ColumnDimension(
+            target_sheet, index=letter, width=width, hidden=hidden, min=min_col, max=max_col)
+    
+    # 只读模式按<dimension>确定范围，有些程序导出的文件中该范围不准确，改为读取全部单元格
+    source_sheet.reset_dimensions()
+    
+    row_idx = 0
+    for row in source_sheet.iter_rows():
+        # iter_rows从第1行开始并补齐空行，行号与源文件一致
+        row_idx += 1
+        while next_row is not None and next_row[0] < row_idx:
+            next_row = next(row_layout, None)
+        has_dimension = next_row is not None and next_row[0] == row_idx
+        if has_dimension:
+            # 行高在写入该行时读取，必须在追加之前设置
+            dimension = target_sheet.row_dimensions[row_idx]
+            dimension.height = next_row[1]
+            dimension.hidden = next_row[2]
+        
+        values = []
+        for cell in row:
+            if getattr(cell, "has_style", False):
+                target_cell = WriteOnlyCell(target_sheet, value=cell.value)
+                target_cell._style = StyleArray(mapper.map(cell.style_array))
+                values.append(target_cell)
+            else:
+                values.append(cell.value)
+        target_sheet.append(values)
+        
+        if has_dimension:
+            # 已写入的行不再需要，避免行尺寸随行数累积
+            del target_sheet.row_dimensions[row_idx]
+    
+    # 扫描完剩余部分以得到全部合并单元格（合并单元格在sheetData之后）
+    for _ in row_layout:
+        pass
+    for ref in layout["merged_cells"]:
+        target_sheet.merged_cells.add(ref)
+    
+    return row_idx
+
+def merge_workbooks_streaming(file_paths, output_path):
+    """
+    以流式方式合并多个Excel工作簿并直接保存
+    
+    Args:
+        file_paths: Excel文件路径列表
+        output_path: 输出文件路径
+    
+    Returns:
+        成功时返回True
+    """
+    # 检查文件是否都存在
+    missing_files = [f for f in file_paths if not os.path.exists(f)]
+    if missing_files:
+        print(f"错误: 以下文件不存在: {', '.join(missing_files)}")
+        return False
+    
+    # 只写模式的工作簿没有默认工作表，工作表写完后立即落盘
+    merged_wb = openpyxl.Workbook(write_only=True)
+    
+    # 记录每个文件的工作表数量
+    sheet_counts = {}
+    
+    for i, file_path in enumerate(file_paths):
+        print(f"正在处理文件 {i+1}/{len(file_paths)}: {file_path}")
+        
+        wb = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            # 图表工作表没有单元格，跳过
+            sheet_counts[file_path] = len(wb.worksheets)
+            file_name = os.path.splitext(os.path.basename(file_path))[0]
+            mapper = StyleMapper(wb, merged_wb)
+            
+            with zipfile.ZipFile(file_path) as zf:
+                for source_sheet in wb.worksheets:
+                    new_sheet_name = unique_sheet_name(file_name, source_sheet.title, merged_wb.sheetnames)
+                    target_sheet = merged_wb.create_sheet(title=new_sheet_name)
+                    rows = copy_sheet_streaming(source_sheet, target_sheet, zf, mapper)
+                    print(f"  - 已复制工作表: {source_sheet.title} -> {new_sheet_name}（{rows} 行）")
+        finally:
+            wb.close()
+        
+        print(f"已合并文件: {file_path}（{len(mapper.cache)} 种样式）")
+    
+    # 打印合并统计信息
+    print("\n合并统计:")
+    total_sheets = 0
+    for file_path, count in sheet_counts.items():
+        print(f"  - {os.path.basename(file_path)}: {count} 个工作表")
+        total_sheets += count
+    
+    print(f"  - 总计: {total_sheets} 个工作表")
+    
+    merged_wb.save(output_path)
+    return True
+
 def merge_workbooks(file_paths):
     """
     合并多个Excel工作簿
@@ -52,6 +310,9 @@ def merge_workbooks(file_paths):
         # 打开当前工作簿
         wb = openpyxl.load_workbook(file_path, data_only=True)
         
+        # 样式映射在同一个工作簿的所有工作表之间共用
+        mapper = StyleMapper(wb, merged_wb)
+        
         # 记录工作表数量
         sheet_counts[file_path] = len(wb.sheetnames)
         
@@ -64,23 +325,7 @@ def merge_workbooks(file_paths):
             source_sheet = wb[sheet_name]
             
             # 创建新的工作表名称（文件名_工作表名）
-            new_sheet_name = f"{file_name}_{sheet_name}"
-            
-            # 如果名称太长，进行截断
-            if len(new_sheet_name) > 31:  # Excel工作表名称最大长度为31个字符
-                new_sheet_name = new_sheet_name[:28] + "..."
-            
-            # 确保工作表名称唯一
-            counter = 1
-            original_name = new_sheet_name
-            while new_sheet_name in merged_wb.sheetnames:
-                suffix = f"_{counter}"
-                # 确保添加后缀后的名称不超过31个字符
-                if len(original_name) + len(suffix) > 31:
-                    new_sheet_name = original_name[:31-len(suffix)] + suffix
-                else:
-                    new_sheet_name = original_name + suffix
-                counter += 1
+            new_sheet_name = unique_sheet_name(file_name, sheet_name, merged_wb.sheetnames)
             
             # 创建新工作表
             target_sheet = merged_wb.create_sheet(title=new_sheet_name)
@@ -88,36 +333,29 @@ def merge_workbooks(file_paths):
             # 复制单元格数据
             for row in source_sheet.iter_rows():
                 for cell in row:
-                    # 获取单元格值
-                    value = cell.value
-                    
                     # 创建目标单元格
                     target_cell = target_sheet.cell(
                         row=cell.row, 
                         column=cell.column,
-                        value=value
+                        value=cell.value
                     )
                     
-                    # 复制单元格样式
+                    # 复制单元格样式（每种样式只映射一次，之后直接赋样式数组）
                     if cell.has_style:
-                        target_cell.font = cell.font
-                        target_cell.border = cell.border
-                        target_cell.fill = cell.fill
-                        target_cell.number_format = cell.number_format
-                        target_cell.protection = cell.protection
-                        target_cell.alignment = cell.alignment
+                        target_cell._style = StyleArray(mapper.map(cell._style))
             
-            # 复制列宽
-            for col_idx, col in enumerate(source_sheet.columns, 1):
-                if source_sheet.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width:
-                    target_sheet.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width = \
-                        source_sheet.column_dimensions[openpyxl.utils.get_column_letter(col_idx)].width
+            # 复制列宽（直接读取已有的列尺寸，包括min到max的整段列）
+            for key, dimension in source_sheet.column_dimensions.items():
+                if dimension.width:
+                    target_dimension = target_sheet.column_dimensions[key]
+                    target_dimension.width = dimension.width
+                    target_dimension.min = dimension.min
+                    target_dimension.max = dimension.max
             
             # 复制行高
-            for row_idx, row in enumerate(source_sheet.rows, 1):
-                if source_sheet.row_dimensions[row_idx].height:
-                    target_sheet.row_dimensions[row_idx].height = \
-                        source_sheet.row_dimensions[row_idx].height
+            for row_idx, dimension in source_sheet.row_dimensions.items():
+                if dimension.height:
+                    target_sheet.row_dimensions[row_idx].height = dimension.height
             
             # 复制合并单元格
             for merged_cell_range in source_sheet.merged_cells.ranges:
@@ -139,6 +377,13 @@ def merge_workbooks(file_paths):
     return merged_wb
 
 def main():
+    if streaming_mode:
+        # 流式合并，工作簿在合并过程中直接保存
+        if merge_workbooks_streaming(input_files, output_file):
+            print(f"合并完成! 工作簿已保存为: {output_file}")
+            print(f"共合并了 {len(input_files)} 个工作簿")
+        return
+    
     # 执行工作簿合并
     merged_wb = merge_workbooks(input_files)
     
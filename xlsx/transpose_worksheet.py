@@ -8,6 +8,8 @@ Excel工作表行列转置
 
 import os
 import openpyxl
+from openpyxl.styles.cell_style import StyleArray
+from openpyxl.styles.numbers import BUILTIN_FORMATS_MAX_SIZE
 from openpyxl.utils import get_column_letter
 
 # 文件读取部分，便于修改需读取文件名
@@ -17,6 +19,46 @@ sheet_name = "Sheet1"  # 请修改为实际的工作表名称
 # 输出文件设置
 output_file = None  # 如果为None，则自动生成输出文件名
 
+class StyleMapper:
+    """把源工作簿中的单元格样式映射为目标工作簿中的样式，每种样式只注册一次"""
+    
+    def __init__(self, source_wb, target_wb):
+        self.source = source_wb
+        self.target = target_wb
+        self.cache = {}
+    
+    def map(self, source_style):
+        """
+        返回源样式（StyleArray）在目标工作簿中对应的样式
+        
+        Args:
+            source_style: 源单元格的样式数组
+        
+        Returns:
+            目标工作簿中的StyleArray，赋给单元格前需要复制
+        """
+        style = self.cache.get(source_style)
+        if style is not None:
+            return style
+        
+        source, target = self.source, self.target
+        style = StyleArray()
+        style.fontId = target._fonts.add(source._fonts[source_style.fontId])
+        style.fillId = target._fills.add(source._fills[source_style.fillId])
+        style.borderId = target._borders.add(source._borders[source_style.borderId])
+        style.alignmentId = target._alignments.add(source._alignments[source_style.alignmentId])
+        style.protectionId = target._protections.add(source._protections[source_style.protectionId])
+        # 内置数字格式的编号在各工作簿中相同，自定义格式需要重新编号
+        if source_style.numFmtId < BUILTIN_FORMATS_MAX_SIZE:
+            style.numFmtId = source_style.numFmtId
+        else:
+            number_format = source._number_formats[source_style.numFmtId - BUILTIN_FORMATS_MAX_SIZE]
+            style.numFmtId = target._number_formats.add(number_format) + BUILTIN_FORMATS_MAX_SIZE
+        style.quotePrefix = source_style.quotePrefix
+        
+        self.cache[StyleArray(source_style)] = style
+        return style
+
 def transpose_worksheet(file_path, sheet_name, output_path=None):
     """
     转置Excel工作表的行和列
@@ -52,6 +94,7 @@ def transpose_worksheet(file_path, sheet_name, output_path=None):
         output_wb = openpyxl.Workbook()
         output_sheet = output_wb.active
         output_sheet.title = f"{sheet_name}_转置"
+        mapper = StyleMapper(wb, output_wb)
         
         # 获取源工作表的数据范围
         max_row = source_sheet.max_row
@@ -71,13 +114,9 @@ def transpose_worksheet(file_path, sheet_name, output_path=None):
                 # 复制值
                 output_cell.value = source_cell.value
                 
-                # 复制样式
+                # 复制样式（每种样式只映射一次，之后直接赋样式数组）
                 if source_cell.has_style:
-                    output_cell.font = source_cell.font
-                    output_cell.border = source_cell.border
-                    output_cell.fill = source_cell.fill
-                    output_cell.number_format = source_cell.number_format
-                    output_cell.alignment = source_cell.alignment
+                    output_cell._style = StyleArray(mapper.map(source_cell._style))
         
         # 调整列宽以适应内容
         for col in range(1, max_row + 1):